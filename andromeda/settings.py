@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 
 try:
@@ -129,6 +130,15 @@ if USE_CHANNELS:
         # channels isn't installed; leave Channels disabled.
         USE_CHANNELS = False
 
+# Universe Graph live updates: changes are coalesced per user and sent as one delta
+GRAPH_BROADCAST_WINDOW = float(os.environ.get('GRAPH_BROADCAST_WINDOW', 0.5))  # seconds of inactivity before sending
+GRAPH_BROADCAST_MAX_DELAY = float(os.environ.get('GRAPH_BROADCAST_MAX_DELAY', 2.0))  # upper bound during continuous edits
+GRAPH_BROADCAST_MAX_ITEMS = int(os.environ.get('GRAPH_BROADCAST_MAX_ITEMS', 500))  # larger deltas become a full refresh
+GRAPH_LAYOUT_DELAY = int(os.environ.get('GRAPH_LAYOUT_DELAY', 5))  # seconds to batch edits before recomputing the layout
+
+# Notes autosave: buffered drafts are written to the database at most this often (notes.autosave)
+NOTES_AUTOSAVE_FLUSH_SECONDS = int(os.environ.get('NOTES_AUTOSAVE_FLUSH_SECONDS', 5))
+
 # Redirect URLs
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
@@ -142,6 +152,33 @@ GOOGLE_VISION_API_KEY = os.environ.get('GOOGLE_VISION_API_KEY')
 # AI Service Settings
 AI_TEXT_MODEL = os.environ.get('AI_TEXT_MODEL', 'gpt-4o-mini')
 AI_VISION_MODEL = os.environ.get('AI_VISION_MODEL', 'gpt-4o-mini')
+# 'combined' = one structured JSON call per memory, 'sequential' = legacy 3-call mode
+AI_TEXT_ANALYSIS_MODE = os.environ.get('AI_TEXT_ANALYSIS_MODE', 'combined')
+# Image analysis: 'google' (Cloud Vision) or 'local' (offline stand-in with the same response shape)
+AI_VISION_TRANSPORT = os.environ.get('AI_VISION_TRANSPORT', 'google')
+AI_VISION_MAX_SIDE = int(os.environ.get('AI_VISION_MAX_SIDE', 1024))  # photos are downscaled before upload
+
+# LLM response cache (core.services.llm_cache): 'locmem', 'file', 'db' or 'dummy'
+LLM_CACHE = {
+    'BACKEND': os.environ.get('LLM_CACHE_BACKEND', 'locmem'),
+    'TTL': int(os.environ.get('LLM_CACHE_TTL', 86400)),
+    'MAX_ENTRIES': int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 1000)),
+    # Calls above this temperature want a fresh answer each time and are not cached
+    'MAX_TEMPERATURE': float(os.environ.get('LLM_CACHE_MAX_TEMPERATURE', 0.3)),
+    # 'file' backend: outside the project tree
+    'LOCATION': os.environ.get('LLM_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'andromeda-llm-cache')),
+}
+
+# AI task queue (processed by `python manage.py run_ai_worker`)
+AI_TASK_MAX_ATTEMPTS = int(os.environ.get('AI_TASK_MAX_ATTEMPTS', 3))
+AI_TASK_RETRY_BACKOFF = int(os.environ.get('AI_TASK_RETRY_BACKOFF', 30))  # seconds, doubled on each retry
+AI_TASK_STALE_AFTER = int(os.environ.get('AI_TASK_STALE_AFTER', 900))  # running tasks older than this are requeued
+
+# PDF exports (generated by run_ai_worker)
+PDF_EXPORT_IMAGE_MAX_SIDE = int(os.environ.get('PDF_EXPORT_IMAGE_MAX_SIDE', 1200))  # photos are downscaled before embedding
+PDF_EXPORT_MAX_ATTEMPTS = int(os.environ.get('PDF_EXPORT_MAX_ATTEMPTS', 2))
+PDF_EXPORT_CHUNK_SIZE = int(os.environ.get('PDF_EXPORT_CHUNK_SIZE', 20))  # memories (and their photos) rendered per intermediate PDF
+JOURNAL_EXPORT_CHUNK_SIZE = int(os.environ.get('JOURNAL_EXPORT_CHUNK_SIZE', 50))  # entries rendered per intermediate PDF
 
 # Email Configuration
 EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    User, Note, Link, Template, Attachment, APIIntegration, AITask,
+    User, Note, Link, Template, Attachment, APIIntegration, AITask, LLMResponseCache,
     Souvenir, AnalyseIASouvenir, AlbumSouvenir, CapsuleTemporelle,
     EntreeJournal, SouvenirEntree, PartageSouvenir,
     ExportPDF, SuiviMotivationnel, Badge, UserBadge, HistoireInspirante, DefiQuotidien,
@@ -43,21 +43,22 @@ class SouvenirAdmin(admin.ModelAdmin):
     actions = ['mark_as_favorite', 'analyze_with_ai']
     
     def mark_as_favorite(self, request, queryset):
+        from .services.memory_insights import rebuild_snapshot
+        users = set(queryset.values_list('utilisateur', flat=True))
         updated = queryset.update(is_favorite=True)
+        # QuerySet.update() bypasses the signals that maintain the insights snapshot
+        for user in User.objects.filter(pk__in=users):
+            rebuild_snapshot(user)
         self.message_user(request, f'{updated} memories marked as favorite.')
     mark_as_favorite.short_description = "Mark selected as favorite"
     
     def analyze_with_ai(self, request, queryset):
-        from .ai_services import AIAnalysisService
+        from .services.task_queue import enqueue_memory_analysis
         count = 0
-        for souvenir in queryset:
-            if not souvenir.ai_analyzed:
-                try:
-                    AIAnalysisService.analyze_memory(souvenir)
-                    count += 1
-                except Exception:
-                    pass
-        self.message_user(request, f'{count} memories analyzed with AI.')
+        for souvenir in queryset.filter(ai_analyzed=False).select_related('utilisateur'):
+            _, created = enqueue_memory_analysis(souvenir)
+            count += int(created)
+        self.message_user(request, f'{count} memories queued for AI analysis (run `manage.py run_ai_worker`).')
     analyze_with_ai.short_description = "Analyze with AI"
 
 
@@ -100,11 +101,11 @@ class EntreeHumeurInline(admin.TabularInline):
 
 @admin.register(EntreeJournal)
 class EntreeJournalAdmin(admin.ModelAdmin):
-    list_display = ('titre', 'utilisateur', 'is_favorite', 'is_public', 'nombre_mots', 'date_creation')
+    list_display = ('titre', 'utilisateur', 'is_favorite', 'is_public', 'word_count', 'reading_time', 'date_creation')
     list_filter = ('date_creation', 'is_favorite', 'is_public')
     search_fields = ('titre', 'contenu_texte', 'utilisateur__username', 'lieu')
     date_hierarchy = 'date_creation'
-    readonly_fields = ('date_creation', 'updated_at', 'nombre_mots')
+    readonly_fields = ('date_creation', 'updated_at', 'word_count', 'reading_time')
     inlines = [EntreeTagInline, EntreeHumeurInline]
     
     fieldsets = (
@@ -115,7 +116,7 @@ class EntreeJournalAdmin(admin.ModelAdmin):
             'fields': ('lieu', 'meteo', 'is_favorite', 'is_public')
         }),
         ('Système', {
-            'fields': ('date_creation', 'updated_at', 'nombre_mots'),
+            'fields': ('date_creation', 'updated_at', 'word_count', 'reading_time'),
             'classes': ('collapse',)
         }),
     )
@@ -123,7 +124,12 @@ class EntreeJournalAdmin(admin.ModelAdmin):
     actions = ['mark_as_favorite']
     
     def mark_as_favorite(self, request, queryset):
+        from .services.journal_stats import rebuild_stats
+        users = set(queryset.values_list('utilisateur', flat=True))
         updated = queryset.update(is_favorite=True)
+        # QuerySet.update() bypasses the signals that maintain JournalStatistics
+        for user in User.objects.filter(pk__in=users):
+            rebuild_stats(user)
         self.message_user(request, f'{updated} entrées marquées comme favorites.')
     mark_as_favorite.short_description = "Marquer comme favorite"
 
@@ -184,7 +190,7 @@ class PartageSouvenirAdmin(admin.ModelAdmin):
 
 @admin.register(ExportPDF)
 class ExportPDFAdmin(admin.ModelAdmin):
-    list_display = ('titre_export', 'utilisateur', 'date_export', 'status', 'nombre_pages')
+    list_display = ('titre_export', 'utilisateur', 'date_export', 'status', 'progress', 'nombre_pages')
     list_filter = ('status', 'date_export')
     search_fields = ('titre_export', 'utilisateur__username')
     date_hierarchy = 'date_export'
@@ -295,4 +301,27 @@ admin.site.register(Link)
 admin.site.register(Template)
 admin.site.register(Attachment)
 admin.site.register(APIIntegration)
-admin.site.register(AITask)
\ No newline at end of file
+
+
+@admin.register(AITask)
+class AITaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task_type', 'status', 'owner', 'souvenir', 'attempts', 'available_at', 'finished_at')
+    list_filter = ('status', 'task_type')
+    search_fields = ('owner__username', 'last_error')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
+    actions = ['retry_tasks']
+
+    def retry_tasks(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.exclude(status='running').update(
+            status='queued', attempts=0, available_at=timezone.now(), last_error=''
+        )
+        self.message_user(request, f'{updated} tasks requeued.')
+    retry_tasks.short_description = "Requeue selected tasks"
+
+
+@admin.register(LLMResponseCache)
+class LLMResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ('key', 'provider', 'model', 'hits', 'last_used_at', 'expires_at')
+    list_filter = ('provider', 'model')
+    readonly_fields = ('created_at', 'last_used_at')
@@ -2,8 +2,10 @@
 AI Services for Memory Analysis
 Provides multi-modal AI analysis (text + image + video)
 """
+import json
 import logging
 import os
+import threading
 from django.conf import settings
 from django.utils import timezone
 from .models import Souvenir, AnalyseIASouvenir
@@ -26,6 +28,71 @@ except ImportError:
     logger.warning("Google Cloud Vision package not installed. Using simulated analysis.")
 
 
+VALID_EMOTIONS = ['joy', 'sadness', 'nostalgia', 'gratitude', 'excitement', 'anger', 'fear', 'love', 'peace', 'neutral']
+
+TEXT_ANALYSIS_SCHEMA = {
+    'name': 'memory_analysis',
+    'strict': True,
+    'schema': {
+        'type': 'object',
+        'properties': {
+            'summary': {'type': 'string'},
+            'keywords': {'type': 'array', 'items': {'type': 'string'}},
+            'emotion': {'type': 'string', 'enum': VALID_EMOTIONS},
+            'emotion_score': {'type': 'number'},
+            'confidence': {'type': 'number'},
+        },
+        'required': ['summary', 'keywords', 'emotion', 'emotion_score', 'confidence'],
+        'additionalProperties': False,
+    },
+}
+
+_openai_clients = {}
+_openai_clients_lock = threading.Lock()
+
+
+def get_openai_client():
+    """
+    Process-wide OpenAI client (one per API key), so the HTTP connection
+    pool is reused between calls instead of rebuilt for every request.
+    """
+    api_key = settings.OPENAI_API_KEY
+    client = _openai_clients.get(api_key)
+    if client is None:
+        with _openai_clients_lock:
+            client = _openai_clients.get(api_key)
+            if client is None:
+                client = openai.OpenAI(api_key=api_key)
+                _openai_clients[api_key] = client
+    return client
+
+
+def cached_chat_completion(messages, temperature, max_tokens, model=None, **kwargs):
+    """
+    OpenAI chat completion through the shared LLM response cache (creative
+    calls, above LLM_CACHE['MAX_TEMPERATURE'], always get a fresh answer).
+    Returns the message content (str); provider errors are raised, never cached.
+    """
+    from .services.llm_cache import get_llm_cache
+
+    model = model or settings.AI_TEXT_MODEL
+
+    def _request():
+        response = get_openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        )
+        return response.choices[0].message.content or ''
+
+    return get_llm_cache().get_or_call(
+        'openai', model, messages, temperature, _request,
+        extra={'max_tokens': max_tokens, **kwargs},
+    )
+
+
 class AIAnalysisService:
     """
     Service for analyzing memories with AI
@@ -164,116 +231,193 @@ class AIAnalysisService:
     def _analyze_text(title, description):
         """
         Analyze text content (description + title)
-        Uses OpenAI API if available, otherwise simulated analysis
+        Uses OpenAI API if available, otherwise simulated analysis.
+        settings.AI_TEXT_ANALYSIS_MODE selects 'combined' (one structured
+        JSON call, default) or 'sequential' (summary, keywords, emotion).
         """
-        text = f"{title}. {description}"
-
         if OPENAI_AVAILABLE and settings.OPENAI_API_KEY:
             try:
-                client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+                mode = getattr(settings, 'AI_TEXT_ANALYSIS_MODE', 'combined')
+                if mode == 'sequential':
+                    return AIAnalysisService._analyze_text_sequential(get_openai_client(), title, description)
+                return AIAnalysisService._analyze_text_combined(title, description)
 
-                # Generate summary
-                summary_prompt = f"""
-                Summarize this memory in 2-3 sentences, capturing the essence and emotional impact:
+            except Exception as e:
+                logger.error(f"OpenAI API error: {str(e)}. Falling back to simulated analysis.")
+        # Fallback to simulated analysis
+        logger.warning("Using simulated text analysis (OpenAI unavailable or error)")
+        return AIAnalysisService._simulated_text_analysis(title, description)
 
-                Title: {title}
-                Description: {description}
+    @staticmethod
+    def _analyze_text_combined(title, description):
+        """
+        Single structured call returning summary, keywords, emotion,
+        emotion score and confidence. Each field is validated on its own
+        and replaced by the local heuristics when missing or invalid.
+        """
+        prompt = f"""
+        Analyze this memory and answer in JSON:
+        - summary: 2-3 sentences capturing the essence and emotional impact
+        - keywords: 5-8 key themes, people, places, or emotions
+        - emotion: the primary emotion, one of: {', '.join(VALID_EMOTIONS)}
+        - emotion_score: intensity of that emotion between 0 and 1
+        - confidence: your confidence in this analysis between 0 and 1
+
+        Title: {title}
+        Description: {description}
+        """
 
-                Summary:
-                """
+        raw = cached_chat_completion(
+            [{"role": "user", "content": prompt}],
+            temperature=0.2,
+            max_tokens=300,
+            response_format={"type": "json_schema", "json_schema": TEXT_ANALYSIS_SCHEMA},
+        )
+        try:
+            data = json.loads(raw)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid JSON from text analysis for memory '{title}': {raw[:200]}")
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
 
-                summary_response = client.chat.completions.create(
-                    model=settings.AI_TEXT_MODEL,
-                    messages=[{"role": "user", "content": summary_prompt}],
-                    max_tokens=150,
-                    temperature=0.3
-                )
-                summary = summary_response.choices[0].message.content.strip()
+        return AIAnalysisService._validate_text_analysis(data, title, description)
 
-                # Extract keywords
-                keywords_prompt = f"""
-                Extract 5-8 key themes, people, places, or emotions from this memory. Return as a comma-separated list:
+    @staticmethod
+    def _validate_text_analysis(data, title, description):
+        """Validate a structured analysis field by field, with local fallbacks"""
+        full_text = f"{title}. {description}"
 
-                Title: {title}
-                Description: {description}
+        summary = data.get('summary')
+        if not isinstance(summary, str) or not summary.strip():
+            summary = AIAnalysisService._simulated_summary(description)
 
-                Keywords:
-                """
+        keywords = data.get('keywords')
+        if isinstance(keywords, str):
+            keywords = keywords.split(',')
+        if isinstance(keywords, list):
+            keywords = [k.strip() for k in keywords if isinstance(k, str) and k.strip()]
+        if not keywords:
+            keywords = AIAnalysisService._extract_keywords_smart(full_text)
 
-                keywords_response = client.chat.completions.create(
-                    model=settings.AI_TEXT_MODEL,
-                    messages=[{"role": "user", "content": keywords_prompt}],
-                    max_tokens=100,
-                    temperature=0.2
-                )
-                keywords_text = keywords_response.choices[0].message.content.strip()
-                keywords = [k.strip() for k in keywords_text.split(',') if k.strip()]
+        emotion = data.get('emotion')
+        emotion = emotion.strip().lower() if isinstance(emotion, str) else ''
+        if emotion not in VALID_EMOTIONS:
+            emotion = next((e for e in VALID_EMOTIONS if e in emotion), None) if emotion else None
+            emotion = emotion or AIAnalysisService._detect_emotion_smart(full_text)
 
+        def _score(value, default):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return default
+            return min(max(value, 0.0), 1.0)
 
-                # Detect emotion (improved extraction)
-                emotion_prompt = f"""
-                Analyze the emotional tone of this memory and return ONLY ONE WORD (no explanation), the primary emotion from this list: joy, sadness, nostalgia, gratitude, excitement, anger, fear, love, peace, neutral.
+        logger.info(f"Extracted emotion: '{emotion}' for memory '{title}'")
+        return {
+            'summary': summary.strip(),
+            'keywords': keywords[:10],  # Limit to 10 keywords
+            'emotion': emotion,
+            'emotion_score': _score(data.get('emotion_score'), 0.9),
+            'confidence': _score(data.get('confidence'), 0.85),
+        }
 
-                Title: {title}
-                Description: {description}
+    @staticmethod
+    def _analyze_text_sequential(client, title, description):
+        """
+        Legacy mode: three separate calls (summary, keywords, emotion)
+        """
+        # Generate summary
+        summary_prompt = f"""
+        Summarize this memory in 2-3 sentences, capturing the essence and emotional impact:
 
-                Primary emotion:
-                """
+        Title: {title}
+        Description: {description}
 
-                emotion_response = client.chat.completions.create(
-                    model=settings.AI_TEXT_MODEL,
-                    messages=[{"role": "user", "content": emotion_prompt}],
-                    max_tokens=5,
-                    temperature=0.1
-                )
-                emotion_raw = emotion_response.choices[0].message.content.strip().lower()
-                logger.info(f"OpenAI raw emotion response: '{emotion_raw}' for memory '{title}'")
-                valid_emotions = ['joy', 'sadness', 'nostalgia', 'gratitude', 'excitement', 'anger', 'fear', 'love', 'peace', 'neutral']
-                # Try exact match first
-                if emotion_raw in valid_emotions:
-                    emotion = emotion_raw
-                else:
-                    # Try to find a valid emotion in the response string
-                    emotion = next((e for e in valid_emotions if e in emotion_raw), 'neutral')
+        Summary:
+        """
 
-                logger.info(f"Extracted emotion: '{emotion}' for memory '{title}'")
-                return {
-                    'summary': summary,
-                    'keywords': keywords[:10],  # Limit to 10 keywords
-                    'emotion': emotion,
-                    'emotion_score': 0.9,
-                    'confidence': 0.85
-                }
+        summary_response = client.chat.completions.create(
+            model=settings.AI_TEXT_MODEL,
+            messages=[{"role": "user", "content": summary_prompt}],
+            max_tokens=150,
+            temperature=0.3
+        )
+        summary = summary_response.choices[0].message.content.strip()
 
-            except Exception as e:
-                logger.error(f"OpenAI API error: {str(e)}. Falling back to simulated analysis.")
-        # Fallback to simulated analysis
-        logger.warning("Using simulated text analysis (OpenAI unavailable or error)")
-        
-        # Improved simulated analysis
-        full_text = f"{title}. {description}"
-        
-        # Generate better summary
+        # Extract keywords
+        keywords_prompt = f"""
+        Extract 5-8 key themes, people, places, or emotions from this memory. Return as a comma-separated list:
+
+        Title: {title}
+        Description: {description}
+
+        Keywords:
+        """
+
+        keywords_response = client.chat.completions.create(
+            model=settings.AI_TEXT_MODEL,
+            messages=[{"role": "user", "content": keywords_prompt}],
+            max_tokens=100,
+            temperature=0.2
+        )
+        keywords_text = keywords_response.choices[0].message.content.strip()
+        keywords = [k.strip() for k in keywords_text.split(',') if k.strip()]
+
+
+        # Detect emotion (improved extraction)
+        emotion_prompt = f"""
+        Analyze the emotional tone of this memory and return ONLY ONE WORD (no explanation), the primary emotion from this list: joy, sadness, nostalgia, gratitude, excitement, anger, fear, love, peace, neutral.
+
+        Title: {title}
+        Description: {description}
+
+        Primary emotion:
+        """
+
+        emotion_response = client.chat.completions.create(
+            model=settings.AI_TEXT_MODEL,
+            messages=[{"role": "user", "content": emotion_prompt}],
+            max_tokens=5,
+            temperature=0.1
+        )
+        emotion_raw = emotion_response.choices[0].message.content.strip().lower()
+        logger.info(f"OpenAI raw emotion response: '{emotion_raw}' for memory '{title}'")
+        # Try exact match first
+        if emotion_raw in VALID_EMOTIONS:
+            emotion = emotion_raw
+        else:
+            # Try to find a valid emotion in the response string
+            emotion = next((e for e in VALID_EMOTIONS if e in emotion_raw), 'neutral')
+
+        logger.info(f"Extracted emotion: '{emotion}' for memory '{title}'")
+        return {
+            'summary': summary,
+            'keywords': keywords[:10],  # Limit to 10 keywords
+            'emotion': emotion,
+            'emotion_score': 0.9,
+            'confidence': 0.85
+        }
+
+    @staticmethod
+    def _simulated_summary(description):
         if len(description) > 100:
             # Try to create a meaningful summary
             sentences = description.split('.')
             if len(sentences) > 1:
-                summary = f"{sentences[0].strip()}. {sentences[1].strip()}." if len(sentences) > 1 else sentences[0].strip()
-            else:
-                summary = description[:120] + "..."
-        else:
-            summary = description
-        
-        # Extract better keywords
-        keywords = AIAnalysisService._extract_keywords_smart(full_text)
-        
-        # Detect emotion more intelligently
-        emotion = AIAnalysisService._detect_emotion_smart(full_text)
-        
+                return f"{sentences[0].strip()}. {sentences[1].strip()}."
+            return description[:120] + "..."
+        return description
+
+    @staticmethod
+    def _simulated_text_analysis(title, description):
+        """Improved simulated analysis"""
+        full_text = f"{title}. {description}"
+
         return {
-            'summary': summary,
-            'keywords': keywords,
-            'emotion': emotion,
+            'summary': AIAnalysisService._simulated_summary(description),
+            'keywords': AIAnalysisService._extract_keywords_smart(full_text),
+            'emotion': AIAnalysisService._detect_emotion_smart(full_text),
             'emotion_score': 0.85,
             'confidence': 0.82
         }
@@ -282,74 +426,16 @@ class AIAnalysisService:
     def _analyze_image(photo):
         """
         Analyze image content
-        Uses Google Vision API if available, otherwise simulated analysis
+        Uses Google Vision API (or the local transport) if available, otherwise simulated analysis
         """
-        if GOOGLE_VISION_AVAILABLE and settings.GOOGLE_VISION_API_KEY:
-            try:
-                # Initialize Google Vision client
-                client = vision.ImageAnnotatorClient()
-
-                # Read image file
-                with open(photo.path, 'rb') as image_file:
-                    content = image_file.read()
-
-                image = vision.Image(content=content)
-
-                # Perform label detection (objects)
-                label_response = client.label_detection(image=image)
-                objects = [label.description.lower() for label in label_response.label_annotations[:5]]
-
-                # Perform face detection
-                face_response = client.face_detection(image=image)
-                faces_count = len(face_response.face_annotations)
-
-                # Perform text detection (for location hints)
-                text_response = client.text_detection(image=image)
-                detected_text = ' '.join([text.description for text in text_response.text_annotations[:3]])
-
-                # Perform image properties (colors)
-                properties_response = client.image_properties(image=image)
-                colors = []
-                if properties_response.image_properties_annotation:
-                    dominant_colors = properties_response.image_properties_annotation.dominant_colors.colors[:3]
-                    colors = [f"#{int(c.color.red):02x}{int(c.color.green):02x}{int(c.color.blue):02x}" for c in dominant_colors]
-
-                # Try to detect location from landmarks
-                landmark_response = client.landmark_detection(image=image)
-                location = ""
-                if landmark_response.landmark_annotations:
-                    location = landmark_response.landmark_annotations[0].description
-
-                # Estimate emotion from faces (if faces detected)
-                emotion = 'neutral'
-                if faces_count > 0 and face_response.face_annotations:
-                    # Use the emotion of the most prominent face
-                    face = face_response.face_annotations[0]
-                    joy_likelihood = face.joy_likelihood
-                    sorrow_likelihood = face.sorrow_likelihood
-                    anger_likelihood = face.anger_likelihood
-                    surprise_likelihood = face.surprise_likelihood
-
-                    emotions = {
-                        'joy': joy_likelihood,
-                        'sadness': sorrow_likelihood,
-                        'anger': anger_likelihood,
-                        'surprise': surprise_likelihood
-                    }
-
-                    # Find emotion with highest likelihood
-                    max_emotion = max(emotions.items(), key=lambda x: x[1])
-                    if max_emotion[1] >= 3:  # LIKELY or VERY_LIKELY
-                        emotion = max_emotion[0]
+        from .services.vision import get_vision_transport, parse_annotation, prepare_image_bytes
 
-                return {
-                    'objects': objects,
-                    'location': location or 'Location not detected',
-                    'faces_count': faces_count,
-                    'emotion': emotion,
-                    'colors': colors,
-                    'detected_text': detected_text
-                }
+        transport = get_vision_transport()
+        if transport is not None:
+            try:
+                # One batched request with every feature, on a downscaled copy
+                content = prepare_image_bytes(photo.path)
+                return parse_annotation(transport.annotate(content))
 
             except Exception as e:
                 logger.error(f"Google Vision API error: {str(e)}. Falling back to simulated analysis.")
@@ -656,15 +742,13 @@ class AIAnalysisService:
 
         if OPENAI_AVAILABLE and getattr(settings, 'OPENAI_API_KEY', None):
             try:
-                client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-                response = client.chat.completions.create(
-                    model=getattr(settings, 'AI_TEXT_MODEL', 'gpt-4o-mini'),
-                    messages=[{"role": "user", "content": prompt}],
+                message = cached_chat_completion(
+                    [{"role": "user", "content": prompt}],
+                    temperature=0.7,  # Higher temperature for more creative messages
                     max_tokens=150,
-                    temperature=0.7  # Higher temperature for more creative messages
+                    model=getattr(settings, 'AI_TEXT_MODEL', 'gpt-4o-mini'),
                 )
-                message = response.choices[0].message.content.strip()
-                return message
+                return message.strip()
             except Exception as e:
                 logger.error(f"OpenAI time capsule message generation failed: {str(e)}. Falling back to simulated.")
 
@@ -736,14 +820,12 @@ class AIAnalysisService:
 
         if OPENAI_AVAILABLE and getattr(settings, 'OPENAI_API_KEY', None):
             try:
-                client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-                response = client.chat.completions.create(
-                    model=getattr(settings, 'AI_TEXT_MODEL', 'gpt-4o-mini'),
-                    messages=[{"role": "user", "content": prompt}],
+                content = cached_chat_completion(
+                    [{"role": "user", "content": prompt}],
+                    temperature=0.3,
                     max_tokens=120,
-                    temperature=0.3
-                )
-                content = response.choices[0].message.content.strip()
+                    model=getattr(settings, 'AI_TEXT_MODEL', 'gpt-4o-mini'),
+                ).strip()
                 # Try to extract emotion and explanation
                 import re
                 match = re.match(r"([a-zA-Z]+)[\s:,-]+(.+)?", content)
@@ -785,158 +867,47 @@ class AIAnalysisService:
         }
     
     @staticmethod
-    def generate_album_suggestions(user):
+    def generate_album_suggestions(user, snapshot=None):
         """
         Generate smart album suggestions based on user's memories
+        (read from the precomputed MemoryInsightsSnapshot)
         """
-        from .models import Souvenir
-        from collections import Counter
-        
-        souvenirs = Souvenir.objects.filter(utilisateur=user)
-        
-        suggestions = []
-        
-        # By theme (lowered threshold)
-        theme_counts = Counter(s.theme for s in souvenirs if s.theme != 'other')
-        for theme, count in theme_counts.most_common(3):
-            if count >= 2:  # Changed from 3 to 2
-                suggestions.append({
-                    'type': 'theme',
-                    'title': f"My {theme.replace('_', ' ').title()} Moments",
-                    'theme': theme,
-                    'count': count
-                })
-        
-        # By year (lowered threshold)
-        current_year = timezone.now().year
-        year_counts = Counter(s.date_evenement.year for s in souvenirs)
-        for year, count in year_counts.most_common(2):
-            if count >= 3:  # Changed from 5 to 3
-                suggestions.append({
-                    'type': 'year',
-                    'title': f"Memories from {year}",
-                    'year': year,
-                    'count': count
-                })
-        
-        # Favorites (lowered threshold)
-        favorites_count = souvenirs.filter(is_favorite=True).count()
-        if favorites_count >= 2:  # Changed from 3 to 2
-            suggestions.append({
-                'type': 'favorite',
-                'title': "My Favorite Memories",
-                'count': favorites_count
-            })
-        
-        # Recent memories (new suggestion type)
-        recent_count = souvenirs.filter(date_evenement__year=current_year).count()
-        if recent_count >= 1 and not any(s['type'] == 'year' and s['year'] == current_year for s in suggestions):
-            suggestions.append({
-                'type': 'recent',
-                'title': f"This Year's Memories ({current_year})",
-                'year': current_year,
-                'count': recent_count
-            })
-        
-        # AI analyzed memories (new suggestion type)
-        analyzed_count = souvenirs.filter(ai_analyzed=True).count()
-        if analyzed_count >= 2:
-            suggestions.append({
-                'type': 'ai_analyzed',
-                'title': "AI-Enriched Memories",
-                'count': analyzed_count
-            })
-        
-        # Default suggestions if none generated
-        if not suggestions and souvenirs.exists():
-            total_count = souvenirs.count()
-            suggestions.append({
-                'type': 'all',
-                'title': f"All My Memories ({total_count} total)",
-                'count': total_count
-            })
-        
-        return suggestions[:4]  # Limit to 4 suggestions
+        from .services import memory_insights
+
+        snapshot = snapshot or memory_insights.get_snapshot(user)
+        return memory_insights.get_album_suggestions(snapshot)
     
     @staticmethod
     def get_souvenir_ids_for_suggestion(user, suggestion_type, theme=None, year=None):
         """
         Get souvenir IDs that match a specific album suggestion
         """
-        from .models import Souvenir
-        
-        souvenirs = Souvenir.objects.filter(utilisateur=user)
-        
-        if suggestion_type == 'theme' and theme:
-            return list(souvenirs.filter(theme=theme).values_list('id', flat=True))
-        elif suggestion_type == 'year' and year:
-            return list(souvenirs.filter(date_evenement__year=year).values_list('id', flat=True))
-        elif suggestion_type == 'favorite':
-            return list(souvenirs.filter(is_favorite=True).values_list('id', flat=True))
-        elif suggestion_type == 'recent':
-            current_year = timezone.now().year
-            return list(souvenirs.filter(date_evenement__year=current_year).values_list('id', flat=True))
-        elif suggestion_type == 'ai_analyzed':
-            return list(souvenirs.filter(ai_analyzed=True).values_list('id', flat=True))
-        elif suggestion_type == 'all':
-            return list(souvenirs.values_list('id', flat=True))
-        
-        return []
+        from .services import memory_insights
+
+        return memory_insights.get_suggestion_ids(user, suggestion_type, theme, year)
 
 
 class AIRecommendationService:
     """Service for AI-powered recommendations and insights"""
     
     @staticmethod
-    def get_memory_insights(user):
+    def get_memory_insights(user, snapshot=None):
         """
         Generate insights about user's memories
+        (read from the precomputed MemoryInsightsSnapshot)
         """
-        from .models import Souvenir
-        from collections import Counter
-        
-        souvenirs = Souvenir.objects.filter(utilisateur=user)
-        
-        if not souvenirs.exists():
-            return None
-        
-        # Emotion distribution
-        emotions = [s.emotion for s in souvenirs]
-        emotion_counts = Counter(emotions)
-        dominant_emotion = emotion_counts.most_common(1)[0][0] if emotion_counts else 'neutral'
-        
-        # Themes
-        themes = [s.theme for s in souvenirs if s.theme != 'other']
-        theme_counts = Counter(themes)
-        
-        # Time analysis
-        dates = [s.date_evenement for s in souvenirs]
-        oldest = min(dates) if dates else None
-        newest = max(dates) if dates else None
-        
-        insights = {
-            'total_memories': souvenirs.count(),
-            'dominant_emotion': dominant_emotion,
-            'emotion_distribution': dict(emotion_counts),
-            'most_common_themes': dict(theme_counts.most_common(3)),
-            'time_span': {
-                'oldest': oldest,
-                'newest': newest,
-                'span_days': (newest - oldest).days if oldest and newest else 0
-            },
-            'favorites_count': souvenirs.filter(is_favorite=True).count(),
-            'analyzed_count': souvenirs.filter(ai_analyzed=True).count(),
-            'with_media': souvenirs.filter(photo__isnull=False).count()
-        }
-        
-        return insights
+        from .services import memory_insights
+
+        snapshot = snapshot or memory_insights.get_snapshot(user)
+        return memory_insights.get_insights(snapshot)
     
     @staticmethod
-    def suggest_reflection_prompts(user):
+    def suggest_reflection_prompts(user, insights=None):
         """
         Generate personalized reflection prompts based on user's patterns
         """
-        insights = AIRecommendationService.get_memory_insights(user)
+        if insights is None:
+            insights = AIRecommendationService.get_memory_insights(user)
         
         if not insights:
             return []
@@ -980,7 +951,7 @@ class AIRecommendationService:
         
         if OPENAI_AVAILABLE and settings.OPENAI_API_KEY:
             try:
-                client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+                client = get_openai_client()
                 
                 prompt = f"""Tu es un assistant d'inspiration et de bien-être intégré à une plateforme web moderne.
 L'utilisateur vient d'écrire une réflexion personnelle exprimant une émotion, un doute ou une difficulté.
@@ -1100,7 +1071,7 @@ Réponds uniquement avec l'histoire, rien d'autre."""
         
         if OPENAI_AVAILABLE and settings.OPENAI_API_KEY:
             try:
-                client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+                client = get_openai_client()
                 
                 prompt = f"""Tu es un assistant de bien-être intelligent nommé "MindTrack Coach".
 L'utilisateur vient d'écrire une réflexion personnelle.  
@@ -1212,7 +1183,7 @@ Réponds UNIQUEMENT avec le JSON valide, sans texte avant ou après."""
         """
         if OPENAI_AVAILABLE and settings.OPENAI_API_KEY:
             try:
-                client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+                client = get_openai_client()
                 
                 prompt = f"""Tu es MindTrack Coach, un assistant de bien-être.
 L'utilisateur a partagé une réflexion personnelle et a reçu une histoire inspirante.
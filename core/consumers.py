@@ -22,4 +22,8 @@ class GraphConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({'type': 'pong', 'message': 'graph active'}))
 
     async def graph_update(self, event):
-        await self.send(text_data=json.dumps({'type': 'graph_update', 'action': event.get('action', 'refresh'), 'note_id': event.get('note_id')}))
+        # action 'delta' carries coalesced changes (core.services.graph_broadcast); 'refresh' asks for a full reload
+        message = {'type': 'graph_update', 'action': event.get('action', 'refresh'), 'note_id': event.get('note_id')}
+        if 'delta' in event:
+            message['delta'] = event['delta']
+        await self.send(text_data=json.dumps(message))
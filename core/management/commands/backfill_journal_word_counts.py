@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from core.models import EntreeJournal, compter_mots, temps_lecture
+from core.services.journal_stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored word count and reading time of journal entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Username to backfill entries for (optional)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Entries updated per query')
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        batch_size = options['batch_size']
+
+        entrees = EntreeJournal.objects.all()
+        if username:
+            entrees = entrees.filter(utilisateur__username=username)
+            if not entrees.exists():
+                self.stdout.write(self.style.ERROR(f'No journal entries for user {username}'))
+                return
+
+        batch = []
+        users = set()
+        scanned = updated = 0
+        rows = entrees.only('id', 'utilisateur_id', 'contenu_texte', 'word_count', 'reading_time')
+        for entree in rows.iterator(chunk_size=batch_size):
+            scanned += 1
+            word_count = compter_mots(entree.contenu_texte)
+            reading_time = temps_lecture(word_count)
+            if (entree.word_count, entree.reading_time) == (word_count, reading_time):
+                continue
+            entree.word_count, entree.reading_time = word_count, reading_time
+            batch.append(entree)
+            users.add(entree.utilisateur_id)
+            if len(batch) >= batch_size:
+                EntreeJournal.objects.bulk_update(batch, ['word_count', 'reading_time'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            EntreeJournal.objects.bulk_update(batch, ['word_count', 'reading_time'])
+            updated += len(batch)
+
+        # bulk_update bypasses the signals: refresh the statistics of the affected users
+        for user in get_user_model().objects.filter(pk__in=users):
+            rebuild_stats(user)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {updated} of {scanned} journal entries ({len(users)} user(s) statistics rebuilt)'))
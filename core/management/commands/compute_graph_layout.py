@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from core.services.graph_analytics import NUMPY_AVAILABLE, compute_user_layout
+
+
+class Command(BaseCommand):
+    help = 'Precompute the Universe Graph layout and metrics (positions, PageRank, clusters) for all users or a specific user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Username to compute the layout for (optional)')
+        parser.add_argument('--force', action='store_true', help='Recompute even if the graph did not change')
+
+    def handle(self, *args, **options):
+        if not NUMPY_AVAILABLE:
+            self.stdout.write(self.style.ERROR('numpy is not installed'))
+            return
+
+        username = options.get('user')
+        User = get_user_model()
+
+        users = User.objects.filter(notes__isnull=False).distinct()
+        if username:
+            users = User.objects.filter(username=username)
+            if not users.exists():
+                self.stdout.write(self.style.ERROR(f'User {username} not found'))
+                return
+
+        count = 0
+        for user in users:
+            started = time.monotonic()
+            layout = compute_user_layout(user.id, force=options['force'])
+            count += 1
+            self.stdout.write(
+                f'User {user.username}: {layout.node_count} notes, {layout.edge_count} links, '
+                f'{layout.component_count} components, {layout.cluster_count} clusters '
+                f'({time.monotonic() - started:.2f}s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Computed graph layout for {count} user(s)'))
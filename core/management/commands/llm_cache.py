@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from core.models import LLMResponseCache
+from core.services.llm_cache import DatabaseBackend, get_llm_cache
+
+
+class Command(BaseCommand):
+    help = 'Show or clear the LLM response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Remove every cached response')
+
+    def handle(self, *args, **options):
+        cache = get_llm_cache()
+        backend = type(cache.backend).__name__
+
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS(f'LLM cache cleared ({backend})'))
+            return
+
+        self.stdout.write(f'Backend: {backend}')
+        self.stdout.write(f'Entries: {cache.backend.count()}')
+
+        # Only the database backend keeps hit counters across processes
+        if isinstance(cache.backend, DatabaseBackend):
+            rows = LLMResponseCache.objects.values('provider').annotate(hits=Sum('hits')).order_by('provider')
+            for row in rows:
+                self.stdout.write(f"  {row['provider']}: {row['hits']} hits")
@@ -1,6 +1,10 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from core.utils import rebuild_all_links
+
+from core.services import search_index
+from core.services.graph_sync import DEFAULT_BATCH_SIZE, rebuild_user_links, run_for_users
 
 
 class Command(BaseCommand):
@@ -8,23 +12,40 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--user', type=str, help='Username to rebuild links for (optional)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of parallel worker processes (default: 1; keep 1 on SQLite)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'Rows written per transaction (default: {DEFAULT_BATCH_SIZE})')
 
     def handle(self, *args, **options):
         username = options.get('user')
         User = get_user_model()
 
+        users = User.objects.all()
         if username:
-            try:
-                user = User.objects.get(username=username)
-                total = rebuild_all_links(user)
-                self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} links for user {username}'))
-            except User.DoesNotExist:
+            users = users.filter(username=username)
+            if not users.exists():
                 self.stdout.write(self.style.ERROR(f'User {username} not found'))
-        else:
-            total = 0
-            for user in User.objects.all():
-                links = rebuild_all_links(user)
-                total += links
-                self.stdout.write(f'User {user.username}: {links} links')
-
-            self.stdout.write(self.style.SUCCESS(f'Total: {total} links rebuilt'))
+                return
+        usernames = dict(users.values_list('id', 'username'))
+
+        started = time.monotonic()
+        notes = created = deleted = 0
+        for result in run_for_users(rebuild_user_links, list(usernames), options['workers'], options['batch_size']):
+            notes += result['notes']
+            created += result['created']
+            deleted += result['deleted']
+            self.stdout.write(
+                f"User {usernames[result['user_id']]}: {result['notes']} notes, "
+                f"+{result['created']} / -{result['deleted']} links ({result['seconds']:.2f}s)"
+            )
+
+        # bulk_create skips the signals that keep the search index in sync
+        documents = sum(search_index.rebuild(user_id=user_id) for user_id in usernames)
+        self.stdout.write(f'Search index: {documents} documents reindexed')
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {created} links created, {deleted} removed over {notes} notes '
+            f'in {elapsed:.2f}s ({notes / elapsed:.0f} notes/s)'
+        ))
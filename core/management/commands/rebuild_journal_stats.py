@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from core.services.journal_stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed journal statistics for all users or a specific user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Username to rebuild statistics for (optional)')
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        User = get_user_model()
+
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+            if not users.exists():
+                self.stdout.write(self.style.ERROR(f'User {username} not found'))
+                return
+
+        count = 0
+        for user in users:
+            stats = rebuild_stats(user)
+            count += 1
+            self.stdout.write(f'User {user.username}: {stats.total_entries} entries, {stats.total_words} words')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt journal statistics for {count} user(s)'))
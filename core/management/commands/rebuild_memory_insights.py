@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from core.services.memory_insights import rebuild_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed memory insights snapshot for all users or a specific user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Username to rebuild insights for (optional)')
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        User = get_user_model()
+
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+            if not users.exists():
+                self.stdout.write(self.style.ERROR(f'User {username} not found'))
+                return
+
+        count = 0
+        for user in users:
+            snapshot = rebuild_snapshot(user)
+            count += 1
+            self.stdout.write(f'User {user.username}: {snapshot.total} memories')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt insights for {count} user(s)'))
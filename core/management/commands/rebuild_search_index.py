@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import connection
+from core.services import search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the unified search index (journal, memories, notes) for all users or a specific user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Username to reindex (optional)')
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        user_id = None
+        if username:
+            user = get_user_model().objects.filter(username=username).first()
+            if user is None:
+                self.stdout.write(self.style.ERROR(f'User {username} not found'))
+                return
+            user_id = user.pk
+
+        # Repairs the full-text table/triggers as well (idempotent)
+        search_index.create_index(connection)
+        count = search_index.rebuild(user_id=user_id)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} document(s)'))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services import graph_analytics, journal_export, pdf_export  # noqa: F401  (register the graph_layout / export_journal_pdf / export_pdf handlers)
+from core.services.task_queue import claim_next, requeue_stale, run_task
+
+
+class Command(BaseCommand):
+    help = 'Process queued AI tasks (memory analysis, PDF exports, ...) from the AITask table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process the tasks currently available then exit')
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty (default: 2)')
+        parser.add_argument('--max-tasks', type=int, default=0,
+                            help='Exit after processing this many tasks (0 = unlimited)')
+        parser.add_argument('--type', action='append', dest='task_types',
+                            help='Only process this task type (repeatable)')
+
+    def handle(self, *args, **options):
+        once = options['once']
+        sleep = options['sleep']
+        max_tasks = options['max_tasks']
+        task_types = options.get('task_types')
+
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale running task(s)'))
+
+        processed = succeeded = 0
+        try:
+            while not max_tasks or processed < max_tasks:
+                # Long-running loop: drop connections the database closed or that hit CONN_MAX_AGE
+                close_old_connections()
+                task = claim_next(task_types)
+                if task is None:
+                    if once:
+                        break
+                    time.sleep(sleep)
+                    continue
+
+                ok = run_task(task)
+                processed += 1
+                succeeded += int(ok)
+                self.stdout.write(f'Task {task.id} ({task.task_type}): {task.status}')
+        except KeyboardInterrupt:
+            self.stdout.write('Interrupted')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} task(s), {succeeded} succeeded, {processed - succeeded} failed or retried'
+        ))
@@ -1,13 +1,12 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 
-from core.models import Note as CoreNote, Link as CoreLink
-
-try:
-    from notes.models import Note as NotesNote, NoteLink as NotesNoteLink
-except Exception:
-    NotesNote = None
-    NotesNoteLink = None
+from core.services import search_index
+from core.services.graph_sync import (
+    DEFAULT_BATCH_SIZE, NotesAppNote, run_for_users, sync_user_notes_app,
+)
 
 
 class Command(BaseCommand):
@@ -15,45 +14,43 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--user', type=str, help='Username to sync (optional)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of parallel worker processes (default: 1; keep 1 on SQLite)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'Rows written per transaction (default: {DEFAULT_BATCH_SIZE})')
 
     def handle(self, *args, **options):
-        if NotesNote is None or NotesNoteLink is None:
+        if NotesAppNote is None:
             self.stdout.write(self.style.ERROR('notes app not installed or models not found'))
             return
 
         username = options.get('user')
         User = get_user_model()
 
-        users = []
+        users = User.objects.all()
         if username:
-            try:
-                users = [User.objects.get(username=username)]
-            except User.DoesNotExist:
+            users = users.filter(username=username)
+            if not users.exists():
                 self.stdout.write(self.style.ERROR(f'User {username} not found'))
                 return
-        else:
-            users = User.objects.all()
-
-        total_notes = 0
-        total_links = 0
-        for user in users:
-            notes = NotesNote.objects.filter(user=user)
-            for n in notes:
-                core_n, created = CoreNote.objects.get_or_create(owner=user, title=n.title, defaults={'body': getattr(n, 'content', '')})
-                if created:
-                    total_notes += 1
-
-            # Sync links
-            links = NotesNoteLink.objects.filter(source_note__user=user)
-            for l in links:
-                try:
-                    src_core = CoreNote.objects.get(owner=user, title=l.source_note.title)
-                    dst_core = CoreNote.objects.get(owner=l.target_note.user, title=l.target_note.title)
-                    link, created = CoreLink.objects.get_or_create(src=src_core, dst=dst_core)
-                    if created:
-                        total_links += 1
-                except CoreNote.DoesNotExist:
-                    # Skip links where core nodes missing (shouldn't happen after previous loop)
-                    continue
-
-        self.stdout.write(self.style.SUCCESS(f'Synced {total_notes} notes and {total_links} links'))
+        usernames = dict(users.values_list('id', 'username'))
+
+        started = time.monotonic()
+        total_notes = total_links = 0
+        for result in run_for_users(sync_user_notes_app, list(usernames), options['workers'], options['batch_size']):
+            total_notes += result['notes']
+            total_links += result['links']
+            self.stdout.write(
+                f"User {usernames[result['user_id']]}: {result['notes']} notes, "
+                f"{result['links']} links ({result['seconds']:.2f}s)"
+            )
+
+        # bulk_create skips the signals that keep the search index in sync
+        documents = sum(search_index.rebuild(user_id=user_id) for user_id in usernames)
+        self.stdout.write(f'Search index: {documents} documents reindexed')
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Synced {total_notes} notes and {total_links} links for {len(usernames)} users '
+            f'in {elapsed:.2f}s ({len(usernames) / elapsed:.1f} users/s)'
+        ))
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_defiquotidien_delete_tachequotidienne_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='aitask',
+            options={'ordering': ['created_at']},
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Pas de traitement avant cette date (backoff)'),
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='max_attempts',
+            field=models.PositiveIntegerField(default=3),
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='owner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='payload',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='souvenir',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_tasks', to='core.souvenir'),
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='aitask',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('error', 'Error')], default='queued', max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='aitask',
+            name='task_type',
+            field=models.CharField(choices=[('embed', 'Embedding'), ('transcribe', 'Transcription'), ('summarize', 'Summarize'), ('ocr', 'OCR'), ('analyze_memory', 'Analyze memory')], max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='aitask',
+            index=models.Index(fields=['status', 'available_at'], name='core_aitask_status_d76866_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aitask',
+            index=models.Index(fields=['owner', 'status'], name='core_aitask_owner_i_426241_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_aitask_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMResponseCache',
+            fields=[
+                ('key', models.CharField(help_text='sha256(provider, model, prompt, temperature)', max_length=64, primary_key=True, serialize=False)),
+                ('provider', models.CharField(max_length=32)),
+                ('model', models.CharField(blank=True, max_length=200)),
+                ('value', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'LLM Response Cache',
+                'verbose_name_plural': 'LLM Response Cache',
+            },
+        ),
+    ]
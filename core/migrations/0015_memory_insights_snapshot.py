@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_llm_response_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemoryInsightsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('favorites', models.PositiveIntegerField(default=0)),
+                ('analyzed', models.PositiveIntegerField(default=0)),
+                ('with_media', models.PositiveIntegerField(default=0)),
+                ('emotion_counts', models.JSONField(blank=True, default=dict, help_text='{emotion: count}')),
+                ('theme_counts', models.JSONField(blank=True, default=dict, help_text='{theme: count}')),
+                ('year_counts', models.JSONField(blank=True, default=dict, help_text='{year: count}')),
+                ('date_counts', models.JSONField(blank=True, default=dict, help_text='{ISO date: count}, for the time span')),
+                ('member_ids', models.JSONField(blank=True, default=dict, help_text="{'theme:x' | 'year:x' | 'favorite' | 'ai_analyzed': [ids]}")),
+                ('version', models.PositiveBigIntegerField(default=0, help_text='Incremented on every memory change')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('utilisateur', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='memory_insights', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Memory insights snapshot',
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:48
+
+from django.db import migrations, models
+
+
+def backfill_positivity(apps, schema_editor):
+    MoodAnalysis = apps.get_model('core', 'MoodAnalysis')
+    batch = []
+    for analysis in MoodAnalysis.objects.only('id', 'scores').iterator(chunk_size=500):
+        scores = analysis.scores if isinstance(analysis.scores, dict) else {}
+        try:
+            analysis.positivity = float(scores.get('positif', 0)) - sum(
+                float(scores.get(k, 0)) for k in ('negatif', 'colere', 'tristesse')
+            )
+        except (TypeError, ValueError):
+            continue
+        batch.append(analysis)
+        if len(batch) >= 500:
+            MoodAnalysis.objects.bulk_update(batch, ['positivity'])
+            batch = []
+    if batch:
+        MoodAnalysis.objects.bulk_update(batch, ['positivity'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_memory_insights_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moodanalysis',
+            name='positivity',
+            field=models.FloatField(blank=True, editable=False, help_text='positif - (negatif + colere + tristesse), calculé depuis scores', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='moodanalysis',
+            index=models.Index(fields=['user', 'created_at'], name='core_moodan_user_id_938f7e_idx'),
+        ),
+        migrations.RunPython(backfill_positivity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_mood_positivity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportpdf',
+            name='message_erreur',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='exportpdf',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Generation progress (0-100)'),
+        ),
+        migrations.AlterField(
+            model_name='aitask',
+            name='task_type',
+            field=models.CharField(choices=[('embed', 'Embedding'), ('transcribe', 'Transcription'), ('summarize', 'Summarize'), ('ocr', 'OCR'), ('analyze_memory', 'Analyze memory'), ('export_pdf', 'PDF export')], max_length=50),
+        ),
+    ]
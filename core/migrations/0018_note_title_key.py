@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:55
+
+from django.db import migrations, models
+
+
+def backfill_title_key(apps, schema_editor):
+    Note = apps.get_model('core', 'Note')
+    batch = []
+    for note in Note.objects.only('id', 'title').iterator(chunk_size=1000):
+        note.title_key = (note.title or '').strip().casefold()
+        batch.append(note)
+        if len(batch) >= 1000:
+            Note.objects.bulk_update(batch, ['title_key'])
+            batch = []
+    if batch:
+        Note.objects.bulk_update(batch, ['title_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_export_pdf_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='title_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=400),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['owner', 'title_key'], name='core_note_owner_i_d43e69_idx'),
+        ),
+        migrations.RunPython(backfill_title_key, migrations.RunPython.noop),
+    ]
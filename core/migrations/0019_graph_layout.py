@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_note_title_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aitask',
+            name='task_type',
+            field=models.CharField(choices=[('embed', 'Embedding'), ('transcribe', 'Transcription'), ('summarize', 'Summarize'), ('ocr', 'OCR'), ('analyze_memory', 'Analyze memory'), ('export_pdf', 'PDF export'), ('graph_layout', 'Graph layout')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='GraphLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(blank=True, help_text='Notes/links state the layout was computed for', max_length=64)),
+                ('node_count', models.PositiveIntegerField(default=0)),
+                ('edge_count', models.PositiveIntegerField(default=0)),
+                ('component_count', models.PositiveIntegerField(default=0)),
+                ('cluster_count', models.PositiveIntegerField(default=0)),
+                ('iterations', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='graph_layout', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NoteLayout',
+            fields=[
+                ('note', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='layout', serialize=False, to='core.note')),
+                ('x', models.FloatField(default=0)),
+                ('y', models.FloatField(default=0)),
+                ('pagerank', models.FloatField(default=0)),
+                ('component', models.PositiveIntegerField(default=0, help_text='Connected component (0 = largest)')),
+                ('cluster', models.PositiveIntegerField(default=0, help_text='Community (label propagation, 0 = largest)')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='note_layouts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'x', 'y'], name='core_notela_owner_i_8863ae_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_graph_layout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_entries', models.PositiveIntegerField(default=0)),
+                ('total_words', models.PositiveIntegerField(default=0)),
+                ('favorites', models.PositiveIntegerField(default=0)),
+                ('day_counts', models.JSONField(blank=True, default=dict, help_text='{ISO date: entries}')),
+                ('mood_counts', models.JSONField(blank=True, default=dict, help_text='{mood id: uses}')),
+                ('mood_day_counts', models.JSONField(blank=True, default=dict, help_text='{ISO date: [positive, negative]}')),
+                ('last_entry_date', models.DateField(blank=True, null=True)),
+                ('current_streak', models.PositiveIntegerField(default=0, help_text='Consecutive days ending on last_entry_date')),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('utilisateur', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='journal_statistics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Journal statistics',
+                'verbose_name_plural': 'Journal statistics',
+            },
+        ),
+    ]
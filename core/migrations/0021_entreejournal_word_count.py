@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:29
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+READING_WORDS_PER_MINUTE = 200
+
+
+# Frozen copies of core.models.compter_mots / temps_lecture as of this migration
+def compter_mots(texte):
+    return len((texte or '').split())
+
+
+def temps_lecture(nombre_mots):
+    if not nombre_mots:
+        return 0
+    return max(1, round(nombre_mots / READING_WORDS_PER_MINUTE))
+
+
+def backfill_word_counts(apps, schema_editor):
+    EntreeJournal = apps.get_model('core', 'EntreeJournal')
+    batch = []
+    for entree in EntreeJournal.objects.only('id', 'contenu_texte').iterator(chunk_size=BATCH_SIZE):
+        entree.word_count = compter_mots(entree.contenu_texte)
+        entree.reading_time = temps_lecture(entree.word_count)
+        batch.append(entree)
+        if len(batch) >= BATCH_SIZE:
+            EntreeJournal.objects.bulk_update(batch, ['word_count', 'reading_time'])
+            batch = []
+    if batch:
+        EntreeJournal.objects.bulk_update(batch, ['word_count', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_journal_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entreejournal',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Reading time (minutes)'),
+        ),
+        migrations.AddField(
+            model_name='entreejournal',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of words'),
+        ),
+        migrations.RunPython(backfill_word_counts, migrations.RunPython.noop),
+    ]
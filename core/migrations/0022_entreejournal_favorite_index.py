@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_entreejournal_word_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entreejournal',
+            index=models.Index(fields=['utilisateur', 'is_favorite', '-date_creation'], name='core_entree_user_fav_idx'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:33
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from notes.migrations import _fts
+
+# Frozen copies of the core.services.search_index document rules as of this
+# migration (the index statements are frozen in notes/migrations/_fts.py):
+# later changes to the service must not change what this migration does.
+BATCH_SIZE = 500
+
+
+def create_search_index(apps, schema_editor):
+    _fts.create_index(schema_editor.connection, 'core_searchdocument', 'title', 'body')
+
+
+def drop_search_index(apps, schema_editor):
+    _fts.drop_index(schema_editor.connection, 'core_searchdocument')
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def _join(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def _documents(apps):
+    """(kind, owner id, object id, title, body, date) of every object to index"""
+    EntreeJournal = apps.get_model('core', 'EntreeJournal')
+    for row in EntreeJournal.objects.values('pk', 'utilisateur_id', 'titre', 'contenu_texte', 'lieu', 'date_creation').iterator(chunk_size=BATCH_SIZE):
+        yield ('journal', row['utilisateur_id'], row['pk'], row['titre'],
+               _join(row['contenu_texte'], row['lieu']), _as_date(row['date_creation']))
+
+    Souvenir = apps.get_model('core', 'Souvenir')
+    for row in Souvenir.objects.values('pk', 'utilisateur_id', 'titre', 'description', 'lieu', 'personnes_presentes', 'ai_tags', 'date_evenement').iterator(chunk_size=BATCH_SIZE):
+        tags = [tag for tag in (row['ai_tags'] or []) if isinstance(tag, str)]
+        body = _join(row['description'], row['lieu'], row['personnes_presentes'], ' '.join(tags))
+        yield 'memory', row['utilisateur_id'], row['pk'], row['titre'], body, row['date_evenement']
+
+    NotesAppNote = apps.get_model('notes', 'Note')
+    for row in NotesAppNote.objects.filter(is_deleted=False).values('pk', 'user_id', 'title', 'content', 'updated_at').iterator(chunk_size=BATCH_SIZE):
+        yield 'note', row['user_id'], row['pk'], row['title'], row['content'], _as_date(row['updated_at'])
+
+    # Graph notes mirroring a notes-app note (same owner and title) are indexed once, as 'note'
+    Note = apps.get_model('core', 'Note')
+    graph_notes = Note.objects.exclude(Exists(NotesAppNote.objects.filter(user_id=OuterRef('owner_id'), title=OuterRef('title'))))
+    for row in graph_notes.values('pk', 'owner_id', 'title', 'body', 'updated_at').iterator(chunk_size=BATCH_SIZE):
+        yield 'graph_note', row['owner_id'], row['pk'], row['title'], row['body'], _as_date(row['updated_at'])
+
+
+def index_existing_objects(apps, schema_editor):
+    SearchDocument = apps.get_model('core', 'SearchDocument')
+    batch = []
+    for kind, owner_id, object_id, title, body, day in _documents(apps):
+        if not owner_id:
+            continue
+        batch.append(SearchDocument(owner_id=owner_id, kind=kind, object_id=str(object_id),
+                                    title=(title or '')[:400], body=body or '', date=day))
+        if len(batch) >= BATCH_SIZE:
+            SearchDocument.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_entreejournal_favorite_index'),
+        ('notes', '0005_note_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('journal', 'Journal entry'), ('memory', 'Memory'), ('note', 'Note'), ('graph_note', 'Graph note')], max_length=20)),
+                ('object_id', models.CharField(max_length=64)),
+                ('title', models.CharField(blank=True, max_length=400)),
+                ('body', models.TextField(blank=True)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'kind'], name='core_search_owner_i_0d1f4c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='core_searchdoc_object_uniq')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_objects, migrations.RunPython.noop),
+    ]
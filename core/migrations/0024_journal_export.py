@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_search_document'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aitask',
+            name='task_type',
+            field=models.CharField(choices=[('embed', 'Embedding'), ('transcribe', 'Transcription'), ('summarize', 'Summarize'), ('ocr', 'OCR'), ('analyze_memory', 'Analyze memory'), ('export_pdf', 'PDF export'), ('graph_layout', 'Graph layout'), ('export_journal_pdf', 'Journal PDF export')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='JournalExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fichier_pdf', models.FileField(blank=True, upload_to='exports/journal/')),
+                ('nombre_entrees', models.PositiveIntegerField(default=0)),
+                ('nombre_pages', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('error', 'Error')], default='pending', max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Generation progress (0-100)')),
+                ('message_erreur', models.TextField(blank=True, default='')),
+                ('date_export', models.DateTimeField(auto_now_add=True)),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='journal_exports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Journal PDF Export',
+                'verbose_name_plural': 'Journal PDF Exports',
+                'ordering': ['-date_export'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_journal_export'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='memoryinsightssnapshot',
+            name='member_ids',
+        ),
+        migrations.AddIndex(
+            model_name='souvenir',
+            index=models.Index(fields=['utilisateur', '-date_evenement'], name='core_souv_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='souvenir',
+            index=models.Index(fields=['utilisateur', 'theme'], name='core_souv_user_theme_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='souvenir',
+            index=models.Index(fields=['utilisateur', 'is_favorite'], name='core_souv_user_fav_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='souvenir',
+            index=models.Index(fields=['utilisateur', 'ai_analyzed'], name='core_souv_user_ai_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 # --- Custom user (simple extension) ---
@@ -48,12 +49,28 @@ class Note(models.Model):
     public = models.BooleanField(default=False)
     source = models.CharField(max_length=200, blank=True, null=True)  # 'webclip', 'import', etc
     embedding_id = models.CharField(max_length=255, blank=True, null=True)  # pointer to vector store
+    # Normalized title used to resolve [[wiki links]] (see core.utils.title_key)
+    title_key = models.CharField(max_length=400, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'title_key']),
+        ]
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        from .utils import title_key
+
+        self.title_key = title_key(self.title)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'title' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'title_key'}
+        super().save(*args, **kwargs)
+
 # --- Edges between notes (graph links) ---
 class Link(models.Model):
     KIND_CHOICES = [
@@ -72,6 +89,37 @@ class Link(models.Model):
     def __str__(self):
         return f"{self.src} → {self.dst} ({self.kind})"
 
+# --- Precomputed graph layout & metrics (core.services.graph_analytics) ---
+class GraphLayout(models.Model):
+    """Per-user state of the precomputed Universe Graph layout"""
+    owner = models.OneToOneField('User', on_delete=models.CASCADE, related_name='graph_layout')
+    fingerprint = models.CharField(max_length=64, blank=True, help_text="Notes/links state the layout was computed for")
+    node_count = models.PositiveIntegerField(default=0)
+    edge_count = models.PositiveIntegerField(default=0)
+    component_count = models.PositiveIntegerField(default=0)
+    cluster_count = models.PositiveIntegerField(default=0)
+    iterations = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Graph layout of {self.owner} ({self.node_count} nodes)"
+
+
+class NoteLayout(models.Model):
+    """Position and metrics of one note in its owner's graph"""
+    note = models.OneToOneField(Note, on_delete=models.CASCADE, primary_key=True, related_name='layout')
+    owner = models.ForeignKey('User', on_delete=models.CASCADE, related_name='note_layouts')
+    x = models.FloatField(default=0)
+    y = models.FloatField(default=0)
+    pagerank = models.FloatField(default=0)
+    component = models.PositiveIntegerField(default=0, help_text="Connected component (0 = largest)")
+    cluster = models.PositiveIntegerField(default=0, help_text="Community (label propagation, 0 = largest)")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'x', 'y']),
+        ]
+
 # --- Attachments (files/images) ---
 class Attachment(models.Model):
     note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='attachments')
@@ -97,29 +145,69 @@ class APIIntegration(models.Model):
 
 # --- AI / background tasks tracker ---
 class AITask(models.Model):
+    """
+    Tâche IA persistée, consommée par la commande `run_ai_worker`.
+    Sert de file d'attente durable : les vues n'exécutent plus l'analyse
+    elles-mêmes, elles créent une tâche et le worker la traite.
+    """
     TASK_TYPES = [
         ('embed', 'Embedding'),
         ('transcribe', 'Transcription'),
         ('summarize', 'Summarize'),
         ('ocr', 'OCR'),
+        ('analyze_memory', 'Analyze memory'),
+        ('export_pdf', 'PDF export'),
+        ('graph_layout', 'Graph layout'),
+        ('export_journal_pdf', 'Journal PDF export'),
     ]
     STATUS = [
         ('queued','Queued'),
         ('running','Running'),
         ('done','Done'),
+        ('failed','Failed'),
         ('error','Error')
     ]
     task_type = models.CharField(max_length=50, choices=TASK_TYPES)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_tasks', null=True, blank=True)
     note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='ai_tasks', null=True, blank=True)
     attachment = models.ForeignKey(Attachment, on_delete=models.CASCADE, null=True, blank=True)
+    souvenir = models.ForeignKey('Souvenir', on_delete=models.CASCADE, related_name='ai_tasks', null=True, blank=True)
     status = models.CharField(max_length=30, choices=STATUS, default='queued')
+    payload = models.JSONField(default=dict, blank=True)
     result = models.JSONField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Pas de traitement avant cette date (backoff)")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+            models.Index(fields=['owner', 'status']),
+        ]
+
     def __str__(self):
         return f"{self.task_type} ({self.status})"
 
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'task_type': self.task_type,
+            'status': self.status,
+            'souvenir_id': str(self.souvenir_id) if self.souvenir_id else None,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'last_error': self.last_error,
+            'result': self.result,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
 # --- Souvenirs (Memories) ---
 class Souvenir(models.Model):
     """Model for storing user memories with AI-enhanced features"""
@@ -190,6 +278,11 @@ class Souvenir(models.Model):
             models.Index(fields=['-date_evenement']),
             models.Index(fields=['utilisateur', '-created_at']),
             models.Index(fields=['is_favorite']),
+            # Album suggestions (memory_insights.get_suggestion_ids) and dashboard filters
+            models.Index(fields=['utilisateur', '-date_evenement'], name='core_souv_user_date_idx'),
+            models.Index(fields=['utilisateur', 'theme'], name='core_souv_user_theme_idx'),
+            models.Index(fields=['utilisateur', 'is_favorite'], name='core_souv_user_fav_idx'),
+            models.Index(fields=['utilisateur', 'ai_analyzed'], name='core_souv_user_ai_idx'),
         ]
 
     def __str__(self):
@@ -227,6 +320,31 @@ class Souvenir(models.Model):
         return not self.ai_analyzed and (self.description or self.photo)
 
 
+# --- Precomputed memory insights (one row per user) ---
+class MemoryInsightsSnapshot(models.Model):
+    """
+    Per-user aggregates of Souvenir, kept up to date incrementally by the
+    Souvenir signals (see core.services.memory_insights).
+    """
+    utilisateur = models.OneToOneField('User', on_delete=models.CASCADE, related_name='memory_insights')
+    total = models.PositiveIntegerField(default=0)
+    favorites = models.PositiveIntegerField(default=0)
+    analyzed = models.PositiveIntegerField(default=0)
+    with_media = models.PositiveIntegerField(default=0)
+    emotion_counts = models.JSONField(default=dict, blank=True, help_text="{emotion: count}")
+    theme_counts = models.JSONField(default=dict, blank=True, help_text="{theme: count}")
+    year_counts = models.JSONField(default=dict, blank=True, help_text="{year: count}")
+    date_counts = models.JSONField(default=dict, blank=True, help_text="{ISO date: count}, for the time span")
+    version = models.PositiveBigIntegerField(default=0, help_text="Incremented on every memory change")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Memory insights snapshot'
+
+    def __str__(self):
+        return f"Insights {self.utilisateur} (v{self.version})"
+
+
 # --- AI Analysis Results for Memories ---
 class AnalyseIASouvenir(models.Model):
     """Stores AI analysis results for a memory"""
@@ -447,6 +565,21 @@ class Humeur(models.Model):
 
 
 # --- Journal Entries (for linking memories to journal) ---
+READING_WORDS_PER_MINUTE = 200
+
+
+def compter_mots(texte):
+    """Nombre de mots d'un texte"""
+    return len((texte or '').split())
+
+
+def temps_lecture(nombre_mots):
+    """Reading time in minutes (at least 1 for a non-empty entry)"""
+    if not nombre_mots:
+        return 0
+    return max(1, round(nombre_mots / READING_WORDS_PER_MINUTE))
+
+
 class EntreeJournal(models.Model):
     """Journal entries that can be linked to memories"""
     utilisateur = models.ForeignKey('User', on_delete=models.CASCADE, related_name='entrees_journal')
@@ -464,6 +597,10 @@ class EntreeJournal(models.Model):
     is_public = models.BooleanField(default=False, help_text="Public entry")
     is_favorite = models.BooleanField(default=False, help_text="Favorite entry")
     
+    # Summary columns (computed on save, see backfill_journal_word_counts)
+    word_count = models.PositiveIntegerField(default=0, editable=False, help_text="Number of words")
+    reading_time = models.PositiveIntegerField(default=0, editable=False, help_text="Reading time (minutes)")
+    
     # Timestamps
     date_creation = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -475,15 +612,24 @@ class EntreeJournal(models.Model):
         indexes = [
             models.Index(fields=['-date_creation']),
             models.Index(fields=['utilisateur', '-date_creation']),
+            models.Index(fields=['utilisateur', 'is_favorite', '-date_creation'], name='core_entree_user_fav_idx'),
         ]
     
     def __str__(self):
         return f"{self.titre} - {self.date_creation.strftime('%Y-%m-%d')}"
     
+    def save(self, *args, **kwargs):
+        self.word_count = compter_mots(self.contenu_texte)
+        self.reading_time = temps_lecture(self.word_count)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'contenu_texte' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'word_count', 'reading_time'}
+        super().save(*args, **kwargs)
+    
     @property
     def nombre_mots(self):
-        """Compte le nombre de mots dans l'entrée"""
-        return len(self.contenu_texte.split())
+        """Nombre de mots de l'entrée (stocké à l'enregistrement)"""
+        return self.word_count
     
     @property
     def tags_list(self):
@@ -496,6 +642,31 @@ class EntreeJournal(models.Model):
         return [eh.humeur for eh in self.entree_humeurs.all()]
 
 
+class JournalStatistics(models.Model):
+    """
+    Per-user aggregates of EntreeJournal, kept up to date incrementally by the
+    journal signals (see core.services.journal_stats).
+    """
+    utilisateur = models.OneToOneField('User', on_delete=models.CASCADE, related_name='journal_statistics')
+    total_entries = models.PositiveIntegerField(default=0)
+    total_words = models.PositiveIntegerField(default=0)
+    favorites = models.PositiveIntegerField(default=0)
+    day_counts = models.JSONField(default=dict, blank=True, help_text="{ISO date: entries}")
+    mood_counts = models.JSONField(default=dict, blank=True, help_text="{mood id: uses}")
+    mood_day_counts = models.JSONField(default=dict, blank=True, help_text="{ISO date: [positive, negative]}")
+    last_entry_date = models.DateField(null=True, blank=True)
+    current_streak = models.PositiveIntegerField(default=0, help_text="Consecutive days ending on last_entry_date")
+    longest_streak = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Journal statistics'
+        verbose_name_plural = 'Journal statistics'
+
+    def __str__(self):
+        return f"Journal statistics {self.utilisateur}"
+
+
 # --- Relation Many-to-Many entre EntreeJournal et Tag ---
 class EntreeTag(models.Model):
     """Relation entre une entrée de journal et un tag"""
@@ -580,6 +751,8 @@ class ExportPDF(models.Model):
     
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Generation progress (0-100)")
+    message_erreur = models.TextField(blank=True, default='')
     date_export = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -591,6 +764,30 @@ class ExportPDF(models.Model):
         return f"{self.titre_export} - {self.status}"
 
 
+class JournalExport(models.Model):
+    """PDF export of the whole journal, generated in chunks by the worker (see core.services.journal_export)"""
+    utilisateur = models.ForeignKey('User', on_delete=models.CASCADE, related_name='journal_exports')
+    
+    # File
+    fichier_pdf = models.FileField(upload_to='exports/journal/', blank=True)
+    nombre_entrees = models.PositiveIntegerField(default=0)
+    nombre_pages = models.PositiveIntegerField(default=0)
+    
+    # Status
+    status = models.CharField(max_length=20, choices=ExportPDF.STATUS_CHOICES, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Generation progress (0-100)")
+    message_erreur = models.TextField(blank=True, default='')
+    date_export = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Journal PDF Export"
+        verbose_name_plural = "Journal PDF Exports"
+        ordering = ['-date_export']
+    
+    def __str__(self):
+        return f"Journal {self.utilisateur} - {self.status}"
+
+
 # --- Motivational Tracking ---
 class SuiviMotivationnel(models.Model):
     """Track user engagement and motivation"""
@@ -743,10 +940,34 @@ class MoodAnalysis(models.Model):
     scores = models.JSONField(default=dict)
     source = models.CharField(max_length=64, blank=True, null=True)
     model = models.CharField(max_length=200, blank=True, null=True)
+    positivity = models.FloatField(null=True, blank=True, editable=False,
+                                   help_text="positif - (negatif + colere + tristesse), calculé depuis scores")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    NEGATIVE_SCORES = ('negatif', 'colere', 'tristesse')
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    @classmethod
+    def compute_positivity(cls, scores):
+        """Score de positivité utilisé par les courbes de tendance"""
+        if not isinstance(scores, dict):
+            return None
+        try:
+            return float(scores.get('positif', 0)) - sum(float(scores.get(k, 0)) for k in cls.NEGATIVE_SCORES)
+        except (TypeError, ValueError):
+            return None
+
+    def save(self, *args, **kwargs):
+        self.positivity = self.compute_positivity(self.scores)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'scores' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'positivity'}
+        super().save(*args, **kwargs)
 
 
 class MoodRecommendation(models.Model):
@@ -819,3 +1040,55 @@ class DefiQuotidien(models.Model):
         """Vérifie si le défi est en retard"""
         from django.utils import timezone
         return self.date_defi < timezone.now().date() and self.statut == 'pending'
+
+
+# --- Cache des réponses LLM (backend 'db' de core.services.llm_cache) ---
+class LLMResponseCache(models.Model):
+    key = models.CharField(max_length=64, primary_key=True, help_text="sha256(provider, model, prompt, temperature)")
+    provider = models.CharField(max_length=32)
+    model = models.CharField(max_length=200, blank=True)
+    value = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'LLM Response Cache'
+        verbose_name_plural = 'LLM Response Cache'
+
+    def __str__(self):
+        return f"{self.provider}/{self.model} {self.key[:12]}"
+
+
+# --- Index de recherche unifié (voir core.services.search_index) ---
+class SearchDocument(models.Model):
+    """
+    One searchable item (journal entry, memory, note or graph note), kept in
+    sync on save. The full-text index itself is created by the migration.
+    """
+    KIND_CHOICES = [
+        ('journal', 'Journal entry'),
+        ('memory', 'Memory'),
+        ('note', 'Note'),
+        ('graph_note', 'Graph note'),
+    ]
+
+    owner = models.ForeignKey('User', on_delete=models.CASCADE, related_name='search_documents')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=64)
+    title = models.CharField(max_length=400, blank=True)
+    body = models.TextField(blank=True)
+    date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='core_searchdoc_object_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'kind']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
@@ -5,6 +5,9 @@ import os
 import json
 from django.conf import settings
 
+from .ai_services import get_openai_client
+from .services.llm_cache import get_llm_cache
+
 try:
     import openai
     OPENAI_AVAILABLE = True
@@ -29,7 +32,7 @@ class MoodAIService:
         if not OPENAI_AVAILABLE or not settings.OPENAI_API_KEY:
             raise ValueError("OpenAI not configured")
         
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        client = get_openai_client()
         
         prompt = f"""Analyse le mood/humeur du texte suivant et retourne un JSON avec:
 1. "mood": le mood principal parmi: positif, neutre, negatif, colere, tristesse
@@ -41,13 +44,15 @@ Texte à analyser:
 
 Réponds UNIQUEMENT avec un JSON valide, sans texte supplémentaire."""
 
-        try:
+        messages = [
+            {"role": "system", "content": "Tu es un expert en analyse émotionnelle et psychologie positive. Tu fournis des analyses précises et des recommandations bienveillantes."},
+            {"role": "user", "content": prompt}
+        ]
+
+        def _request():
             response = client.chat.completions.create(
                 model=settings.AI_TEXT_MODEL,
-                messages=[
-                    {"role": "system", "content": "Tu es un expert en analyse émotionnelle et psychologie positive. Tu fournis des analyses précises et des recommandations bienveillantes."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 temperature=0.7,
                 max_tokens=500
             )
@@ -63,7 +68,13 @@ Réponds UNIQUEMENT avec un JSON valide, sans texte supplémentaire."""
                 result_text = result_text[:-3]
             result_text = result_text.strip()
             
-            result = json.loads(result_text)
+            return json.loads(result_text)
+
+        try:
+            result = get_llm_cache().get_or_call(
+                'openai', settings.AI_TEXT_MODEL, messages, 0.7, _request,
+                extra={'max_tokens': 500},
+            )
             
             # Valider et normaliser les scores
             scores = result.get('scores', {})
@@ -5,6 +5,9 @@ import json
 import logging
 from django.conf import settings
 
+from .ai_services import get_openai_client
+from .services.llm_cache import get_llm_cache
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -34,7 +37,7 @@ class MusicRecommendationService:
             return MusicRecommendationService._get_fallback_recommendation(detected_mood or 'neutre')
         
         try:
-            client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            client = get_openai_client()
             
             mood_context = f"\nL'analyse émotionnelle a détecté: {detected_mood}" if detected_mood else ""
             
@@ -59,32 +62,40 @@ Format de réponse JSON :
 
 Réponds UNIQUEMENT avec un JSON valide, sans texte supplémentaire."""
 
-            response = client.chat.completions.create(
-                model=settings.AI_TEXT_MODEL,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "Tu es un expert en musicothérapie et bien-être émotionnel. Tu recommandes des chansons apaisantes et adaptées à l'état émotionnel de l'utilisateur."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=300
+            messages = [
+                {
+                    "role": "system", 
+                    "content": "Tu es un expert en musicothérapie et bien-être émotionnel. Tu recommandes des chansons apaisantes et adaptées à l'état émotionnel de l'utilisateur."
+                },
+                {"role": "user", "content": prompt}
+            ]
+
+            def _request():
+                response = client.chat.completions.create(
+                    model=settings.AI_TEXT_MODEL,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=300
+                )
+                
+                result_text = response.choices[0].message.content.strip()
+                
+                # Nettoyer le JSON si nécessaire
+                if result_text.startswith("```json"):
+                    result_text = result_text[7:]
+                if result_text.startswith("```"):
+                    result_text = result_text[3:]
+                if result_text.endswith("```"):
+                    result_text = result_text[:-3]
+                result_text = result_text.strip()
+                
+                return json.loads(result_text)
+
+            result = get_llm_cache().get_or_call(
+                'openai', settings.AI_TEXT_MODEL, messages, 0.7, _request,
+                extra={'max_tokens': 300},
             )
             
-            result_text = response.choices[0].message.content.strip()
-            
-            # Nettoyer le JSON si nécessaire
-            if result_text.startswith("```json"):
-                result_text = result_text[7:]
-            if result_text.startswith("```"):
-                result_text = result_text[3:]
-            if result_text.endswith("```"):
-                result_text = result_text[:-3]
-            result_text = result_text.strip()
-            
-            result = json.loads(result_text)
-            
             return {
                 'emotion': result.get('emotion', detected_mood or 'neutre'),
                 'suggestion': result.get('suggestion', 'No suggestion available'),
@@ -8,6 +8,8 @@ from typing import Dict, List, Optional
 import json
 from groq import Groq
 
+from .llm_cache import get_llm_cache
+
 
 class GroqAIService:
     """Service d'IA utilisant l'API Groq pour l'analyse du journal"""
@@ -21,7 +23,8 @@ class GroqAIService:
         self.client = Groq(api_key=self.api_key)
         self.model = "llama-3.3-70b-versatile"  # Nouveau modèle (mis à jour)
     
-    def _call_groq(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 1000) -> str:
+    def _call_groq(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 1000,
+                   use_cache: bool = False) -> str:
         """
         Appelle l'API Groq
         
@@ -29,10 +32,19 @@ class GroqAIService:
             messages: Liste de messages pour la conversation
             temperature: Créativité (0.0-2.0)
             max_tokens: Nombre maximum de tokens
+            use_cache: Réutiliser une réponse déjà obtenue pour le même prompt
+                (sans effet au-dessus de LLM_CACHE['MAX_TEMPERATURE'])
             
         Returns:
             Réponse de l'IA
         """
+        if use_cache:
+            return get_llm_cache().get_or_call(
+                'groq', self.model, messages, temperature,
+                lambda: self._call_groq(messages, temperature, max_tokens),
+                extra={'max_tokens': max_tokens},
+            )
+
         try:
             chat_completion = self.client.chat.completions.create(
                 messages=messages,
@@ -74,7 +86,7 @@ class GroqAIService:
             }
         ]
         
-        response = self._call_groq(messages, temperature=0.3, max_tokens=500)
+        response = self._call_groq(messages, temperature=0.3, max_tokens=500, use_cache=True)
         
         if response:
             try:
@@ -177,7 +189,7 @@ class GroqAIService:
             }
         ]
         
-        response = self._call_groq(messages, temperature=0.3, max_tokens=300)
+        response = self._call_groq(messages, temperature=0.3, max_tokens=300, use_cache=True)
         return response if response else "Résumé non disponible"
     
     def generer_insights(self, texte: str) -> Dict:
@@ -0,0 +1,93 @@
+"""
+Téléchargement de fichiers en streaming avec support des requêtes HTTP Range.
+
+Le fichier est lu par blocs (FileResponse) au lieu d'être chargé en
+mémoire ; une requête `Range: bytes=...` (reprise de téléchargement,
+lecteurs PDF) reçoit une réponse 206 limitée à la plage demandée.
+Une seule plage est gérée ; les requêtes multi-plages reçoivent le
+fichier entier.
+"""
+
+import re
+
+from django.http import FileResponse, HttpResponse
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeUnsatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    'bytes=0-499' / 'bytes=500-' / 'bytes=-500' -> (start, end) inclusifs,
+    ou None si l'en-tête est absent ou non géré.
+    Lève RangeUnsatisfiable si la plage est hors du fichier.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeUnsatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeUnsatisfiable()
+    return start, min(end, size - 1)
+
+
+class _RangeReader:
+    """Objet fichier en lecture seule limité à `length` octets"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def ranged_file_response(request, field_file, filename, content_type='application/octet-stream'):
+    """FileResponse (200 ou 206) pour un FieldFile, selon l'en-tête Range"""
+    size = field_file.size
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except RangeUnsatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = field_file.open('rb')
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(_RangeReader(file, start, length), as_attachment=True,
+                                filename=filename, content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,248 @@
+"""
+Agrégations du calendrier émotionnel.
+
+Une seule requête values_list (date, émotion IA, émotion, thème) par
+période ; émotion dominante par jour et par mois calculée en une passe.
+"""
+
+import calendar
+import uuid
+from datetime import date
+
+from django.db.models import Q
+from django.db.models.functions import Length, Substr
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+
+from ..models import Souvenir
+
+# Pastel palette shared by the calendar views and the events feed
+EMOTION_COLORS = {
+    'joy': '#FEF3C7',        # Soft yellow
+    'sadness': '#DBEAFE',    # Soft blue
+    'nostalgia': '#E9D5FF',  # Soft purple
+    'gratitude': '#D1FAE5',  # Soft green
+    'excitement': '#FED7AA', # Soft orange
+    'peace': '#F0FDF4',      # Very soft green
+    'love': '#FCE7F3',       # Soft pink
+    'surprise': '#FEF3C7',   # Soft yellow
+    'pride': '#FEE2E2',      # Soft red
+    'anger': '#FEE2E2',      # Soft red
+    'stress': '#FEF3C7',     # Soft yellow
+    'calm': '#F0FDF4',       # Very soft green
+    'neutral': '#F9FAFB',    # Light gray
+}
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+EMPTY_DAY_COLOR = '#f9fafb'
+EMPTY_MONTH_COLOR = '#f3f4f6'
+
+
+def emotion_color(emotion, default='#808080'):
+    return EMOTION_COLORS.get(emotion, default)
+
+
+def _rows(user, start, end):
+    """(date, emotion effective, thème) des souvenirs entre start et end inclus"""
+    rows = (
+        Souvenir.objects
+        .filter(utilisateur=user, date_evenement__gte=start, date_evenement__lte=end)
+        .order_by('-date_evenement')
+        .values_list('date_evenement', 'ai_emotion_detected', 'emotion', 'theme')
+    )
+    return [(day, ai_emotion or emotion, theme) for day, ai_emotion, emotion, theme in rows]
+
+
+def _dominant(counts):
+    """Valeur la plus fréquente ; à égalité, la première rencontrée"""
+    return max(counts.keys(), key=lambda x: counts[x]) if counts else None
+
+
+def build_year(user, year):
+    """
+    Les 12 mois de l'année pour calendrier_emotionnel.html :
+    dominante du mois et mini-calendrier coloré par dominante du jour.
+    """
+    month_emotions = [{} for _ in range(12)]
+    day_emotions = [{} for _ in range(12)]
+
+    for day, emotion, _ in _rows(user, date(year, 1, 1), date(year, 12, 31)):
+        counts = month_emotions[day.month - 1]
+        counts[emotion] = counts.get(emotion, 0) + 1
+        per_day = day_emotions[day.month - 1].setdefault(day.day, {})
+        per_day[emotion] = per_day.get(emotion, 0) + 1
+
+    yearly_data = []
+    for month in range(12):
+        emotion_counts = month_emotions[month]
+        month_data = {
+            'month': month,
+            'year': year,
+            'month_name': MONTH_NAMES[month],
+            'days': [],
+            'memory_count': sum(emotion_counts.values()),
+            'dominant_emotion': 'No data',
+            'dominant_color': EMPTY_MONTH_COLOR,
+        }
+
+        dominant_emotion = _dominant(emotion_counts)
+        if dominant_emotion:
+            month_data['dominant_emotion'] = dominant_emotion.title()
+            month_data['dominant_color'] = emotion_color(dominant_emotion, EMPTY_MONTH_COLOR)
+
+        for week in calendar.monthcalendar(year, month + 1):
+            for day_num in week:
+                if day_num == 0:
+                    # Empty day from previous/next month
+                    month_data['days'].append({
+                        'class': 'empty',
+                        'color': EMPTY_DAY_COLOR,
+                        'date': '',
+                        'emotion': None
+                    })
+                    continue
+
+                dominant_day_emotion = _dominant(day_emotions[month].get(day_num, {}))
+                month_data['days'].append({
+                    'class': 'has-memory' if dominant_day_emotion else 'empty',
+                    'color': emotion_color(dominant_day_emotion, EMPTY_DAY_COLOR) if dominant_day_emotion else EMPTY_DAY_COLOR,
+                    'date': f"{year}-{month+1:02d}-{day_num:02d}",
+                    'emotion': dominant_day_emotion
+                })
+
+        yearly_data.append(month_data)
+
+    return yearly_data
+
+
+def month_analytics(user, year, month):
+    """
+    Distribution des émotions et thèmes, activité quotidienne et statistiques
+    d'un mois, comparées au mois précédent (une seule requête pour les deux).
+    """
+    prev_month = month - 1 if month > 1 else 12
+    prev_year = year if month > 1 else year - 1
+    month_length = calendar.monthrange(year, month)[1]
+
+    emotion_distribution = {}
+    theme_distribution = {}
+    daily_activity = {}
+    prev_month_count = 0
+
+    for day, emotion, theme in _rows(user, date(prev_year, prev_month, 1), date(year, month, month_length)):
+        if day.month != month:
+            prev_month_count += 1
+            continue
+        emotion_distribution[emotion] = emotion_distribution.get(emotion, 0) + 1
+        if theme:
+            theme_distribution[theme] = theme_distribution.get(theme, 0) + 1
+        daily_activity[day.day] = daily_activity.get(day.day, 0) + 1
+
+    total_memories = sum(daily_activity.values())
+    days_with_memories = len(daily_activity)
+
+    # Memory frequency (memories per active day)
+    memory_frequency = total_memories / days_with_memories if days_with_memories > 0 else 0
+
+    dominant_emotion = 'No data'
+    dominant_emotion_count = 0
+    if emotion_distribution:
+        dominant_emotion = _dominant(emotion_distribution)
+        dominant_emotion_count = emotion_distribution[dominant_emotion]
+        dominant_emotion = dominant_emotion.title()
+
+    dominant_theme = _dominant(theme_distribution)
+    dominant_theme = dominant_theme.title() if dominant_theme else 'No data'
+
+    change_from_prev = total_memories - prev_month_count
+    change_percentage = (change_from_prev / prev_month_count * 100) if prev_month_count > 0 else 0
+
+    stats = {
+        'total_memories': total_memories,
+        'days_with_memories': days_with_memories,
+        'dominant_emotion': dominant_emotion,
+        'dominant_emotion_count': dominant_emotion_count,
+        'dominant_theme': dominant_theme,
+        'memory_frequency': round(memory_frequency, 1),
+        'most_active_day': _dominant(daily_activity),
+        'emotion_diversity': len(emotion_distribution),
+        'activity_percentage': round(days_with_memories / month_length * 100, 1),
+        'change_from_prev': change_from_prev,
+        'change_percentage': round(change_percentage, 1),
+        'month_length': month_length,
+    }
+
+    return {
+        'emotion_distribution': emotion_distribution,
+        'theme_distribution': theme_distribution,
+        'daily_activity': daily_activity,
+        'stats': stats,
+    }
+
+
+def parse_range_bound(value):
+    """
+    Borne start/end envoyée par FullCalendar ('2024-03-01' ou
+    '2024-03-01T00:00:00+01:00'). Returns: date ou None
+    """
+    if not value:
+        return None
+    try:
+        return parse_date(value[:10])
+    except ValueError:
+        return None
+
+
+def events_in_range(user, start=None, end=None):
+    """
+    Événements FullCalendar des souvenirs dont la date est dans [start, end[.
+    Seules les colonnes utiles sont lues ; la description est tronquée en SQL.
+    """
+    souvenirs = Souvenir.objects.filter(utilisateur=user)
+    if start:
+        souvenirs = souvenirs.filter(date_evenement__gte=start)
+    if end:
+        souvenirs = souvenirs.filter(date_evenement__lt=end)
+
+    rows = (
+        souvenirs
+        .annotate(
+            description_excerpt=Substr('description', 1, 100),
+            description_length=Length('description'),
+            has_photo=~Q(photo='') & Q(photo__isnull=False),
+            has_video=~Q(video='') & Q(video__isnull=False),
+        )
+        .order_by('date_evenement')
+        .values('id', 'titre', 'date_evenement', 'ai_emotion_detected', 'emotion',
+                'description_excerpt', 'description_length', 'has_photo', 'has_video')
+    )
+
+    # reverse() once, then substitute each id
+    placeholder = uuid.UUID(int=0)
+    detail_url = reverse('core:detail_souvenir', kwargs={'souvenir_id': placeholder})
+
+    events = []
+    for row in rows:
+        # Use AI-detected emotion if available, otherwise use user emotion
+        emotion = row['ai_emotion_detected'] or row['emotion']
+        color = emotion_color(emotion)  # Default to gray
+        description = row['description_excerpt']
+        if row['description_length'] > 100:
+            description += '...'
+
+        events.append({
+            'title': f"{row['titre']} ({emotion})",
+            'start': row['date_evenement'].isoformat(),
+            'backgroundColor': color,
+            'borderColor': color,
+            'textColor': '#000000',
+            'url': detail_url.replace(str(placeholder), str(row['id'])),
+            'extendedProps': {
+                'emotion': emotion,
+                'description': description,
+                'has_media': bool(row['has_photo'] or row['has_video']),
+            }
+        })
+    return events
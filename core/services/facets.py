@@ -0,0 +1,142 @@
+"""
+Facettes du tableau de bord des souvenirs.
+
+Une seule agrégation GROUP BY (emotion, theme, année, favori, analysé,
+média) sur les souvenirs de l'utilisateur suffit à calculer toutes les
+statistiques et tous les compteurs de facettes en Python. Une seconde
+agrégation n'est faite que si une recherche texte est active, car elle
+ne peut pas s'évaluer sur les groupes.
+"""
+
+from datetime import date
+
+from django.db.models import BooleanField, Case, Count, Q, Value, When
+from django.db.models.functions import ExtractYear
+
+from ..models import Souvenir
+
+BUCKET_FIELDS = ('emotion', 'theme', 'year', 'is_favorite', 'ai_analyzed', 'has_media')
+
+
+def aggregate_buckets(queryset):
+    """Une ligne par combinaison de valeurs de facettes, avec son effectif"""
+    rows = (
+        queryset
+        .annotate(
+            year=ExtractYear('date_evenement'),
+            has_media=Case(
+                When(Q(photo__isnull=True) | Q(photo=''), then=Value(False)),
+                default=Value(True),
+                output_field=BooleanField(),
+            ),
+        )
+        .values(*BUCKET_FIELDS)
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    return list(rows)
+
+
+def _parse_year(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _matches(bucket, filters, skip=None):
+    """Le groupe respecte-t-il les filtres actifs (sauf `skip`) ?"""
+    if skip != 'emotion' and filters.get('emotion') and bucket['emotion'] != filters['emotion']:
+        return False
+    if skip != 'theme' and filters.get('theme') and bucket['theme'] != filters['theme']:
+        return False
+    if skip != 'annee' and filters.get('annee') and bucket['year'] != _parse_year(filters['annee']):
+        return False
+    if skip != 'favoris' and filters.get('favoris') and not bucket['is_favorite']:
+        return False
+    if skip != 'ai_status':
+        if filters.get('ai_status') == 'analyzed' and not bucket['ai_analyzed']:
+            return False
+        if filters.get('ai_status') == 'pending' and bucket['ai_analyzed']:
+            return False
+    return True
+
+
+def _facet_counts(buckets):
+    """Compteurs au format attendu par memories_dashboard.html"""
+    emotions, themes, years = {}, {}, {}
+    analyzed = pending = 0
+    for bucket in buckets:
+        n = bucket['n']
+        emotions[bucket['emotion']] = emotions.get(bucket['emotion'], 0) + n
+        themes[bucket['theme']] = themes.get(bucket['theme'], 0) + n
+        if bucket['year'] is not None:
+            years[bucket['year']] = years.get(bucket['year'], 0) + n
+        if bucket['ai_analyzed']:
+            analyzed += n
+        else:
+            pending += n
+
+    return {
+        'emotions': {
+            code: {'name': name, 'count': emotions[code]}
+            for code, name in Souvenir.EMOTION_CHOICES if emotions.get(code)
+        },
+        'themes': {
+            code: {'name': name, 'count': themes[code]}
+            for code, name in Souvenir.THEME_CHOICES if themes.get(code)
+        },
+        'years': {year: years[year] for year in sorted(years, reverse=True)},
+        'ai_status': {'analyzed': analyzed, 'pending': pending},
+    }
+
+
+def compute_dashboard_facets(souvenirs, filters, search_queryset=None):
+    """
+    souvenirs       : queryset de base (tous les souvenirs de l'utilisateur)
+    filters         : dict emotion / theme / annee / favoris / ai_status
+    search_queryset : souvenirs restreints par la recherche texte, si active
+
+    Returns: dict avec
+      - stats           : total_memories, favorites, analyzed, pending, with_media, filtered_count
+      - facet_counts    : compteurs globaux (emotions, themes, years, ai_status) et
+                          facet_counts['filtered'] : compteurs restreints par les autres
+                          filtres actifs (chaque facette ignore son propre filtre)
+      - available_years : dates au 1er janvier, de la plus récente à la plus ancienne
+    """
+    buckets = aggregate_buckets(souvenirs)
+    scoped = aggregate_buckets(search_queryset) if search_queryset is not None else buckets
+
+    total = favorites = analyzed = with_media = 0
+    for bucket in buckets:
+        n = bucket['n']
+        total += n
+        favorites += n if bucket['is_favorite'] else 0
+        analyzed += n if bucket['ai_analyzed'] else 0
+        with_media += n if bucket['has_media'] else 0
+
+    facet_counts = _facet_counts(buckets)
+
+    filtered = {}
+    for facet, skip in (('emotions', 'emotion'), ('themes', 'theme'),
+                        ('years', 'annee'), ('ai_status', 'ai_status')):
+        filtered[facet] = _facet_counts([b for b in scoped if _matches(b, filters, skip)])[facet]
+    filtered['favorites'] = sum(
+        b['n'] for b in scoped if b['is_favorite'] and _matches(b, filters, 'favoris')
+    )
+    facet_counts['filtered'] = filtered
+
+    stats = {
+        'total_memories': total,
+        'favorites': favorites,
+        'analyzed': analyzed,
+        'pending': total - analyzed,
+        'with_media': with_media,
+        'filtered_count': sum(b['n'] for b in scoped if _matches(b, filters)),
+    }
+
+    return {
+        'stats': stats,
+        'facet_counts': facet_counts,
+        'available_years': [date(year, 1, 1) for year in facet_counts['years']],
+    }
@@ -0,0 +1,305 @@
+"""
+Disposition et métriques précalculées du Universe Graph.
+
+Pour chaque utilisateur, calcule sur core.Note / core.Link :
+- les positions (x, y) par un algorithme de forces (Fruchterman-Reingold)
+  vectorisé avec NumPy ; la répulsion est calculée par blocs, et sur un
+  échantillon de nœuds au-delà de REPULSION_SAMPLE nœuds ;
+- les composantes connexes, la centralité PageRank et des clusters
+  (propagation de labels).
+
+Les résultats sont stockés dans NoteLayout / GraphLayout et servis tels
+quels par graph_data_api. Le calcul est fait par le worker (tâche AITask
+'graph_layout') planifiée à chaque changement de structure (note créée
+ou supprimée, liens modifiés) ; il repart des positions précédentes,
+donc un petit changement ne déplace que localement le graphe.
+
+NumPy est optionnel : sans lui, aucune position n'est calculée et le
+navigateur garde sa disposition automatique.
+"""
+
+import hashlib
+import logging
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from ..models import AITask, GraphLayout, Link, Note, NoteLayout
+from .task_queue import register_handler
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+IDEAL_EDGE_LENGTH = 80.0
+COLD_ITERATIONS = 120
+WARM_ITERATIONS = 30
+GRAVITY = 1.0
+BLOCK_SIZE = 512
+REPULSION_SAMPLE = 800
+LABEL_PROPAGATION_ROUNDS = 20
+
+
+# --- Graph metrics ---
+
+def connected_components(n, src, dst):
+    """Label de composante par nœud, 0 = la plus grande"""
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in zip(src, dst):
+        root_a, root_b = find(int(a)), find(int(b))
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    return _relabel_by_size([find(i) for i in range(n)])
+
+
+def label_propagation(n, src, dst, seed=0):
+    """Communautés par propagation de labels sur le graphe non orienté"""
+    neighbors = [[] for _ in range(n)]
+    for a, b in zip(src, dst):
+        a, b = int(a), int(b)
+        if a != b:
+            neighbors[a].append(b)
+            neighbors[b].append(a)
+
+    labels = list(range(n))
+    order = list(range(n))
+    rng = np.random.default_rng(seed)
+    for _ in range(LABEL_PROPAGATION_ROUNDS):
+        rng.shuffle(order)
+        changed = False
+        for node in order:
+            if not neighbors[node]:
+                continue
+            counts = {}
+            for other in neighbors[node]:
+                counts[labels[other]] = counts.get(labels[other], 0) + 1
+            best = max(counts.values())
+            label = min(label for label, count in counts.items() if count == best)
+            if label != labels[node]:
+                labels[node] = label
+                changed = True
+        if not changed:
+            break
+
+    return _relabel_by_size(labels)
+
+
+def _relabel_by_size(labels):
+    sizes = {}
+    for label in labels:
+        sizes[label] = sizes.get(label, 0) + 1
+    ranking = {label: rank for rank, label in enumerate(sorted(sizes, key=lambda l: (-sizes[l], l)))}
+    return [ranking[label] for label in labels]
+
+
+def pagerank(n, src, dst, damping=0.85, tol=1e-8, max_iter=100):
+    """PageRank (liens orientés), nœuds sans lien sortant redistribués uniformément"""
+    if n == 0:
+        return np.zeros(0)
+    out_degree = np.bincount(src, minlength=n).astype(float)
+    dangling = out_degree == 0
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        share = np.divide(rank, out_degree, out=np.zeros(n), where=~dangling)
+        incoming = np.bincount(dst, weights=share[src], minlength=n) if len(src) else np.zeros(n)
+        new_rank = damping * (incoming + rank[dangling].sum() / n) + (1 - damping) / n
+        converged = np.abs(new_rank - rank).sum() < tol
+        rank = new_rank
+        if converged:
+            break
+    return rank
+
+
+# --- Layout ---
+
+def force_layout(n, src, dst, initial=None, known=None, iterations=None, seed=0, k=IDEAL_EDGE_LENGTH):
+    """
+    Positions (n, 2) par Fruchterman-Reingold.
+    initial : positions de départ (n, 2) ; known : masque des positions
+    reprises d'un calcul précédent (démarrage à chaud, moins d'itérations).
+    Returns: (positions, nombre d'itérations)
+    """
+    rng = np.random.default_rng(seed)
+    if n == 0:
+        return np.zeros((0, 2)), 0
+
+    spread = k * math.sqrt(n)
+    warm = initial is not None and known is not None and known.any()
+    pos = initial.astype(float).copy() if warm else rng.uniform(-spread / 2, spread / 2, (n, 2))
+    if iterations is None:
+        iterations = WARM_ITERATIONS if warm else COLD_ITERATIONS
+    temperature = k * 2 if warm else spread / 10
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        disp = np.zeros((n, 2))
+
+        # Repulsion k²/d between all pairs (or a sample, rescaled), by row blocks:
+        # sum_j (p_i - p_j) / d_ij² = p_i * sum_j w_ij - (W @ p)_i with w = 1 / d²
+        if n > REPULSION_SAMPLE:
+            others = pos[rng.choice(n, REPULSION_SAMPLE, replace=False)]
+            scale = n / REPULSION_SAMPLE
+        else:
+            others, scale = pos, 1.0
+        for start in range(0, n, BLOCK_SIZE):
+            block = pos[start:start + BLOCK_SIZE]
+            dx = block[:, :1] - others[:, 0]
+            dy = block[:, 1:] - others[:, 1]
+            weights = 1.0 / np.maximum(dx * dx + dy * dy, 0.01)
+            disp[start:start + BLOCK_SIZE] += (k * k * scale) * (block * weights.sum(axis=1)[:, None] - weights @ others)
+
+        # Attraction d²/k along edges
+        if len(src):
+            delta = pos[src] - pos[dst]
+            force = delta * (np.sqrt((delta ** 2).sum(axis=1)) / k)[:, None]
+            for axis in range(2):
+                disp[:, axis] += np.bincount(dst, force[:, axis], minlength=n) - np.bincount(src, force[:, axis], minlength=n)
+
+        # Gravity keeps disconnected components together
+        disp -= pos * GRAVITY
+
+        length = np.maximum(np.sqrt((disp ** 2).sum(axis=1)), 1e-9)
+        pos += disp / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature = max(temperature - cooling, k / 100)
+
+    return pos, iterations
+
+
+def _initial_positions(n, src, dst, previous, seed, k=IDEAL_EDGE_LENGTH):
+    """Positions précédentes ; nouveaux nœuds au barycentre de leurs voisins connus"""
+    rng = np.random.default_rng(seed)
+    pos = np.zeros((n, 2))
+    known = np.zeros(n, dtype=bool)
+    for i, xy in previous.items():
+        pos[i] = xy
+        known[i] = True
+    if not known.any():
+        return None, None
+
+    sums = np.zeros((n, 2))
+    counts = np.zeros(n)
+    for a, b in ((src, dst), (dst, src)):
+        mask = known[b]
+        np.add.at(sums, a[mask], pos[b[mask]])
+        np.add.at(counts, a[mask], 1)
+
+    center = pos[known].mean(axis=0)
+    for i in np.flatnonzero(~known):
+        base = sums[i] / counts[i] if counts[i] else center
+        pos[i] = base + rng.normal(0, k / 2, 2)
+    return pos, known
+
+
+# --- Persistence ---
+
+def fingerprint(user_id):
+    """Change quand une note ou un lien est ajouté ou supprimé"""
+    notes = Note.objects.filter(owner_id=user_id).aggregate(n=Count('id'), last=Max('created_at'))
+    links = Link.objects.filter(src__owner_id=user_id, dst__owner_id=user_id).aggregate(n=Count('id'), last=Max('created_at'))
+    raw = f"{notes['n']}|{notes['last']}|{links['n']}|{links['last']}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def compute_user_layout(user_id, force=False):
+    """
+    Recalcule positions et métriques d'un utilisateur si le graphe a changé.
+    Returns: GraphLayout, ou None sans NumPy
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+
+    current = fingerprint(user_id)
+    state = GraphLayout.objects.filter(owner_id=user_id).first()
+    if state and state.fingerprint == current and not force:
+        return state
+
+    note_ids = list(Note.objects.filter(owner_id=user_id).order_by('created_at', 'id').values_list('id', flat=True))
+    index = {note_id: i for i, note_id in enumerate(note_ids)}
+    pairs = {
+        (index[src_id], index[dst_id])
+        for src_id, dst_id in Link.objects.filter(src__owner_id=user_id, dst__owner_id=user_id).values_list('src_id', 'dst_id')
+        if src_id != dst_id
+    }
+    src = np.array([a for a, _ in pairs], dtype=np.int64)
+    dst = np.array([b for _, b in pairs], dtype=np.int64)
+    n = len(note_ids)
+
+    previous = {
+        index[note_id]: (x, y)
+        for note_id, x, y in NoteLayout.objects.filter(owner_id=user_id).values_list('note_id', 'x', 'y')
+        if note_id in index
+    }
+    seed = int(hashlib.md5(str(user_id).encode()).hexdigest()[:8], 16)
+    initial, known = _initial_positions(n, src, dst, previous, seed) if previous else (None, None)
+
+    positions, iterations = force_layout(n, src, dst, initial=initial, known=known, seed=seed)
+    ranks = pagerank(n, src, dst)
+    components = connected_components(n, src, dst)
+    clusters = label_propagation(n, src, dst, seed=seed)
+
+    rows = [
+        NoteLayout(
+            note_id=note_id, owner_id=user_id,
+            x=round(float(positions[i, 0]), 2), y=round(float(positions[i, 1]), 2),
+            pagerank=float(ranks[i]), component=components[i], cluster=clusters[i],
+        )
+        for i, note_id in enumerate(note_ids)
+    ]
+    with transaction.atomic():
+        NoteLayout.objects.bulk_create(
+            rows, batch_size=500, update_conflicts=True, unique_fields=['note'],
+            update_fields=['x', 'y', 'pagerank', 'component', 'cluster'],
+        )
+        state, _ = GraphLayout.objects.update_or_create(owner_id=user_id, defaults={
+            'fingerprint': current,
+            'node_count': n,
+            'edge_count': len(pairs),
+            'component_count': len(set(components)),
+            'cluster_count': len(set(clusters)),
+            'iterations': iterations,
+        })
+    return state
+
+
+def schedule_layout(user_id):
+    """
+    Planifie le recalcul après le commit (tâche 'graph_layout'), une seule
+    en attente par utilisateur ; le délai regroupe les rafales de modifications.
+    """
+    if NUMPY_AVAILABLE and user_id is not None:
+        transaction.on_commit(lambda: _enqueue_layout(user_id))
+
+
+def _enqueue_layout(user_id):
+    if AITask.objects.filter(task_type='graph_layout', owner_id=user_id, status='queued').exists():
+        return
+    AITask.objects.create(
+        task_type='graph_layout',
+        owner_id=user_id,
+        max_attempts=1,
+        available_at=timezone.now() + timedelta(seconds=getattr(settings, 'GRAPH_LAYOUT_DELAY', 5)),
+    )
+
+
+@register_handler('graph_layout')
+def _graph_layout(task):
+    state = compute_user_layout(task.owner_id)
+    if state is None:
+        return {'skipped': 'numpy not installed'}
+    return {'nodes': state.node_count, 'edges': state.edge_count, 'iterations': state.iterations}
@@ -0,0 +1,248 @@
+"""
+Diffusion des modifications du graphe (Universe Graph) via Channels.
+
+Au lieu d'un `refresh` synchrone par sauvegarde de note, les signaux
+enregistrent des deltas (nœuds ajoutés / modifiés / supprimés, arêtes
+ajoutées / supprimées) après le commit de la transaction. Un thread de
+fond les regroupe par utilisateur et envoie un seul message `delta` à
+GraphConsumer.graph_update quand l'utilisateur est resté inactif pendant
+GRAPH_BROADCAST_WINDOW secondes (au plus GRAPH_BROADCAST_MAX_DELAY après
+le premier changement). Au-delà de GRAPH_BROADCAST_MAX_ITEMS éléments,
+le delta est remplacé par un `refresh`.
+
+Sans channel layer configurée, rien n'est enregistré.
+"""
+
+import logging
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+try:
+    from channels.layers import get_channel_layer
+except Exception:
+    get_channel_layer = None
+
+logger = logging.getLogger(__name__)
+
+
+def group_name(user_id):
+    return f'graph_{user_id}'
+
+
+class GraphDelta:
+    """Changements cumulés d'un utilisateur ; les opérations successives s'annulent"""
+
+    def __init__(self):
+        self.nodes = {}
+        self.removed_nodes = set()
+        self.edges = set()
+        self.removed_edges = set()
+        self.refresh = False
+
+    def upsert_node(self, node):
+        self.removed_nodes.discard(node['id'])
+        self.nodes[node['id']] = node
+
+    def remove_node(self, node_id):
+        self.nodes.pop(node_id, None)
+        self.removed_nodes.add(node_id)
+        # Edges of a removed node disappear with it on the client
+        self.edges = {edge for edge in self.edges if node_id not in edge}
+        self.removed_edges = {edge for edge in self.removed_edges if node_id not in edge}
+
+    def add_edge(self, edge):
+        self.removed_edges.discard(edge)
+        self.edges.add(edge)
+
+    def remove_edge(self, edge):
+        self.edges.discard(edge)
+        self.removed_edges.add(edge)
+
+    def size(self):
+        return len(self.nodes) + len(self.removed_nodes) + len(self.edges) + len(self.removed_edges)
+
+    def payload(self):
+        return {
+            'nodes': list(self.nodes.values()),
+            'removed_nodes': sorted(self.removed_nodes),
+            'edges': [{'source': src, 'target': dst, 'strength': 1.0} for src, dst in sorted(self.edges)],
+            'removed_edges': [{'source': src, 'target': dst} for src, dst in sorted(self.removed_edges)],
+        }
+
+
+class GraphBroadcaster:
+    """
+    Regroupe les deltas par utilisateur et les envoie depuis un thread de fond.
+    send(user_id, message) est appelé pour chaque message ; par défaut
+    group_send sur la channel layer.
+    """
+
+    def __init__(self, send=None, window=None, max_delay=None, max_items=None,
+                 clock=time.monotonic, start_thread=True):
+        self.send = send or self._group_send
+        self.window = window if window is not None else getattr(settings, 'GRAPH_BROADCAST_WINDOW', 0.5)
+        self.max_delay = max_delay if max_delay is not None else getattr(settings, 'GRAPH_BROADCAST_MAX_DELAY', 2.0)
+        self.max_items = max_items if max_items is not None else getattr(settings, 'GRAPH_BROADCAST_MAX_ITEMS', 500)
+        self.clock = clock
+        self.start_thread = start_thread
+        self._pending = {}  # user_id -> [delta, first_change, last_change]
+        self._cond = threading.Condition()
+        self._thread = None
+
+    # --- Recording ---
+
+    def record(self, user_id, change):
+        """change(delta) modifie le delta en attente de l'utilisateur"""
+        if user_id is None:
+            return
+        with self._cond:
+            now = self.clock()
+            entry = self._pending.get(user_id)
+            if entry is None:
+                entry = self._pending[user_id] = [GraphDelta(), now, now]
+            change(entry[0])
+            entry[2] = now
+            self._cond.notify()
+        self._ensure_thread()
+
+    def note_saved(self, user_id, node):
+        self.record(user_id, lambda delta: delta.upsert_node(node))
+
+    def note_deleted(self, user_id, node_id):
+        self.record(user_id, lambda delta: delta.remove_node(node_id))
+
+    def links_changed(self, user_id, added=(), removed=()):
+        def change(delta):
+            for edge in added:
+                delta.add_edge(edge)
+            for edge in removed:
+                delta.remove_edge(edge)
+        self.record(user_id, change)
+
+    def refresh(self, user_id):
+        def change(delta):
+            delta.refresh = True
+        self.record(user_id, change)
+
+    # --- Flushing ---
+
+    def _due_at(self, entry):
+        _, first, last = entry
+        return min(last + self.window, first + self.max_delay)
+
+    def flush(self, force=False):
+        """Envoie les deltas arrivés à échéance (tous si force). Returns: nombre de messages"""
+        with self._cond:
+            now = self.clock()
+            due = [user_id for user_id, entry in self._pending.items()
+                   if force or self._due_at(entry) <= now]
+            batch = [(user_id, self._pending.pop(user_id)[0]) for user_id in due]
+
+        for user_id, delta in batch:
+            try:
+                self.send(user_id, self.message(user_id, delta))
+            except Exception as e:
+                logger.warning(f"Graph broadcast failed for user {user_id}: {e}")
+        return len(batch)
+
+    def message(self, user_id, delta):
+        if delta.refresh or delta.size() > self.max_items:
+            return {'type': 'graph_update', 'action': 'refresh'}
+        self._attach_notes_app_ids(user_id, delta)
+        return {'type': 'graph_update', 'action': 'delta', 'delta': delta.payload()}
+
+    @staticmethod
+    def _attach_notes_app_ids(user_id, delta):
+        """notes_app_id des nœuds ajoutés/modifiés, en une requête"""
+        if not delta.nodes:
+            return
+        try:
+            from notes.models import Note as NotesAppNote
+        except Exception:
+            return
+        titles = {node['title'] for node in delta.nodes.values()}
+        ids = {}
+        for title, note_id in NotesAppNote.objects.filter(user_id=user_id, title__in=titles).values_list('title', 'id'):
+            ids.setdefault(title, note_id)
+        for node in delta.nodes.values():
+            node['notes_app_id'] = ids.get(node['title'])
+
+    @staticmethod
+    def _group_send(user_id, message):
+        channel_layer = get_channel_layer() if get_channel_layer else None
+        if channel_layer is not None:
+            async_to_sync(channel_layer.group_send)(group_name(user_id), message)
+
+    # --- Background thread ---
+
+    def _ensure_thread(self):
+        if not self.start_thread or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='graph-broadcast', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                wait = min(self._due_at(entry) for entry in self._pending.values()) - self.clock()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            close_old_connections()
+            self.flush()
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                _broadcaster = GraphBroadcaster()
+    return _broadcaster
+
+
+def enabled():
+    return get_channel_layer is not None and get_channel_layer() is not None
+
+
+def node_payload(note):
+    return {
+        'id': str(note.id),
+        'title': note.title,
+        'created_at': note.created_at.isoformat() if note.created_at else None,
+    }
+
+
+def _after_commit(func):
+    if enabled():
+        transaction.on_commit(func)
+
+
+def note_saved(note):
+    user_id, node = note.owner_id, node_payload(note)
+    _after_commit(lambda: get_broadcaster().note_saved(user_id, node))
+
+
+def note_deleted(note):
+    user_id, node_id = note.owner_id, str(note.id)
+    _after_commit(lambda: get_broadcaster().note_deleted(user_id, node_id))
+
+
+def links_changed(user_id, added=(), removed=()):
+    """added / removed : paires (src_id, dst_id)"""
+    added = [(str(src), str(dst)) for src, dst in added]
+    removed = [(str(src), str(dst)) for src, dst in removed]
+    if added or removed:
+        _after_commit(lambda: get_broadcaster().links_changed(user_id, added, removed))
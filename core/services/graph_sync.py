@@ -0,0 +1,168 @@
+"""
+Reconstruction en masse du graphe (core.Note / core.Link).
+
+Utilisé par les commandes `rebuild_graph` et `sync_notes_app`. Pour
+chaque utilisateur, les notes sont lues une fois, les correspondances
+titre -> id sont préchargées, puis seules les différences avec la base
+sont écrites : suppressions par lots d'IDs et bulk_create(ignore_conflicts=True),
+chaque lot dans sa propre transaction.
+
+Les utilisateurs peuvent être traités en parallèle dans des process
+séparés (run_for_users). Avec SQLite, les écritures restent sérialisées
+par la base : garder workers=1.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.db import connections, transaction
+
+from ..models import Link, Note
+from ..utils import WIKI_LINK_RE, title_key
+from .graph_analytics import schedule_layout
+
+try:
+    from notes.models import Note as NotesAppNote, NoteLink as NotesAppNoteLink
+except Exception:
+    NotesAppNote = None
+    NotesAppNoteLink = None
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _resolve(candidates, src_id):
+    """Première note candidate (la plus ancienne) qui n'est pas la source"""
+    for candidate in candidates:
+        if candidate != src_id:
+            return candidate
+    return None
+
+
+def rebuild_user_links(user_id, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Recalcule les liens 'reference' de toutes les notes d'un utilisateur
+    à partir des [[...]] de leur contenu (même règles que parse_note_links).
+    Returns: dict notes / created / deleted
+    """
+    notes = list(
+        Note.objects.filter(owner_id=user_id)
+        .order_by('created_at')
+        .values_list('id', 'title_key', 'body')
+    )
+
+    ids_by_key = {}
+    for note_id, key, _ in notes:
+        ids_by_key.setdefault(key, []).append(note_id)
+
+    wanted = set()
+    for note_id, _, body in notes:
+        for match in WIKI_LINK_RE.findall(body or ''):
+            target = _resolve(ids_by_key.get(title_key(match), ()), note_id)
+            if target is not None:
+                wanted.add((note_id, target))
+
+    existing = {}
+    for link_id, src_id, dst_id in Link.objects.filter(src__owner_id=user_id, kind='reference').values_list('id', 'src_id', 'dst_id'):
+        existing[(src_id, dst_id)] = link_id
+
+    removed = [link_id for pair, link_id in existing.items() if pair not in wanted]
+    added = [pair for pair in wanted if pair not in existing]
+
+    for chunk in _chunks(removed, batch_size):
+        with transaction.atomic():
+            Link.objects.filter(id__in=chunk).delete()
+    for chunk in _chunks(added, batch_size):
+        with transaction.atomic():
+            Link.objects.bulk_create(
+                [Link(src_id=src, dst_id=dst, kind='reference') for src, dst in chunk],
+                ignore_conflicts=True,
+            )
+
+    if added or removed:
+        schedule_layout(user_id)
+    return {'notes': len(notes), 'created': len(added), 'deleted': len(removed)}
+
+
+def sync_user_notes_app(user_id, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Crée les core.Note manquantes pour les notes de l'app notes et recopie
+    leurs NoteLink dans core.Link. Rien n'est supprimé.
+    Returns: dict notes / links
+    """
+    core_ids = dict(Note.objects.filter(owner_id=user_id).values_list('title', 'id'))
+
+    missing = {}
+    for title, content in NotesAppNote.objects.filter(user_id=user_id).order_by('created_at').values_list('title', 'content'):
+        if title not in core_ids and title not in missing:
+            missing[title] = content or ''
+
+    new_notes = [
+        Note(owner_id=user_id, title=title, title_key=title_key(title), body=body)
+        for title, body in missing.items()
+    ]
+    for chunk in _chunks(new_notes, batch_size):
+        with transaction.atomic():
+            Note.objects.bulk_create(chunk, ignore_conflicts=True)
+    core_ids.update(Note.objects.filter(owner_id=user_id, title__in=missing).values_list('title', 'id'))
+
+    pairs = set()
+    note_links = NotesAppNoteLink.objects.filter(
+        source_note__user_id=user_id, target_note__user_id=user_id,
+    ).values_list('source_note__title', 'target_note__title')
+    for src_title, dst_title in note_links:
+        src, dst = core_ids.get(src_title), core_ids.get(dst_title)
+        if src and dst:
+            pairs.add((src, dst))
+
+    existing = set(
+        Link.objects.filter(src__owner_id=user_id, kind='reference').values_list('src_id', 'dst_id')
+    )
+    added = [pair for pair in pairs if pair not in existing]
+    for chunk in _chunks(added, batch_size):
+        with transaction.atomic():
+            Link.objects.bulk_create(
+                [Link(src_id=src, dst_id=dst, kind='reference') for src, dst in chunk],
+                ignore_conflicts=True,
+            )
+
+    if new_notes or added:
+        schedule_layout(user_id)
+    return {'notes': len(new_notes), 'links': len(added)}
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def _timed(func, user_id, batch_size):
+    started = time.monotonic()
+    result = func(user_id, batch_size=batch_size)
+    result['user_id'] = user_id
+    result['seconds'] = time.monotonic() - started
+    return result
+
+
+def run_for_users(func, user_ids, workers=1, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Applique func(user_id, batch_size=...) à chaque utilisateur, en série
+    ou dans `workers` process. Génère les résultats dans l'ordre de fin.
+    """
+    if workers <= 1:
+        for user_id in user_ids:
+            yield _timed(func, user_id, batch_size)
+        return
+
+    # Child processes must open their own connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_timed, func, user_id, batch_size) for user_id in user_ids]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,218 @@
+"""
+Requêtes du Universe Graph : graphe complet ou vue par viewport (LOD).
+
+En mode viewport, le client envoie le rectangle visible (coordonnées des
+positions précalculées par graph_analytics) et son niveau de zoom :
+- les notes visibles sont lues par l'index (owner, x, y) de NoteLayout,
+  les plus centrales (PageRank) d'abord, au plus VIEWPORT_MAX_NODES ;
+- le reste du graphe est résumé en super-nœuds, un par cluster
+  (barycentre, nombre de notes), au plus VIEWPORT_MAX_CLUSTERS ;
+- sous LOD_MIN_ZOOM, seuls les super-nœuds sont renvoyés.
+La taille de la réponse est donc bornée quel que soit le nombre de notes.
+
+Les petits graphes (moins de LOD_FULL_THRESHOLD notes) et ceux qui n'ont
+pas encore de disposition sont renvoyés en entier.
+"""
+
+from django.db.models import Avg, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ..models import GraphLayout, Link, Note, NoteLayout
+
+try:
+    from notes.models import Note as NotesAppNote
+except Exception:
+    NotesAppNote = None
+
+LOD_FULL_THRESHOLD = 1500
+LOD_MIN_ZOOM = 0.3
+VIEWPORT_MAX_NODES = 1000
+VIEWPORT_MAX_CLUSTERS = 200
+VIEWPORT_MAX_EDGES = 5000
+
+NODE_FIELDS = ('id', 'title', 'created_at', 'outgoing', 'incoming', 'notes_app_id',
+               'layout__x', 'layout__y', 'layout__pagerank', 'layout__component', 'layout__cluster')
+
+
+class Viewport:
+    """Rectangle visible (x1, y1, x2, y2) et zoom du client"""
+
+    def __init__(self, x1, y1, x2, y2, zoom=1.0):
+        self.x1, self.x2 = sorted((x1, x2))
+        self.y1, self.y2 = sorted((y1, y2))
+        self.zoom = zoom
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Lit ?bbox=x1,y1,x2,y2&zoom=z. Returns: Viewport, ou None sans bbox
+        Raises: ValueError si les paramètres sont invalides
+        """
+        bbox = params.get('bbox')
+        if not bbox:
+            return None
+        values = [float(v) for v in bbox.split(',')]
+        if len(values) != 4:
+            raise ValueError('bbox must be x1,y1,x2,y2')
+        zoom = float(params.get('zoom', 1.0))
+        if zoom <= 0:
+            raise ValueError('zoom must be positive')
+        return cls(*values, zoom=zoom)
+
+    def q(self, prefix=''):
+        return Q(**{
+            f'{prefix}x__gte': self.x1, f'{prefix}x__lte': self.x2,
+            f'{prefix}y__gte': self.y1, f'{prefix}y__lte': self.y2,
+        })
+
+
+def count_links(field):
+    """Number of links whose `field` (src or dst) is the outer note"""
+    counts = (
+        Link.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def node_queryset(user):
+    """Notes of the user annotated with their degrees and notes-app id"""
+    notes = Note.objects.filter(owner=user).annotate(
+        outgoing=count_links('src'),
+        incoming=count_links('dst'),
+    )
+    if NotesAppNote is not None:
+        return notes.annotate(notes_app_id=Subquery(
+            NotesAppNote.objects
+            .filter(user=user, title=OuterRef('title'))
+            .order_by('-is_pinned', '-updated_at')
+            .values('id')[:1]
+        ))
+    return notes.annotate(notes_app_id=Value(None, output_field=IntegerField()))
+
+
+def node_payload(row):
+    return {
+        'id': str(row['id']),
+        'notes_app_id': row['notes_app_id'],
+        'title': row['title'],
+        'connections': row['outgoing'] + row['incoming'],
+        'created_at': row['created_at'].isoformat(),
+        'x': row['layout__x'],
+        'y': row['layout__y'],
+        'pagerank': row['layout__pagerank'],
+        'component': row['layout__component'],
+        'cluster': row['layout__cluster'],
+    }
+
+
+def full_graph(user):
+    """Tous les nœuds et arêtes (deux requêtes)"""
+    nodes = [node_payload(row) for row in node_queryset(user).values(*NODE_FIELDS)]
+    links = Link.objects.filter(src__owner=user, dst__owner=user).values_list('src_id', 'dst_id')
+    edges = [{'source': str(src_id), 'target': str(dst_id), 'strength': 1.0} for src_id, dst_id in links]
+
+    stats = {
+        'total_notes': len(nodes),
+        'total_links': len(edges),
+        'orphaned_notes': len([n for n in nodes if n['connections'] == 0]),
+        'components': len({n['component'] for n in nodes if n['component'] is not None}),
+        'clusters': len({n['cluster'] for n in nodes if n['cluster'] is not None}),
+    }
+    return {'mode': 'full', 'nodes': nodes, 'edges': edges, 'stats': stats}
+
+
+def use_lod(user):
+    """Returns: GraphLayout si le graphe doit être servi par viewport, sinon None"""
+    layout = GraphLayout.objects.filter(owner=user).first()
+    if layout is None or layout.node_count < LOD_FULL_THRESHOLD:
+        return None
+    return layout
+
+
+def cluster_id(cluster):
+    return f'cluster-{cluster}'
+
+
+def viewport_graph(user, viewport, layout):
+    """
+    Notes visibles + super-nœuds des clusters pour le reste du graphe.
+    Les arêtes vers une note hors champ sont rattachées à son cluster.
+    """
+    detailed = viewport.zoom >= LOD_MIN_ZOOM
+    nodes = []
+    if detailed:
+        # The (owner, x, y) index of NoteLayout selects the visible notes
+        in_view = (
+            NoteLayout.objects.filter(viewport.q(), owner=user)
+            .order_by('-pagerank')
+            .values('note_id')[:VIEWPORT_MAX_NODES]
+        )
+        rows = list(
+            node_queryset(user)
+            .filter(id__in=in_view)
+            .order_by('-layout__pagerank')
+            .values(*NODE_FIELDS)
+        )
+        nodes = [node_payload(row) for row in rows]
+    ids = [row['id'] for row in rows] if detailed else []
+    visible = {node['id'] for node in nodes}
+
+    # Super-nodes: what is outside the viewport (everything when zoomed out)
+    outside = NoteLayout.objects.filter(owner=user).exclude(note_id__in=ids)
+    clusters = list(
+        outside.values('cluster')
+        .annotate(size=Count('note_id'), x=Avg('x'), y=Avg('y'), weight=Sum('pagerank'))
+        .order_by('-size', 'cluster')[:VIEWPORT_MAX_CLUSTERS]
+    )
+    super_nodes = {row['cluster']: cluster_id(row['cluster']) for row in clusters}
+
+    edges = {}
+    links = Link.objects.filter(src__owner=user, dst__owner=user)
+    if ids:
+        touching = links.filter(Q(src_id__in=ids) | Q(dst_id__in=ids)).values_list(
+            'src_id', 'dst_id', 'src__layout__cluster', 'dst__layout__cluster')[:VIEWPORT_MAX_EDGES]
+        for src_id, dst_id, src_cluster, dst_cluster in touching:
+            source = str(src_id) if str(src_id) in visible else super_nodes.get(src_cluster)
+            target = str(dst_id) if str(dst_id) in visible else super_nodes.get(dst_cluster)
+            if source and target and source != target:
+                edges[(source, target)] = edges.get((source, target), 0) + 1
+    if not detailed and super_nodes:
+        between = (
+            links.filter(src__layout__cluster__in=super_nodes, dst__layout__cluster__in=super_nodes)
+            .exclude(src__layout__cluster=F('dst__layout__cluster'))
+            .values('src__layout__cluster', 'dst__layout__cluster')
+            .annotate(total=Count('id'))
+            .order_by('-total')[:VIEWPORT_MAX_EDGES]
+        )
+        for row in between:
+            edges[(super_nodes[row['src__layout__cluster']], super_nodes[row['dst__layout__cluster']])] = row['total']
+
+    for row in clusters:
+        nodes.append({
+            'id': super_nodes[row['cluster']],
+            'cluster': row['cluster'],
+            'title': f"{row['size']} notes",
+            'size': row['size'],
+            'x': row['x'],
+            'y': row['y'],
+            'pagerank': row['weight'],
+            'super': True,
+        })
+
+    return {
+        'mode': 'lod',
+        'nodes': nodes,
+        'edges': [{'source': s, 'target': t, 'strength': 1.0, 'count': n} for (s, t), n in edges.items()],
+        'stats': {
+            'total_notes': layout.node_count,
+            'total_links': layout.edge_count,
+            'components': layout.component_count,
+            'clusters': layout.cluster_count,
+            'visible_notes': len(visible),
+        },
+    }
@@ -0,0 +1,182 @@
+"""
+Export PDF du journal complet, en tâche de fond et par morceaux.
+
+La vue export_journal_pdf crée un JournalExport et une AITask
+'export_journal_pdf' ; le worker `run_ai_worker` la traite :
+- les entrées sont lues par .iterator() (tags et humeurs préchargés par
+  lot) et rendues par groupes de JOURNAL_EXPORT_CHUNK_SIZE, chacun dans
+  son propre PDF temporaire : le HTML et la mise en page xhtml2pdf, qui
+  dominent la mémoire, ne portent jamais que sur un groupe ;
+- chaque PDF intermédiaire est aussitôt ajouté au fichier final par
+  pdf_merge.PdfStreamWriter puis supprimé : la fusion ne garde pas non
+  plus le document entier en mémoire ; le fichier est ensuite copié par
+  blocs vers le stockage.
+Le téléchargement est ensuite servi en streaming (Range) depuis le stockage.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from ..models import EntreeJournal, JournalExport
+from .journal_listing import with_relations
+from .task_queue import enqueue, register_handler
+
+logger = logging.getLogger(__name__)
+
+# Part de la progression consacrée au rendu des morceaux (le reste : fusion)
+RENDER_PROGRESS = 90
+
+
+def chunk_size():
+    return max(1, getattr(settings, 'JOURNAL_EXPORT_CHUNK_SIZE', 50))
+
+
+def _set_progress(export, progress, status=None):
+    """Écrit la progression sans toucher aux autres colonnes"""
+    export.progress = progress
+    fields = {'progress': progress}
+    if status:
+        export.status = status
+        fields['status'] = status
+    JournalExport.objects.filter(pk=export.pk).update(**fields)
+
+
+def start_journal_export(user):
+    """
+    Crée le JournalExport (status 'pending') et planifie sa génération.
+    Returns: (export, task)
+    """
+    with transaction.atomic():
+        export = JournalExport.objects.create(utilisateur=user, status='pending')
+        task = enqueue(
+            'export_journal_pdf',
+            owner=user,
+            payload={'export_id': export.id},
+            max_attempts=getattr(settings, 'PDF_EXPORT_MAX_ATTEMPTS', 2),
+        )
+    return export, task
+
+
+def iter_chunks(entrees, size):
+    """Listes d'au plus `size` entrées, lues par .iterator() (une liste vide si aucune)"""
+    chunk = []
+    empty = True
+    for entree in entrees.iterator(chunk_size=size):
+        chunk.append(entree)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+            empty = False
+    if chunk or empty:
+        yield chunk
+
+
+def with_last(iterable):
+    """(élément, est_le_dernier), en lisant un élément d'avance"""
+    iterator = iter(iterable)
+    try:
+        current = next(iterator)
+    except StopIteration:
+        return
+    for following in iterator:
+        yield current, False
+        current = following
+    yield current, True
+
+
+def render_chunk(path, context):
+    """Rend un morceau du journal dans le fichier PDF `path`"""
+    from xhtml2pdf import pisa
+
+    html_content = render_to_string('core/journal/pdf_template.html', context)
+    with open(path, 'wb') as pdf_file:
+        pisa_status = pisa.CreatePDF(html_content, dest=pdf_file)
+    if pisa_status.err:
+        raise RuntimeError('PDF generation failed')
+
+
+def build_journal_export(export):
+    """
+    Génère le PDF du journal et le range dans export.fichier_pdf.
+    Lève une exception en cas d'échec (le statut est géré par l'appelant).
+    """
+    from .pdf_merge import PdfStreamWriter
+
+    _set_progress(export, 0, status='processing')
+    user = export.utilisateur
+    entrees = EntreeJournal.objects.filter(utilisateur=user).order_by('-date_creation')
+    totaux = entrees.aggregate(total_entrees=Count('id'), total_mots=Sum('word_count'))
+    total = totaux['total_entrees']
+    size = chunk_size()
+
+    context = {
+        'user': user,
+        'date_export': timezone.now(),
+        'total_entrees': total,
+        'total_mots': totaux['total_mots'] or 0,
+    }
+
+    workdir = tempfile.mkdtemp(prefix='journal_export_')
+    try:
+        done = 0
+        merged = os.path.join(workdir, 'journal.pdf')
+        with open(merged, 'wb') as merged_file:
+            writer = PdfStreamWriter(merged_file)
+            # The footer goes with the chunk that exhausts the entries (rows
+            # may be deleted during the export, `total` is only an estimate);
+            # an empty journal still gets its header page
+            chunks = with_last(iter_chunks(with_relations(entrees), size))
+            for index, (chunk, last) in enumerate(chunks):
+                done += len(chunk)
+                path = os.path.join(workdir, f'chunk_{index:05d}.pdf')
+                render_chunk(path, {
+                    **context,
+                    'entrees': chunk,
+                    'first_chunk': index == 0,
+                    'last_chunk': last,
+                })
+                del chunk
+                writer.append(path)
+                os.remove(path)
+                _set_progress(export, min(done * RENDER_PROGRESS // (total or 1), RENDER_PROGRESS))
+            nombre_pages = writer.close()
+
+        filename = f"journal_export_{export.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        with open(merged, 'rb') as pdf_file:
+            export.fichier_pdf.save(filename, File(pdf_file), save=False)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    export.nombre_entrees = done
+    export.nombre_pages = nombre_pages
+    export.status = 'ready'
+    export.progress = 100
+    export.message_erreur = ''
+    export.save(update_fields=['fichier_pdf', 'nombre_entrees', 'nombre_pages', 'status', 'progress', 'message_erreur'])
+    return export
+
+
+@register_handler('export_journal_pdf')
+def _export_journal_pdf(task):
+    export = JournalExport.objects.select_related('utilisateur').get(pk=task.payload['export_id'])
+    try:
+        build_journal_export(export)
+    except Exception as e:
+        final = task.attempts >= task.max_attempts
+        # Retried by the queue: back to pending until the last attempt
+        JournalExport.objects.filter(pk=export.pk).update(
+            status='error' if final else 'pending',
+            progress=0,
+            message_erreur=str(e)[:500],
+        )
+        raise
+    return {'export_id': export.id, 'nombre_pages': export.nombre_pages}
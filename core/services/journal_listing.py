@@ -0,0 +1,66 @@
+"""
+Requêtes de liste des entrées du journal.
+
+- Les tags et humeurs des entrées sont préchargés par des Prefetch (une
+  requête chacun par page, tag/humeur inclus par select_related), que
+  tags_list / humeurs_list lisent sans nouvelle requête.
+- Les filtres par tag et par humeur sont des sous-requêtes EXISTS : pas de
+  jointure, donc pas de lignes en double ni de DISTINCT, et le COUNT du
+  paginateur reste simple.
+Une page coûte ainsi un nombre constant de requêtes.
+"""
+
+from django.db.models import Exists, OuterRef, Prefetch, Q
+
+from ..models import EntreeHumeur, EntreeJournal, EntreeTag
+
+
+def with_relations(entrees):
+    """Précharge les tags et humeurs des entrées"""
+    return entrees.prefetch_related(
+        Prefetch('entree_tags', queryset=EntreeTag.objects.select_related('tag')),
+        Prefetch('entree_humeurs', queryset=EntreeHumeur.objects.select_related('humeur')),
+    )
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def has_tag(tag_id):
+    return Exists(EntreeTag.objects.filter(entree_journal=OuterRef('pk'), tag_id=tag_id))
+
+
+def has_humeur(humeur_id):
+    return Exists(EntreeHumeur.objects.filter(entree_journal=OuterRef('pk'), humeur_id=humeur_id))
+
+
+def filter_entries(user, tag=None, humeur=None, favorites=False, query=None):
+    """
+    Entrées de l'utilisateur, les plus récentes d'abord, filtrées.
+    Les identifiants invalides de tag/humeur sont ignorés.
+    """
+    entrees = EntreeJournal.objects.filter(utilisateur=user)
+
+    tag_id = _as_id(tag)
+    if tag_id is not None:
+        entrees = entrees.filter(has_tag(tag_id))
+
+    humeur_id = _as_id(humeur)
+    if humeur_id is not None:
+        entrees = entrees.filter(has_humeur(humeur_id))
+
+    if favorites:
+        entrees = entrees.filter(is_favorite=True)
+
+    if query:
+        entrees = entrees.filter(
+            Q(titre__icontains=query) |
+            Q(contenu_texte__icontains=query) |
+            Q(lieu__icontains=query)
+        )
+
+    return with_relations(entrees.order_by('-date_creation'))
@@ -0,0 +1,193 @@
+"""
+Statistiques pré-calculées du journal, par utilisateur.
+
+Chaque entrée « contribue » à JournalStatistics : nombre d'entrées, de
+mots, de favoris et compteur du jour ; chaque humeur associée (EntreeHumeur)
+contribue au décompte par humeur et au compteur positif/négatif du jour.
+Les signaux retirent l'ancienne contribution et ajoutent la nouvelle, sans
+relire le reste du journal.
+
+Séries d'écriture : on garde la date de la dernière entrée et la longueur
+de la série qui s'y termine. Un nouveau jour met à jour la série en O(1) ;
+seule la disparition d'un jour (suppression de sa dernière entrée) ou une
+entrée antidatée la recalcule, à partir de day_counts et sans requête.
+
+Les mises à jour en masse (QuerySet.update) ne déclenchent pas les
+signaux : appeler rebuild_stats() ensuite.
+"""
+
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ..models import EntreeHumeur, EntreeJournal, JournalStatistics
+
+POSITIVE_MOODS = ('Joyeux', 'Excité', 'Calme', 'Reconnaissant', 'Inspiré')
+NEGATIVE_MOODS = ('Triste', 'Anxieux', 'En colère', 'Frustré', 'Fatigué')
+
+ENTRY_FIELDS = ('date_creation', 'word_count', 'is_favorite')
+TIMELINE_DAYS = 30
+
+
+def _day(value):
+    """datetime -> ISO date in the current time zone (like the __date lookup)"""
+    return timezone.localdate(value).isoformat()
+
+
+def entry_contribution(values):
+    """dict de champs d'EntreeJournal (ou instance) -> contribution normalisée"""
+    get = values.get if isinstance(values, dict) else lambda name: getattr(values, name)
+    return {
+        'kind': 'entry',
+        'date': _day(get('date_creation')),
+        'words': get('word_count'),
+        'favorite': bool(get('is_favorite')),
+    }
+
+
+def mood_contribution(humeur_id, humeur_nom, date_creation):
+    if humeur_nom in POSITIVE_MOODS:
+        polarity = 0
+    elif humeur_nom in NEGATIVE_MOODS:
+        polarity = 1
+    else:
+        polarity = None
+    return {'kind': 'mood', 'date': _day(date_creation), 'humeur': str(humeur_id), 'polarity': polarity}
+
+
+def mood_owner_contribution(entree_humeur):
+    """EntreeHumeur -> (user id, contribution)"""
+    entree = entree_humeur.entree_journal
+    return entree.utilisateur_id, mood_contribution(entree_humeur.humeur_id, entree_humeur.humeur.nom, entree.date_creation)
+
+
+def _bump(counts, key, delta):
+    value = counts.get(key, 0) + delta
+    if value > 0:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+    return value
+
+
+def recompute_streaks(stats):
+    """Séries à partir des jours connus (en mémoire, aucune requête)"""
+    stats.last_entry_date = None
+    stats.current_streak = stats.longest_streak = 0
+    for day in sorted(date.fromisoformat(d) for d in stats.day_counts):
+        _day_added(stats, day)
+
+
+def _day_added(stats, day):
+    last = stats.last_entry_date
+    if last is not None and day <= last:
+        # Backdated entry: it can join or bridge older runs
+        recompute_streaks(stats)
+        return
+    stats.current_streak = stats.current_streak + 1 if last == day - timedelta(days=1) else 1
+    stats.last_entry_date = day
+    stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+
+
+def _apply_entry(stats, contrib, sign):
+    stats.total_entries += sign
+    stats.total_words += sign * contrib['words']
+    stats.favorites += sign if contrib['favorite'] else 0
+    remaining = _bump(stats.day_counts, contrib['date'], sign)
+    if sign > 0 and remaining == 1:
+        _day_added(stats, date.fromisoformat(contrib['date']))
+    elif sign < 0 and remaining <= 0:
+        recompute_streaks(stats)
+
+
+def _apply_mood(stats, contrib, sign):
+    _bump(stats.mood_counts, contrib['humeur'], sign)
+    if contrib['polarity'] is None:
+        return
+    day = stats.mood_day_counts.setdefault(contrib['date'], [0, 0])
+    day[contrib['polarity']] = max(day[contrib['polarity']] + sign, 0)
+    if not any(day):
+        stats.mood_day_counts.pop(contrib['date'])
+
+
+def _apply(stats, contrib, sign):
+    if contrib['kind'] == 'entry':
+        _apply_entry(stats, contrib, sign)
+    else:
+        _apply_mood(stats, contrib, sign)
+
+
+def rebuild_stats(user):
+    """Recalcule entièrement les statistiques d'un utilisateur (deux requêtes de lecture)"""
+    stats = JournalStatistics(utilisateur=user)
+    for row in EntreeJournal.objects.filter(utilisateur=user).order_by('date_creation').values(*ENTRY_FIELDS):
+        _apply(stats, entry_contribution(row), +1)
+    moods = EntreeHumeur.objects.filter(entree_journal__utilisateur=user).values_list(
+        'humeur_id', 'humeur__nom', 'entree_journal__date_creation')
+    for humeur_id, nom, date_creation in moods:
+        _apply(stats, mood_contribution(humeur_id, nom, date_creation), +1)
+
+    try:
+        with transaction.atomic():
+            existing = JournalStatistics.objects.select_for_update().filter(utilisateur=user).first()
+            if existing:
+                stats.pk = existing.pk
+            stats.save()
+    except IntegrityError:
+        # Built concurrently by another request
+        return JournalStatistics.objects.get(utilisateur=user)
+    return stats
+
+
+def get_stats(user):
+    """Statistiques de l'utilisateur, construites au premier accès"""
+    stats = JournalStatistics.objects.filter(utilisateur=user).first()
+    if stats is None:
+        stats = rebuild_stats(user)
+    return stats
+
+
+def apply_change(user_id, old=None, new=None):
+    """
+    Retire la contribution `old` et ajoute `new` (l'une ou l'autre peut être
+    None). Sans statistiques existantes, on ne fait rien : elles seront
+    construites au prochain get_stats().
+    """
+    if old == new:
+        return
+    with transaction.atomic():
+        stats = JournalStatistics.objects.select_for_update().filter(utilisateur_id=user_id).first()
+        if stats is None:
+            return
+        # Add before removing: an edit never empties its day, so streaks stay O(1)
+        if new:
+            _apply(stats, new, +1)
+        if old:
+            _apply(stats, old, -1)
+        stats.save()
+
+
+def current_streak(stats, today=None):
+    """La série en cours ne compte que si l'on a écrit aujourd'hui ou hier"""
+    today = today or timezone.localdate()
+    if stats.last_entry_date in (today, today - timedelta(days=1)):
+        return stats.current_streak
+    return 0
+
+
+def timeline(stats, today=None, days=TIMELINE_DAYS):
+    """Entrées et humeurs positives/négatives des `days` derniers jours"""
+    today = today or timezone.localdate()
+    data = []
+    for offset in range(days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        key = day.isoformat()
+        positive, negative = stats.mood_day_counts.get(key, (0, 0))
+        data.append({
+            'date': day.strftime('%d/%m'),
+            'positive': positive,
+            'negative': negative,
+            'entries': stats.day_counts.get(key, 0),
+        })
+    return data
@@ -0,0 +1,368 @@
+"""
+Cache des réponses LLM partagé par les services IA.
+
+Clé = sha256(provider, model, hash du prompt, temperature [, extra]).
+Backends : 'locmem' (LRU en mémoire du process), 'file' (un fichier JSON
+par entrée), 'db' (modèle LLMResponseCache), 'dummy' (désactivé).
+Configuration via settings.LLM_CACHE :
+
+    LLM_CACHE = {
+        'BACKEND': 'locmem',
+        'TTL': 86400,          # secondes, None = pas d'expiration
+        'MAX_ENTRIES': 1000,   # au-delà, éviction LRU
+        'MAX_TEMPERATURE': 0.3,
+        'LOCATION': '/var/cache/andromeda/llm',  # backend 'file' uniquement
+    }
+
+Seuls les appels (quasi) déterministes sont mis en cache : au-dessus de
+MAX_TEMPERATURE (messages de capsule, humeur, musique...), une réponse
+différente à chaque appel est voulue et le cache est contourné.
+Seules les valeurs sérialisables en JSON sont mises en cache, et jamais
+None (échec d'appel) : une erreur provider est donc retentée au prochain appel.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+DEFAULT_MAX_TEMPERATURE = 0.3
+# Hors de l'arborescence du projet (jamais servi ni commité)
+DEFAULT_LOCATION = os.path.join(tempfile.gettempdir(), 'andromeda-llm-cache')
+
+
+def _hash(value):
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def make_key(provider, model, prompt, temperature, extra=None):
+    """
+    prompt peut être une chaîne ou une liste de messages chat.
+    extra : autres paramètres influençant la réponse (max_tokens, ...).
+    """
+    return _hash({
+        'provider': provider,
+        'model': model,
+        'prompt': _hash(prompt),
+        'temperature': temperature,
+        'extra': extra or {},
+    })
+
+
+class LocMemBackend:
+    """
+    LRU en mémoire, propre au process.
+    Les valeurs sont stockées sérialisées : l'appelant reçoit toujours une
+    copie et ne peut pas modifier l'entrée en cache.
+    """
+
+    def __init__(self, max_entries=1000, **kwargs):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return json.loads(value)
+
+    def set(self, key, value, ttl, provider='', model=''):
+        expires_at = time.time() + ttl if ttl else None
+        value = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def count(self):
+        return len(self._data)
+
+
+class FileBackend:
+    """
+    Un fichier JSON par entrée, partagé entre process.
+    Le mtime sert d'horodatage LRU (mis à jour à chaque lecture).
+    """
+
+    def __init__(self, location=None, max_entries=1000, **kwargs):
+        self.location = str(location or DEFAULT_LOCATION)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.location, key[:2], f'{key}.json')
+
+    def _files(self):
+        for root, _, files in os.walk(self.location):
+            for name in files:
+                if name.endswith('.json'):
+                    yield os.path.join(root, name)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return _MISSING
+        expires_at = entry.get('expires_at')
+        if expires_at is not None and expires_at < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return _MISSING
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get('value')
+
+    def set(self, key, value, ttl, provider='', model=''):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'provider': provider,
+            'model': model,
+            'expires_at': time.time() + ttl if ttl else None,
+            'value': value,
+        }
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._cull()
+
+    def _cull(self):
+        with self._lock:
+            files = list(self._files())
+            overflow = len(files) - self.max_entries
+            if overflow <= 0:
+                return
+            files.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+            for path in files[:overflow]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        for path in list(self._files()):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def count(self):
+        return sum(1 for _ in self._files())
+
+
+class DatabaseBackend:
+    """Table core_llmresponsecache, partagée entre process et serveurs"""
+
+    CULL_EVERY = 50
+
+    def __init__(self, max_entries=1000, **kwargs):
+        self.max_entries = max_entries
+        self._sets = 0
+
+    @property
+    def model(self):
+        from ..models import LLMResponseCache
+        return LLMResponseCache
+
+    def get(self, key):
+        from django.db.models import F
+        from django.utils import timezone
+
+        entry = self.model.objects.filter(key=key).values('value', 'expires_at').first()
+        if entry is None:
+            return _MISSING
+        now = timezone.now()
+        if entry['expires_at'] is not None and entry['expires_at'] < now:
+            self.model.objects.filter(key=key).delete()
+            return _MISSING
+        self.model.objects.filter(key=key).update(hits=F('hits') + 1, last_used_at=now)
+        return entry['value']
+
+    def set(self, key, value, ttl, provider='', model=''):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        now = timezone.now()
+        self.model.objects.update_or_create(key=key, defaults={
+            'provider': provider,
+            'model': model or '',
+            'value': value,
+            'last_used_at': now,
+            'expires_at': now + timedelta(seconds=ttl) if ttl else None,
+        })
+        self._sets += 1
+        if self._sets % self.CULL_EVERY == 0:
+            self._cull()
+
+    def _cull(self):
+        keep = self.model.objects.order_by('-last_used_at').values_list('key', flat=True)[self.max_entries:]
+        stale = list(keep)
+        if stale:
+            self.model.objects.filter(key__in=stale).delete()
+
+    def clear(self):
+        self.model.objects.all().delete()
+
+    def count(self):
+        return self.model.objects.count()
+
+
+class DummyBackend:
+    def __init__(self, **kwargs):
+        pass
+
+    def get(self, key):
+        return _MISSING
+
+    def set(self, key, value, ttl, provider='', model=''):
+        pass
+
+    def clear(self):
+        pass
+
+    def count(self):
+        return 0
+
+
+BACKENDS = {
+    'locmem': LocMemBackend,
+    'file': FileBackend,
+    'db': DatabaseBackend,
+    'dummy': DummyBackend,
+}
+
+
+class LLMCache:
+    """Façade : calcul de clé, TTL et compteurs hits/misses par provider"""
+
+    def __init__(self, backend, ttl=86400, max_temperature=DEFAULT_MAX_TEMPERATURE):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _count(self, provider, name):
+        with self._lock:
+            counters = self._stats.setdefault(provider, {'hits': 0, 'misses': 0, 'errors': 0, 'bypassed': 0})
+            counters[name] += 1
+
+    def get_or_call(self, provider, model, prompt, temperature, func, extra=None, ttl=None):
+        """
+        Retourne la réponse en cache ou appelle func() et stocke son résultat.
+        Les exceptions de func() sont propagées et rien n'est mis en cache.
+        Au-dessus de max_temperature, func() est toujours appelée.
+        """
+        if temperature is not None and temperature > self.max_temperature:
+            self._count(provider, 'bypassed')
+            return func()
+
+        key = make_key(provider, model, prompt, temperature, extra)
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache read error ({provider}): {e}")
+            self._count(provider, 'errors')
+            value = _MISSING
+
+        if value is not _MISSING:
+            self._count(provider, 'hits')
+            return value
+
+        self._count(provider, 'misses')
+        value = func()
+        if value is not None:
+            try:
+                self.backend.set(key, value, self.ttl if ttl is None else ttl, provider=provider, model=model)
+            except Exception as e:
+                logger.warning(f"LLM cache write error ({provider}): {e}")
+                self._count(provider, 'errors')
+        return value
+
+    def stats(self):
+        """Compteurs du process courant, par provider et au total"""
+        with self._lock:
+            per_provider = {p: dict(c) for p, c in self._stats.items()}
+        hits = sum(c['hits'] for c in per_provider.values())
+        misses = sum(c['misses'] for c in per_provider.values())
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0,
+            'providers': per_provider,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def clear(self):
+        self.backend.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def build_cache(config=None):
+    config = dict(getattr(settings, 'LLM_CACHE', {}) if config is None else config)
+    name = config.get('BACKEND', 'locmem')
+    if not config.get('ENABLED', True):
+        name = 'dummy'
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown LLM cache backend '{name}'")
+    backend = backend_class(
+        max_entries=config.get('MAX_ENTRIES', 1000),
+        location=config.get('LOCATION'),
+    )
+    return LLMCache(backend, ttl=config.get('TTL', 86400),
+                    max_temperature=config.get('MAX_TEMPERATURE', DEFAULT_MAX_TEMPERATURE))
+
+
+def get_llm_cache():
+    """Instance partagée, construite depuis settings.LLM_CACHE"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = build_cache()
+    return _cache
+
+
+def reset_llm_cache():
+    """Force la reconstruction (tests, changement de settings)"""
+    global _cache
+    with _cache_lock:
+        _cache = None
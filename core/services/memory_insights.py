@@ -0,0 +1,263 @@
+"""
+Insights pré-calculés des souvenirs, par utilisateur.
+
+Chaque souvenir « contribue » à MemoryInsightsSnapshot : compteurs
+(total, favoris, analysés, médias) et distributions (émotion, thème,
+année, date). Les signaux de Souvenir retirent l'ancienne contribution et
+ajoutent la nouvelle, sans relire les autres souvenirs. Le tableau de bord
+lit ensuite une seule ligne au lieu de charger tous les souvenirs.
+
+L'instantané ne garde que des compteurs : les souvenirs d'une suggestion
+d'album sont lus par une requête indexée (get_suggestion_ids, ou
+attach_suggestion_ids pour toutes les suggestions du tableau de bord).
+
+Les mises à jour en masse (QuerySet.update) ne déclenchent pas les
+signaux : appeler rebuild_snapshot() ensuite.
+"""
+
+import operator
+from collections import Counter
+from datetime import date
+from functools import reduce
+
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q, Value
+from django.utils import timezone
+
+from ..models import MemoryInsightsSnapshot, Souvenir
+
+CONTRIBUTION_FIELDS = ('emotion', 'theme', 'date_evenement', 'is_favorite', 'ai_analyzed', 'photo', 'video')
+
+
+def contribution(values):
+    """dict de champs de Souvenir (ou instance) -> contribution normalisée"""
+    get = values.get if isinstance(values, dict) else lambda name: getattr(values, name)
+    event_date = get('date_evenement')
+    return {
+        'emotion': get('emotion'),
+        'theme': get('theme'),
+        'date': event_date.isoformat() if event_date else None,
+        'year': str(event_date.year) if event_date else None,
+        'favorite': bool(get('is_favorite')),
+        'analyzed': bool(get('ai_analyzed')),
+        'media': bool(get('photo')) or bool(get('video')),
+    }
+
+
+def _bump(counts, key, delta):
+    if key is None:
+        return
+    value = counts.get(key, 0) + delta
+    if value > 0:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+def _apply(snapshot, contrib, sign):
+    snapshot.total += sign
+    snapshot.favorites += sign if contrib['favorite'] else 0
+    snapshot.analyzed += sign if contrib['analyzed'] else 0
+    snapshot.with_media += sign if contrib['media'] else 0
+    _bump(snapshot.emotion_counts, contrib['emotion'], sign)
+    _bump(snapshot.theme_counts, contrib['theme'], sign)
+    _bump(snapshot.year_counts, contrib['year'], sign)
+    _bump(snapshot.date_counts, contrib['date'], sign)
+
+
+def rebuild_snapshot(user):
+    """Recalcule entièrement l'instantané d'un utilisateur (une requête de lecture)"""
+    rows = Souvenir.objects.filter(utilisateur=user).order_by('-date_evenement').values(*CONTRIBUTION_FIELDS)
+
+    snapshot = MemoryInsightsSnapshot(utilisateur=user)
+    for row in rows:
+        _apply(snapshot, contribution(row), +1)
+
+    try:
+        with transaction.atomic():
+            existing = MemoryInsightsSnapshot.objects.select_for_update().filter(utilisateur=user).first()
+            if existing:
+                snapshot.pk = existing.pk
+                snapshot.version = existing.version + 1
+            snapshot.save()
+    except IntegrityError:
+        # Built concurrently by another request
+        return MemoryInsightsSnapshot.objects.get(utilisateur=user)
+    return snapshot
+
+
+def get_snapshot(user):
+    """Instantané de l'utilisateur, construit au premier accès"""
+    snapshot = MemoryInsightsSnapshot.objects.filter(utilisateur=user).first()
+    if snapshot is None:
+        snapshot = rebuild_snapshot(user)
+    return snapshot
+
+
+def apply_change(user_id, old=None, new=None):
+    """
+    Retire la contribution `old` et ajoute `new` (l'une ou l'autre peut être
+    None pour une création ou une suppression). Sans instantané existant,
+    on ne fait rien : il sera construit au prochain get_snapshot().
+    """
+    with transaction.atomic():
+        snapshot = MemoryInsightsSnapshot.objects.select_for_update().filter(utilisateur_id=user_id).first()
+        if snapshot is None:
+            return
+        if old != new:
+            if old:
+                _apply(snapshot, old, -1)
+            if new:
+                _apply(snapshot, new, +1)
+        # The version also tracks changes that do not move any counter (title, ...)
+        snapshot.version += 1
+        snapshot.save()
+
+
+def get_insights(snapshot):
+    """Même format que AIRecommendationService.get_memory_insights"""
+    if not snapshot.total:
+        return None
+
+    emotion_counts = Counter(snapshot.emotion_counts)
+    theme_counts = Counter({t: n for t, n in snapshot.theme_counts.items() if t != 'other'})
+    dates = sorted(snapshot.date_counts)
+    oldest = date.fromisoformat(dates[0]) if dates else None
+    newest = date.fromisoformat(dates[-1]) if dates else None
+
+    return {
+        'total_memories': snapshot.total,
+        'dominant_emotion': emotion_counts.most_common(1)[0][0] if emotion_counts else 'neutral',
+        'emotion_distribution': dict(emotion_counts),
+        'most_common_themes': dict(theme_counts.most_common(3)),
+        'time_span': {
+            'oldest': oldest,
+            'newest': newest,
+            'span_days': (newest - oldest).days if oldest and newest else 0
+        },
+        'favorites_count': snapshot.favorites,
+        'analyzed_count': snapshot.analyzed,
+        'with_media': snapshot.with_media,
+    }
+
+
+def get_album_suggestions(snapshot):
+    """Même format que AIAnalysisService.generate_album_suggestions"""
+    suggestions = []
+
+    # By theme
+    theme_counts = Counter({t: n for t, n in snapshot.theme_counts.items() if t != 'other'})
+    for theme, count in theme_counts.most_common(3):
+        if count >= 2:
+            suggestions.append({
+                'type': 'theme',
+                'title': f"My {theme.replace('_', ' ').title()} Moments",
+                'theme': theme,
+                'count': count
+            })
+
+    # By year
+    current_year = timezone.now().year
+    year_counts = Counter({int(y): n for y, n in snapshot.year_counts.items()})
+    for year, count in year_counts.most_common(2):
+        if count >= 3:
+            suggestions.append({
+                'type': 'year',
+                'title': f"Memories from {year}",
+                'year': year,
+                'count': count
+            })
+
+    # Favorites
+    if snapshot.favorites >= 2:
+        suggestions.append({
+            'type': 'favorite',
+            'title': "My Favorite Memories",
+            'count': snapshot.favorites
+        })
+
+    # Recent memories
+    recent_count = year_counts.get(current_year, 0)
+    if recent_count >= 1 and not any(s['type'] == 'year' and s['year'] == current_year for s in suggestions):
+        suggestions.append({
+            'type': 'recent',
+            'title': f"This Year's Memories ({current_year})",
+            'year': current_year,
+            'count': recent_count
+        })
+
+    # AI analyzed memories
+    if snapshot.analyzed >= 2:
+        suggestions.append({
+            'type': 'ai_analyzed',
+            'title': "AI-Enriched Memories",
+            'count': snapshot.analyzed
+        })
+
+    # Default suggestion
+    if not suggestions and snapshot.total:
+        suggestions.append({
+            'type': 'all',
+            'title': f"All My Memories ({snapshot.total} total)",
+            'count': snapshot.total
+        })
+
+    return suggestions[:4]
+
+
+def _suggestion_filter(suggestion_type, theme=None, year=None):
+    """Q des souvenirs d'une suggestion (None : type inconnu ou incomplet)"""
+    if suggestion_type == 'theme' and theme:
+        return Q(theme=theme)
+    if suggestion_type == 'year' and year:
+        return Q(date_evenement__year=year)
+    if suggestion_type == 'favorite':
+        return Q(is_favorite=True)
+    if suggestion_type == 'recent':
+        return Q(date_evenement__year=timezone.now().year)
+    if suggestion_type == 'ai_analyzed':
+        return Q(ai_analyzed=True)
+    if suggestion_type == 'all':
+        return Q()
+    return None
+
+
+def get_suggestion_ids(user, suggestion_type, theme=None, year=None):
+    """IDs des souvenirs d'une suggestion (requête sur les index utilisateur + colonne)"""
+    condition = _suggestion_filter(suggestion_type, theme, year)
+    if condition is None:
+        return []
+    souvenirs = Souvenir.objects.filter(condition, utilisateur=user)
+    return [str(pk) for pk in souvenirs.order_by('-date_evenement', '-id').values_list('id', flat=True)]
+
+
+def attach_suggestion_ids(user, suggestions):
+    """
+    Ajoute 'souvenir_ids' à chaque suggestion, avec une seule requête pour
+    toutes : les souvenirs d'au moins une suggestion, avec une colonne
+    booléenne par suggestion pour les répartir.
+    """
+    conditions = {}
+    for index, suggestion in enumerate(suggestions):
+        suggestion['souvenir_ids'] = []
+        condition = _suggestion_filter(suggestion['type'], suggestion.get('theme'), suggestion.get('year'))
+        if condition is not None:
+            conditions[f'in_{index}'] = condition
+    if not conditions:
+        return suggestions
+
+    columns = {
+        name: ExpressionWrapper(condition, output_field=BooleanField()) if condition else Value(True)
+        for name, condition in conditions.items()
+    }
+    rows = (
+        Souvenir.objects.filter(reduce(operator.or_, conditions.values()), utilisateur=user)
+        .order_by('-date_evenement', '-id')
+        .annotate(**columns)
+        .values_list('id', *columns)
+    )
+    for pk, *matches in rows:
+        for name, matched in zip(columns, matches):
+            if matched:
+                suggestions[int(name[3:])]['souvenir_ids'].append(str(pk))
+    return suggestions
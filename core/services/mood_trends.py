@@ -0,0 +1,72 @@
+"""
+Séries temporelles de l'humeur (MoodAnalysis).
+
+La positivité de chaque analyse est dénormalisée dans
+MoodAnalysis.positivity : une seule requête GROUP BY jour (Avg, Count)
+suffit pour une fenêtre de 7 à 365 jours, sans décoder les scores JSON.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db.models import Avg, Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..models import MoodAnalysis
+
+ALLOWED_WINDOWS = (7, 14, 30, 365)
+DEFAULT_WINDOW = 14
+
+
+def parse_window(value, default=DEFAULT_WINDOW):
+    """?days=... -> une des fenêtres autorisées, sinon default"""
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return default
+    return days if days in ALLOWED_WINDOWS else default
+
+
+def daily_positivity(user, days=DEFAULT_WINDOW, end=None):
+    """
+    Positivité moyenne par jour sur les `days` derniers jours (aujourd'hui inclus).
+
+    Returns: liste de `days` dicts {'day': date, 'positivity': float | None, 'count': int},
+    du plus ancien au plus récent ; positivity vaut None les jours sans analyse.
+    """
+    end = end or timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    tz = timezone.get_current_timezone()
+    # Aware bounds on the column itself (not created_at__date) so the
+    # (user, created_at) index serves the range
+    start_dt = timezone.make_aware(datetime.combine(start, time.min), tz)
+    end_dt = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+
+    rows = (
+        MoodAnalysis.objects
+        .filter(user=user, created_at__gte=start_dt, created_at__lt=end_dt)
+        .annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values('day')
+        .annotate(avg=Avg('positivity'), count=Count('id'))
+        .order_by()
+    )
+    by_day = {row['day']: row for row in rows}
+
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = by_day.get(day)
+        avg = row['avg'] if row else None
+        series.append({
+            'day': day,
+            'positivity': round(avg, 2) if avg is not None else None,
+            'count': row['count'] if row else 0,
+        })
+    return series
+
+
+def chart_points(series):
+    """Format du graphique de mood.html : libellé court du jour + positivité"""
+    label_format = '%a' if len(series) <= 14 else '%d/%m'
+    return [{'date': point['day'].strftime(label_format), 'positivity': point['positivity']}
+            for point in series]
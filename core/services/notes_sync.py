@@ -0,0 +1,71 @@
+"""
+Synchronisation entre les notes de l'app `notes` et les core.Note du
+graphe (Universe Graph), faite à l'écriture par les signaux de
+core.signals et non plus à chaque lecture du graphe.
+
+Les deux modèles sont appariés par (utilisateur, titre). Une modification
+venue du graphe donne une nouvelle version à la note de l'app notes
+(notes.autosave.supersede_draft), comme une sauvegarde de l'éditeur. Les drapeaux
+posés sur l'instance sauvegardée empêchent l'écho d'une synchronisation
+à l'autre (notes -> core -> notes ...).
+"""
+
+from ..models import Note
+
+try:
+    from notes.autosave import supersede_draft
+    from notes.models import Note as NotesAppNote
+except Exception:
+    NotesAppNote = None
+    supersede_draft = None
+
+# Instance flags
+FROM_NOTES_APP = '_synced_from_notes_app'
+FROM_CORE = '_synced_from_core'
+
+
+def sync_to_core(notes_app_note, previous_title=None):
+    """
+    Crée ou met à jour la core.Note d'une note de l'app notes.
+    previous_title : titre avant modification, pour suivre un renommage.
+    """
+    user = notes_app_note.user
+    body = notes_app_note.content or ''
+    core_note = None
+    if previous_title and previous_title != notes_app_note.title:
+        core_note = Note.objects.filter(owner=user, title=previous_title).first()
+    if core_note is None:
+        core_note = Note.objects.filter(owner=user, title=notes_app_note.title).first()
+
+    if core_note is None:
+        core_note = Note(owner=user, title=notes_app_note.title, body=body)
+    elif core_note.title == notes_app_note.title and core_note.body == body:
+        return core_note
+    else:
+        core_note.title = notes_app_note.title
+        core_note.body = body
+
+    setattr(core_note, FROM_NOTES_APP, True)
+    core_note.save()
+    return core_note
+
+
+def sync_to_notes_app(core_note):
+    """Crée ou met à jour la note de l'app notes correspondant à une core.Note"""
+    if NotesAppNote is None or core_note.owner_id is None:
+        return None
+
+    notes_app_note = NotesAppNote.objects.filter(user_id=core_note.owner_id, title=core_note.title).first()
+    body = core_note.body or ''
+    if notes_app_note is None:
+        notes_app_note = NotesAppNote(user_id=core_note.owner_id, title=core_note.title, content=body)
+    elif notes_app_note.content == body:
+        return notes_app_note
+    else:
+        notes_app_note.content = body
+        # New version: an autosave draft of the previous content can't overwrite it
+        supersede_draft(notes_app_note)
+
+    setattr(notes_app_note, FROM_CORE, True)
+    notes_app_note.save()
+    return notes_app_note
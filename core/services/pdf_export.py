@@ -0,0 +1,168 @@
+"""
+Génération des exports PDF de souvenirs (ExportPDF) en tâche de fond.
+
+La vue exporter_pdf crée l'ExportPDF et une AITask 'export_pdf' ; le
+worker `run_ai_worker` la traite par groupes de PDF_EXPORT_CHUNK_SIZE
+souvenirs, comme l'export du journal (journal_export) : photos du groupe
+réduites et intégrées en data URI, rendu xhtml2pdf dans un PDF
+temporaire, aussitôt ajouté au fichier final (pdf_merge). Seules les
+photos d'un groupe sont en mémoire à la fois. Le fichier est ensuite
+copié par blocs vers le stockage.
+ExportPDF.status / progress sont mis à jour au fil de l'eau pour la page
+qui interroge statut_export_pdf.
+"""
+
+import base64
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from ..models import ExportPDF
+from .journal_export import iter_chunks
+from .task_queue import enqueue, register_handler
+from .vision import prepare_image_bytes
+
+logger = logging.getLogger(__name__)
+
+# Part de la progression consacrée au rendu des morceaux (le reste : copie)
+RENDER_PROGRESS = 90
+
+
+def chunk_size():
+    return max(1, getattr(settings, 'PDF_EXPORT_CHUNK_SIZE', 20))
+
+
+def _set_progress(export, progress, status=None):
+    """Écrit la progression sans toucher aux autres colonnes"""
+    export.progress = progress
+    fields = {'progress': progress}
+    if status:
+        export.status = status
+        fields['status'] = status
+    ExportPDF.objects.filter(pk=export.pk).update(**fields)
+
+
+def image_data_uri(path, max_side=None):
+    """Photo réduite (settings.PDF_EXPORT_IMAGE_MAX_SIDE) encodée en data URI"""
+    max_side = max_side or getattr(settings, 'PDF_EXPORT_IMAGE_MAX_SIDE', 1200)
+    content = prepare_image_bytes(path, max_side=max_side)
+    if content[:3] == b'\xff\xd8\xff':
+        mime = 'image/jpeg'
+    else:
+        mime = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    return f"data:{mime};base64,{base64.b64encode(content).decode('ascii')}"
+
+
+def render_chunk(path, context):
+    """Rend un morceau de l'export dans le fichier PDF `path`"""
+    from xhtml2pdf import pisa
+
+    html_content = render_to_string('core/pdf_export_template.html', context)
+    with open(path, 'wb') as pdf_file:
+        pisa_status = pisa.CreatePDF(html_content, dest=pdf_file)
+    if pisa_status.err:
+        raise RuntimeError('PDF generation failed')
+
+
+def start_export(user, souvenirs, titre_export, inclure_photos=True, style_template='modern'):
+    """
+    Crée l'ExportPDF (status 'pending') et planifie sa génération.
+    Returns: (export, task)
+    """
+    with transaction.atomic():
+        export = ExportPDF.objects.create(
+            utilisateur=user,
+            titre_export=titre_export,
+            inclure_photos=inclure_photos,
+            style_template=style_template,
+            status='pending',
+        )
+        export.souvenirs.set(souvenirs)
+        task = enqueue(
+            'export_pdf',
+            owner=user,
+            payload={'export_id': export.id},
+            max_attempts=getattr(settings, 'PDF_EXPORT_MAX_ATTEMPTS', 2),
+        )
+    return export, task
+
+
+def build_export(export):
+    """
+    Génère le PDF de l'export et le range dans export.fichier_pdf.
+    Lève une exception en cas d'échec (le statut est géré par l'appelant).
+    """
+    from .pdf_merge import PdfStreamWriter
+
+    _set_progress(export, 0, status='processing')
+    souvenirs = export.souvenirs.select_related('analyse_ia').order_by('-date_evenement')
+    total = souvenirs.count()
+    size = chunk_size()
+    context = {
+        'export': export,
+        'user': export.utilisateur,
+        'generated_at': timezone.now(),
+        'total_souvenirs': total,
+    }
+
+    workdir = tempfile.mkdtemp(prefix='memories_export_')
+    try:
+        done = 0
+        merged = os.path.join(workdir, 'memories.pdf')
+        with open(merged, 'wb') as merged_file:
+            writer = PdfStreamWriter(merged_file)
+            for index, chunk in enumerate(iter_chunks(souvenirs, size)):
+                # Photos: downscaled for this chunk only, released once it is rendered
+                for souvenir in chunk:
+                    souvenir.pdf_image = None
+                    if export.inclure_photos and souvenir.photo:
+                        try:
+                            souvenir.pdf_image = image_data_uri(souvenir.photo.path)
+                        except Exception as e:
+                            logger.warning(f"PDF export {export.id}: photo skipped for {souvenir.id}: {e}")
+                done += len(chunk)
+                path = os.path.join(workdir, f'chunk_{index:05d}.pdf')
+                render_chunk(path, {**context, 'souvenirs': chunk, 'first_chunk': index == 0})
+                del chunk
+                writer.append(path)
+                os.remove(path)
+                _set_progress(export, min(done * RENDER_PROGRESS // (total or 1), RENDER_PROGRESS))
+            nombre_pages = writer.close()
+
+        filename = f"memories_export_{export.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        with open(merged, 'rb') as pdf_file:
+            export.fichier_pdf.save(filename, File(pdf_file), save=False)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    export.nombre_pages = nombre_pages
+    export.status = 'ready'
+    export.progress = 100
+    export.message_erreur = ''
+    export.save(update_fields=['fichier_pdf', 'nombre_pages', 'status', 'progress', 'message_erreur'])
+    return export
+
+
+@register_handler('export_pdf')
+def _export_pdf(task):
+    export = ExportPDF.objects.select_related('utilisateur').get(pk=task.payload['export_id'])
+    try:
+        build_export(export)
+    except Exception as e:
+        final = task.attempts >= task.max_attempts
+        # Retried by the queue: back to pending until the last attempt
+        ExportPDF.objects.filter(pk=export.pk).update(
+            status='error' if final else 'pending',
+            progress=0,
+            message_erreur=str(e)[:500],
+        )
+        raise
+    return {'export_id': export.id, 'nombre_pages': export.nombre_pages}
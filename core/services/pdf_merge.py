@@ -0,0 +1,147 @@
+"""
+Fusion de PDF au fil de l'eau, pour les exports rendus par morceaux.
+
+pypdf.PdfWriter garde en mémoire tous les objets de toutes les pages
+jusqu'au write() final : la fusion coûterait autant que le document entier.
+Ici, chaque morceau est lu à son tour et ses objets (pages, polices,
+images, contenus) sont écrits aussitôt dans le fichier de sortie, avec de
+nouveaux numéros ; seuls les offsets de la table xref et les numéros des
+pages restent en mémoire. Le lecteur d'un morceau est libéré avant le
+suivant.
+
+Limites : seules les pages sont copiées (pas de signets, formulaires ni
+destinations nommées du catalogue), ce qui suffit aux PDF de xhtml2pdf.
+Les objets partagés entre morceaux (polices) sont recopiés pour chacun.
+"""
+
+from pypdf import PdfReader
+from pypdf.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject, StreamObject,
+)
+
+PAGES_NUMBER = 1
+CATALOG_NUMBER = 2
+
+# Attributs qu'une page peut hériter de son arbre /Pages
+INHERITED_ATTRIBUTES = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+
+def _output_ref(number):
+    return IndirectObject(number, 0, None)
+
+
+class PdfStreamWriter:
+    """
+    writer = PdfStreamWriter(fichier)  # fichier binaire ouvert en écriture
+    writer.append(chemin) ...          # un PDF après l'autre
+    writer.close()                     # arbre des pages, xref, trailer
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.offsets = {}  # numéro d'objet -> position dans le fichier
+        self.pages = []  # numéros des pages, dans l'ordre
+        self.next_number = CATALOG_NUMBER + 1
+        stream.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _write_object(self, number, obj):
+        self.offsets[number] = self.stream.tell()
+        self.stream.write(f'{number} 0 obj\n'.encode('ascii'))
+        obj.write_to_stream(self.stream)
+        self.stream.write(b'\nendobj\n')
+
+    def append(self, path):
+        """Ajoute les pages du PDF `path`. Returns: nombre de pages ajoutées"""
+        reader = PdfReader(path)
+        numbers = {}  # (numéro, génération) dans le morceau -> numéro en sortie
+        pending = []
+        page_keys = set()
+
+        def ref(indirect):
+            key = (indirect.idnum, indirect.generation)
+            if key not in numbers:
+                numbers[key] = self.next_number
+                self.next_number += 1
+                pending.append(indirect)
+            return _output_ref(numbers[key])
+
+        def copy(obj):
+            if isinstance(obj, IndirectObject):
+                return ref(obj)
+            if isinstance(obj, DictionaryObject):
+                result = obj.__class__()
+                for key, value in obj.items():
+                    result[key] = copy(value)
+                if isinstance(obj, StreamObject):
+                    result._data = obj._data  # encoded as read, filters unchanged
+                return result
+            if isinstance(obj, ArrayObject):
+                return ArrayObject(copy(value) for value in obj)
+            return obj
+
+        added = 0
+        for page in reader.pages:
+            page_ref = page.indirect_reference
+            page_keys.add((page_ref.idnum, page_ref.generation))
+            self.pages.append(ref(page_ref).idnum)
+            added += 1
+
+        while pending:
+            indirect = pending.pop()
+            key = (indirect.idnum, indirect.generation)
+            obj = indirect.get_object()
+            if key in page_keys:
+                obj = self._detached_page(obj)
+            self._write_object(numbers[key], copy(obj))
+
+        del reader
+        return added
+
+    @staticmethod
+    def _detached_page(page):
+        """La page sans son /Parent (l'arbre du morceau), attributs hérités recopiés"""
+        detached = DictionaryObject()
+        for key, value in page.items():
+            if key != '/Parent':
+                detached[key] = value
+        for key in INHERITED_ATTRIBUTES:
+            node = page
+            while key not in node and '/Parent' in node:
+                node = node['/Parent'].get_object()
+            if key in node and key not in detached:
+                detached[NameObject(key)] = node[key]
+        detached[NameObject('/Parent')] = _output_ref(PAGES_NUMBER)
+        return detached
+
+    def close(self):
+        """Écrit l'arbre des pages, le catalogue, la table xref et le trailer"""
+        pages = DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(_output_ref(number) for number in self.pages),
+            NameObject('/Count'): NumberObject(len(self.pages)),
+        })
+        self._write_object(PAGES_NUMBER, pages)
+        catalog = DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): _output_ref(PAGES_NUMBER),
+        })
+        self._write_object(CATALOG_NUMBER, catalog)
+
+        xref = self.stream.tell()
+        size = self.next_number
+        self.stream.write(f'xref\n0 {size}\n0000000000 65535 f \n'.encode('ascii'))
+        for number in range(1, size):
+            self.stream.write(f'{self.offsets[number]:010d} 00000 n \n'.encode('ascii'))
+        self.stream.write(
+            f'trailer\n<< /Size {size} /Root {CATALOG_NUMBER} 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('ascii')
+        )
+        return len(self.pages)
+
+
+def merge_pdfs(paths, dest):
+    """Fusionne les PDF `paths` dans le fichier `dest`. Returns: nombre de pages"""
+    with open(dest, 'wb') as pdf_file:
+        writer = PdfStreamWriter(pdf_file)
+        for path in paths:
+            writer.append(path)
+        return writer.close()
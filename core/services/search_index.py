@@ -0,0 +1,245 @@
+"""
+Index de recherche unifié : entrées du journal, souvenirs, notes (app
+notes) et notes du graphe, interrogés par un seul endpoint classé.
+
+Chaque objet indexé a une ligne SearchDocument (titre, texte, date), mise à
+jour par les signaux de core.signals à l'enregistrement et à la
+suppression. Une note du graphe qui reflète une note de l'app notes (même
+utilisateur, même titre, cf. notes_sync) n'est pas indexée : la note n'est
+trouvée qu'une fois, sous le type 'note'.
+
+Le texte intégral est indexé par la base, avec le FullTextIndex de
+notes.search (comme les notes de l'app notes) :
+- SQLite : table FTS5 core_searchdocument_fts (contenu externe), classée
+  par BM25, titre surligné par highlight() et extrait par snippet() ;
+- PostgreSQL : colonne tsvector générée + index GIN, ts_rank_cd/ts_headline ;
+- sinon : filtre icontains, non classé.
+Sous SQLite, une migration qui reconstruit core_searchdocument supprime
+les triggers : elle doit rappeler create_index().
+
+Les mises à jour en masse (QuerySet.update, bulk_create) ne déclenchent pas
+les signaux : lancer la commande rebuild_search_index ensuite.
+"""
+
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.search import FullTextIndex
+
+from ..models import SearchDocument
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+TITLE_WEIGHT = 5.0
+BATCH_SIZE = 500
+
+# --- Sources ---
+
+class Source(NamedTuple):
+    kind: str
+    model: str  # app_label.ModelName
+    owner: str  # owner foreign key attname
+    fields: tuple
+    document: Callable  # get(field) -> (title, body, date), None to leave out of the index
+    url: Callable  # object id -> URL
+    queryset: Callable = None  # (rows, apps) -> the rows to index, all by default
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def _join(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def _journal_document(get):
+    return get('titre'), _join(get('contenu_texte'), get('lieu')), _as_date(get('date_creation'))
+
+
+def _memory_document(get):
+    tags = [tag for tag in (get('ai_tags') or []) if isinstance(tag, str)]
+    body = _join(get('description'), get('lieu'), get('personnes_presentes'), ' '.join(tags))
+    return get('titre'), body, get('date_evenement')
+
+
+def _note_document(get):
+    if get('is_deleted'):
+        return None
+    return get('title'), get('content'), _as_date(get('updated_at'))
+
+
+def _graph_note_document(get):
+    return get('title'), get('body'), _as_date(get('updated_at'))
+
+
+def _unmirrored_graph_notes(rows, apps=global_apps):
+    """core.Notes without a notes-app counterpart (those are indexed as 'note')"""
+    NotesAppNote = apps.get_model('notes', 'Note')
+    return rows.exclude(Exists(NotesAppNote.objects.filter(user_id=OuterRef('owner_id'), title=OuterRef('title'))))
+
+
+SOURCES = {
+    source.kind: source for source in (
+        Source('journal', 'core.EntreeJournal', 'utilisateur_id',
+               ('titre', 'contenu_texte', 'lieu', 'date_creation'), _journal_document,
+               lambda pk: reverse('core:detail_entree_journal', args=[pk])),
+        Source('memory', 'core.Souvenir', 'utilisateur_id',
+               ('titre', 'description', 'lieu', 'personnes_presentes', 'ai_tags', 'date_evenement'), _memory_document,
+               lambda pk: reverse('core:detail_souvenir', args=[pk])),
+        Source('note', 'notes.Note', 'user_id',
+               ('title', 'content', 'is_deleted', 'updated_at'), _note_document,
+               lambda pk: reverse('notes:detail', args=[pk])),
+        Source('graph_note', 'core.Note', 'owner_id',
+               ('title', 'body', 'updated_at'), _graph_note_document,
+               lambda pk: reverse('core:note_detail', args=[pk]), _unmirrored_graph_notes),
+    )
+}
+_SOURCES_BY_MODEL = {source.model: source for source in SOURCES.values()}
+
+
+def source_for(instance):
+    return _SOURCES_BY_MODEL.get(instance._meta.label)
+
+
+def _document_values(source, get):
+    """(owner id, {title, body, date}) or None when the object is not indexed"""
+    owner_id = get(source.owner)
+    document = source.document(get) if owner_id else None
+    if document is None:
+        return None
+    title, body, day = document
+    return owner_id, {'title': (title or '')[:400], 'body': body or '', 'date': day}
+
+
+# --- Maintenance (signals, rebuild) ---
+
+def index_object(instance):
+    """Crée, met à jour ou retire le document d'un objet enregistré"""
+    source = source_for(instance)
+    if source is None:
+        return
+    values = _document_values(source, lambda name: getattr(instance, name))
+    if values is not None and source.queryset is not None:
+        if not source.queryset(type(instance).objects.filter(pk=instance.pk)).exists():
+            values = None
+    if values is None:
+        remove_object(instance)
+        return
+    owner_id, fields = values
+    lookup = {'kind': source.kind, 'object_id': str(instance.pk)}
+    current = SearchDocument.objects.filter(**lookup).values('owner_id', 'title', 'body', 'date').first()
+    if current is None:
+        SearchDocument.objects.create(owner_id=owner_id, **lookup, **fields)
+    elif current != {'owner_id': owner_id, **fields}:
+        # Only real changes reach the full-text index
+        SearchDocument.objects.filter(**lookup).update(owner_id=owner_id, updated_at=timezone.now(), **fields)
+    if source.kind == 'note':
+        _refresh_graph_mirrors(instance)
+
+
+def remove_object(instance):
+    source = source_for(instance)
+    if source is not None:
+        SearchDocument.objects.filter(kind=source.kind, object_id=str(instance.pk)).delete()
+        if source.kind == 'note':
+            _refresh_graph_mirrors(instance)
+
+
+def _refresh_graph_mirrors(notes_app_note):
+    """Les notes du graphe appariées à une note de l'app notes sortent de
+    l'index (ou y reviennent quand la note de l'app notes est supprimée)"""
+    CoreNote = global_apps.get_model('core', 'Note')
+    graph_notes = CoreNote.objects.filter(owner_id=notes_app_note.user_id, title=notes_app_note.title)
+    for graph_note in graph_notes:
+        index_object(graph_note)
+
+
+def rebuild(user_id=None, apps=global_apps):
+    """
+    Réindexe tout (ou un utilisateur). `apps` : registre des modèles, celui
+    de la migration lors de la création de l'index.
+    Returns: nombre de documents indexés
+    """
+    Document = apps.get_model('core', 'SearchDocument')
+    count = 0
+    with transaction.atomic():
+        documents = Document.objects.all()
+        if user_id is not None:
+            documents = documents.filter(owner_id=user_id)
+        documents.delete()
+
+        batch = []
+        for source in SOURCES.values():
+            model = apps.get_model(source.model)
+            rows = model.objects.all()
+            if user_id is not None:
+                rows = rows.filter(**{source.owner: user_id})
+            if source.queryset is not None:
+                rows = source.queryset(rows, apps)
+            for row in rows.values('pk', source.owner, *source.fields).iterator(chunk_size=BATCH_SIZE):
+                values = _document_values(source, row.get)
+                if values is None:
+                    continue
+                owner_id, fields = values
+                batch.append(Document(owner_id=owner_id, kind=source.kind, object_id=str(row['pk']), **fields))
+                if len(batch) >= BATCH_SIZE:
+                    Document.objects.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+        if batch:
+            Document.objects.bulk_create(batch)
+            count += len(batch)
+    return count
+
+
+# --- Full-text index ---
+
+INDEX = FullTextIndex(SearchDocument, body='body', owner='owner_id',
+                      title_weight=TITLE_WEIGHT, fallback_order=('-date', '-id'))
+
+
+def create_index(connection):
+    """Create (or repair) the full-text index of the database behind `connection`"""
+    return INDEX.create(connection)
+
+
+def drop_index(connection):
+    INDEX.drop(connection)
+
+
+def get_backend(using='default'):
+    return INDEX.get_backend(using)
+
+
+def search(user, query, kinds=None, page=1, page_size=PAGE_SIZE):
+    """
+    Une page de résultats classés, tous types confondus.
+    Returns: dict results / page / has_next
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    offset = (page - 1) * page_size
+    filters = {'kind': list(kinds)} if kinds else None
+    # One extra row tells whether there is a next page without counting every match
+    matches = get_backend().search(user.pk, query, filters, ('kind', 'object_id', 'date'), page_size + 1, offset)
+    results = []
+    for match in matches[:page_size]:
+        kind, object_id, day = match.columns
+        results.append({
+            'type': kind,
+            'id': object_id,
+            'title': match.title,
+            'snippet': match.snippet,
+            'date': day.isoformat() if hasattr(day, 'isoformat') else day,
+            'rank': match.rank,
+            'url': SOURCES[kind].url(object_id),
+        })
+    return {'results': results, 'page': page, 'has_next': len(matches) > page_size}
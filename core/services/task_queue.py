@@ -0,0 +1,201 @@
+"""
+File d'attente de tâches IA adossée au modèle AITask.
+
+Les vues créent des tâches (enqueue), la commande `run_ai_worker` les
+réserve une par une (claim_next) et les exécute (run_task). Une tâche en
+échec est replanifiée avec un backoff exponentiel jusqu'à `max_attempts`,
+puis passe au statut `failed`.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from ..models import AITask
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+# task_type -> callable(task) -> dict (stocké dans task.result)
+_HANDLERS = {}
+
+
+def register_handler(task_type):
+    """Décorateur qui associe un handler à un type de tâche."""
+    def decorator(func):
+        _HANDLERS[task_type] = func
+        return func
+    return decorator
+
+
+def get_handler(task_type):
+    return _HANDLERS.get(task_type)
+
+
+def _backoff_base():
+    return getattr(settings, 'AI_TASK_RETRY_BACKOFF', 30)
+
+
+def enqueue(task_type, owner=None, souvenir=None, payload=None, max_attempts=None, delay=0):
+    """Crée une tâche en attente."""
+    return AITask.objects.create(
+        task_type=task_type,
+        owner=owner,
+        souvenir=souvenir,
+        payload=payload or {},
+        max_attempts=max_attempts or getattr(settings, 'AI_TASK_MAX_ATTEMPTS', 3),
+        available_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def enqueue_memory_analysis(souvenir):
+    """
+    Planifie l'analyse IA d'un souvenir.
+    Réutilise la tâche existante si une analyse est déjà en attente ou en cours.
+    Returns: (task, created)
+    """
+    existing = AITask.objects.filter(
+        task_type='analyze_memory',
+        souvenir=souvenir,
+        status__in=ACTIVE_STATUSES,
+    ).first()
+    if existing:
+        return existing, False
+    return enqueue('analyze_memory', owner=souvenir.utilisateur, souvenir=souvenir), True
+
+
+def enqueue_pending_memories(user):
+    """
+    Planifie l'analyse de tous les souvenirs non analysés d'un utilisateur.
+    Returns: nombre de nouvelles tâches créées
+    """
+    from ..models import Souvenir
+
+    already_queued = AITask.objects.filter(
+        task_type='analyze_memory',
+        owner=user,
+        status__in=ACTIVE_STATUSES,
+    ).values('souvenir_id')
+    pending = Souvenir.objects.filter(
+        utilisateur=user, ai_analyzed=False
+    ).exclude(id__in=already_queued).only('id')
+
+    max_attempts = getattr(settings, 'AI_TASK_MAX_ATTEMPTS', 3)
+    now = timezone.now()
+    tasks = [
+        AITask(
+            task_type='analyze_memory',
+            owner=user,
+            souvenir_id=souvenir.id,
+            max_attempts=max_attempts,
+            available_at=now,
+        )
+        for souvenir in pending.iterator()
+    ]
+    AITask.objects.bulk_create(tasks, batch_size=500)
+    return len(tasks)
+
+
+def claim_next(task_types=None):
+    """
+    Réserve la prochaine tâche disponible et la passe à `running`.
+
+    La réservation se fait par un UPDATE conditionnel sur le statut : si un
+    autre worker a pris la tâche entre-temps, on passe à la suivante.
+    """
+    for _ in range(10):
+        qs = AITask.objects.filter(status='queued', available_at__lte=timezone.now())
+        if task_types:
+            qs = qs.filter(task_type__in=task_types)
+        candidate = qs.order_by('available_at', 'id').values_list('id', flat=True).first()
+        if candidate is None:
+            return None
+
+        now = timezone.now()
+        claimed = AITask.objects.filter(pk=candidate, status='queued').update(
+            status='running', started_at=now, updated_at=now,
+        )
+        if claimed:
+            return AITask.objects.select_related('souvenir').get(pk=candidate)
+    return None
+
+
+def run_task(task):
+    """
+    Exécute une tâche déjà réservée.
+    Returns: True si la tâche est terminée avec succès
+    """
+    handler = get_handler(task.task_type)
+    task.attempts += 1
+
+    if handler is None:
+        task.status = 'failed'
+        task.last_error = f"Aucun handler pour le type '{task.task_type}'"
+        task.finished_at = timezone.now()
+        task.save(update_fields=['status', 'attempts', 'last_error', 'finished_at', 'updated_at'])
+        logger.error(task.last_error)
+        return False
+
+    try:
+        result = handler(task)
+    except Exception as e:
+        task.last_error = str(e)
+        if task.attempts >= task.max_attempts:
+            task.status = 'failed'
+            task.finished_at = timezone.now()
+            logger.error(f"AITask {task.id} failed after {task.attempts} attempts: {e}")
+        else:
+            delay = _backoff_base() * 2 ** (task.attempts - 1)
+            task.status = 'queued'
+            task.available_at = timezone.now() + timedelta(seconds=delay)
+            logger.warning(f"AITask {task.id} attempt {task.attempts} failed, retry in {delay}s: {e}")
+        task.save(update_fields=['status', 'attempts', 'last_error', 'available_at', 'finished_at', 'updated_at'])
+        return False
+
+    task.status = 'done'
+    task.result = result
+    task.last_error = ''
+    task.finished_at = timezone.now()
+    task.save(update_fields=['status', 'attempts', 'result', 'last_error', 'finished_at', 'updated_at'])
+    return True
+
+
+def requeue_stale(older_than=None):
+    """
+    Remet en file les tâches restées `running` trop longtemps
+    (worker interrompu). Returns: nombre de tâches remises en file
+    """
+    older_than = older_than or getattr(settings, 'AI_TASK_STALE_AFTER', 900)
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return AITask.objects.filter(status='running', started_at__lt=cutoff).update(
+        status='queued', available_at=timezone.now(), updated_at=timezone.now(),
+    )
+
+
+def status_summary(user):
+    """Nombre de tâches par statut pour un utilisateur."""
+    counts = {status: 0 for status, _ in AITask.STATUS}
+    rows = AITask.objects.filter(owner=user).values('status').annotate(total=Count('id'))
+    for row in rows:
+        counts[row['status']] = row['total']
+    return counts
+
+
+@register_handler('analyze_memory')
+def _analyze_memory(task):
+    from ..ai_services import AIAnalysisService
+
+    souvenir = task.souvenir
+    if souvenir is None:
+        raise ValueError("Souvenir introuvable pour cette tâche")
+
+    analyse = AIAnalysisService.analyze_memory(souvenir)
+    return {
+        'souvenir_id': str(souvenir.id),
+        'emotion': analyse.emotion_texte,
+        'summary': analyse.resume_genere,
+    }
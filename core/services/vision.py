@@ -0,0 +1,183 @@
+"""
+Analyse d'image : un seul appel Vision par photo.
+
+Toutes les features (labels, visages, texte, couleurs, landmarks) sont
+demandées dans une requête batch_annotate_images, sur un client partagé
+par le process. L'image est réduite avant l'envoi.
+
+Le transport est choisi par settings.AI_VISION_TRANSPORT :
+- 'google' : Google Cloud Vision (nécessite google-cloud-vision + clé)
+- 'local'  : réponse construite localement, même forme que l'API, pour
+             les tests et les benchmarks hors ligne
+"""
+
+import io
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from google.cloud import vision
+    GOOGLE_VISION_AVAILABLE = True
+except ImportError:
+    GOOGLE_VISION_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Likelihood enum de Vision : 3 = LIKELY, 4 = VERY_LIKELY
+LIKELY = 3
+
+
+def prepare_image_bytes(path, max_side=None, quality=85):
+    """
+    Lit l'image et la réduit pour que son plus grand côté fasse au plus
+    max_side pixels (settings.AI_VISION_MAX_SIDE). Les images déjà
+    petites sont envoyées telles quelles.
+    """
+    max_side = max_side or getattr(settings, 'AI_VISION_MAX_SIDE', 1024)
+    with open(path, 'rb') as image_file:
+        content = image_file.read()
+
+    if not PIL_AVAILABLE:
+        return content
+
+    try:
+        with Image.open(io.BytesIO(content)) as img:
+            if max(img.size) <= max_side:
+                return content
+            img = img.convert('RGB')
+            img.thumbnail((max_side, max_side))
+            buffer = io.BytesIO()
+            img.save(buffer, format='JPEG', quality=quality, optimize=True)
+            return buffer.getvalue()
+    except Exception as e:
+        logger.warning(f"Could not downscale image {path}: {e}")
+        return content
+
+
+class GoogleVisionTransport:
+    """Client ImageAnnotator partagé, une requête batch par image"""
+
+    _client = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls):
+        if cls._client is None:
+            with cls._lock:
+                if cls._client is None:
+                    cls._client = vision.ImageAnnotatorClient()
+        return cls._client
+
+    def annotate(self, content):
+        Feature = vision.Feature.Type
+        request = vision.AnnotateImageRequest(
+            image=vision.Image(content=content),
+            features=[
+                vision.Feature(type_=Feature.LABEL_DETECTION, max_results=5),
+                vision.Feature(type_=Feature.FACE_DETECTION, max_results=10),
+                vision.Feature(type_=Feature.TEXT_DETECTION, max_results=3),
+                vision.Feature(type_=Feature.IMAGE_PROPERTIES, max_results=3),
+                vision.Feature(type_=Feature.LANDMARK_DETECTION, max_results=1),
+            ],
+        )
+        response = self.get_client().batch_annotate_images(requests=[request]).responses[0]
+        if response.error.message:
+            raise RuntimeError(response.error.message)
+        return response
+
+
+class LocalVisionTransport:
+    """
+    Remplaçant local de Vision : renvoie un objet avec les mêmes attributs
+    qu'un AnnotateImageResponse. Les couleurs dominantes sont calculées
+    sur l'image réelle si Pillow est disponible. settings.AI_VISION_LOCAL_LATENCY
+    (secondes) permet de simuler le temps réseau.
+    """
+
+    def annotate(self, content):
+        latency = getattr(settings, 'AI_VISION_LOCAL_LATENCY', 0)
+        if latency:
+            time.sleep(latency)
+
+        colors = [SimpleNamespace(color=SimpleNamespace(red=r, green=g, blue=b))
+                  for r, g, b in self._dominant_colors(content)]
+        return SimpleNamespace(
+            label_annotations=[SimpleNamespace(description=d) for d in ('Landscape', 'People', 'Nature')],
+            face_annotations=[],
+            text_annotations=[],
+            image_properties_annotation=SimpleNamespace(dominant_colors=SimpleNamespace(colors=colors)),
+            landmark_annotations=[],
+            error=SimpleNamespace(message=''),
+        )
+
+    @staticmethod
+    def _dominant_colors(content, count=3):
+        if PIL_AVAILABLE:
+            try:
+                with Image.open(io.BytesIO(content)) as img:
+                    small = img.convert('RGB').resize((64, 64))
+                    palette = small.quantize(colors=count)
+                    rgb = palette.getpalette()[:count * 3]
+                    return [tuple(rgb[i:i + 3]) for i in range(0, len(rgb), 3)]
+            except Exception:
+                pass
+        return [(0x34, 0x98, 0xdb), (0x2e, 0xcc, 0x71), (0xf3, 0x9c, 0x12)]
+
+
+def get_vision_transport():
+    """Transport configuré, ou None si Google Vision n'est pas utilisable"""
+    name = getattr(settings, 'AI_VISION_TRANSPORT', 'google')
+    if name == 'local':
+        return LocalVisionTransport()
+    if GOOGLE_VISION_AVAILABLE and settings.GOOGLE_VISION_API_KEY:
+        return GoogleVisionTransport()
+    return None
+
+
+def parse_annotation(response):
+    """AnnotateImageResponse (ou équivalent local) -> dict d'analyse d'image"""
+    objects = [label.description.lower() for label in response.label_annotations[:5]]
+    faces = list(response.face_annotations)
+    detected_text = ' '.join([text.description for text in response.text_annotations[:3]])
+
+    colors = []
+    if response.image_properties_annotation:
+        dominant_colors = response.image_properties_annotation.dominant_colors.colors[:3]
+        colors = [f"#{int(c.color.red):02x}{int(c.color.green):02x}{int(c.color.blue):02x}" for c in dominant_colors]
+
+    location = ""
+    if response.landmark_annotations:
+        location = response.landmark_annotations[0].description
+
+    # Estimate emotion from the most prominent face
+    emotion = 'neutral'
+    if faces:
+        face = faces[0]
+        emotions = {
+            'joy': face.joy_likelihood,
+            'sadness': face.sorrow_likelihood,
+            'anger': face.anger_likelihood,
+            'surprise': face.surprise_likelihood,
+        }
+        max_emotion = max(emotions.items(), key=lambda x: int(x[1]))
+        if int(max_emotion[1]) >= LIKELY:
+            emotion = max_emotion[0]
+
+    return {
+        'objects': objects,
+        'location': location or 'Location not detected',
+        'faces_count': len(faces),
+        'emotion': emotion,
+        'colors': colors,
+        'detected_text': detected_text,
+    }
@@ -1,12 +1,17 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from .models import Note, Link
+from .models import EntreeHumeur, EntreeJournal, Note, Link, Souvenir
+from .services import graph_analytics, graph_broadcast, journal_stats, memory_insights, notes_sync, search_index
+from .services.notes_sync import NotesAppNote
 from .utils import parse_note_links
-try:
-    from channels.layers import get_channel_layer
-except Exception:
-    get_channel_layer = None
-from asgiref.sync import async_to_sync
+
+
+@receiver(post_save, sender=Note)
+def mirror_note_to_notes_app(sender, instance, created, **kwargs):
+    """Keep a notes-app counterpart so graph nodes can be opened in the editor"""
+    if getattr(instance, notes_sync.FROM_NOTES_APP, False):
+        return
+    notes_sync.sync_to_notes_app(instance)
 
 
 @receiver(post_save, sender=Note)
@@ -14,14 +19,135 @@ def update_note_links(sender, instance, created, **kwargs):
     if hasattr(instance, '_skip_link_parsing'):
         return
     parse_note_links(instance)
-    # Broadcast update if channel layer available
-    if get_channel_layer is None:
+    if created:
+        graph_analytics.schedule_layout(instance.owner_id)
+    # Coalesced delta broadcast (off the request thread)
+    graph_broadcast.note_saved(instance)
+
+
+@receiver(post_delete, sender=Note)
+def broadcast_note_deleted(sender, instance, **kwargs):
+    graph_analytics.schedule_layout(instance.owner_id)
+    graph_broadcast.note_deleted(instance)
+
+
+def _touches_insights(update_fields):
+    """False for a save(update_fields=...) that leaves every snapshot column alone"""
+    return update_fields is None or bool(
+        set(update_fields) & {'utilisateur', 'utilisateur_id', *memory_insights.CONTRIBUTION_FIELDS}
+    )
+
+
+@receiver(pre_save, sender=Souvenir)
+def remember_souvenir_insights(sender, instance, update_fields=None, **kwargs):
+    """Capture the stored state so post_save can apply a delta to the insights snapshot"""
+    instance._insights_previous = None
+    if instance._state.adding:
         return
-    channel_layer = get_channel_layer()
-    if channel_layer is None:
+    if not _touches_insights(update_fields):
+        # Stored contribution unchanged: no read, post_save only bumps the version
+        instance._insights_previous = (instance.utilisateur_id, memory_insights.contribution(instance))
         return
-    room_group_name = f'graph_{instance.owner.id}'
-    async_to_sync(channel_layer.group_send)(
-        room_group_name,
-        {'type': 'graph_update', 'action': 'refresh', 'note_id': str(instance.id)}
-    )
+    # Primary-key lookup: no ORDER BY from the model's default ordering
+    rows = Souvenir.objects.filter(pk=instance.pk).order_by().values('utilisateur_id', *memory_insights.CONTRIBUTION_FIELDS)[:1]
+    for row in rows:
+        instance._insights_previous = (row['utilisateur_id'], memory_insights.contribution(row))
+
+
+@receiver(post_save, sender=Souvenir)
+def update_souvenir_insights(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_insights_previous', None)
+    new = memory_insights.contribution(instance)
+    if previous and previous[0] != instance.utilisateur_id:
+        memory_insights.apply_change(previous[0], old=previous[1])
+        previous = None
+    memory_insights.apply_change(instance.utilisateur_id, old=previous[1] if previous else None, new=new)
+
+
+@receiver(post_delete, sender=Souvenir)
+def remove_souvenir_insights(sender, instance, **kwargs):
+    memory_insights.apply_change(instance.utilisateur_id, old=memory_insights.contribution(instance))
+
+
+
+@receiver(pre_save, sender=EntreeJournal)
+def remember_journal_entry_stats(sender, instance, **kwargs):
+    """Capture the stored state so post_save can apply a delta to the journal statistics"""
+    instance._stats_previous = None
+    if instance._state.adding:
+        return
+    row = EntreeJournal.objects.filter(pk=instance.pk).values('utilisateur_id', *journal_stats.ENTRY_FIELDS).first()
+    if row:
+        instance._stats_previous = (row['utilisateur_id'], journal_stats.entry_contribution(row))
+
+
+@receiver(post_save, sender=EntreeJournal)
+def update_journal_entry_stats(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    new = journal_stats.entry_contribution(instance)
+    if previous and previous[0] != instance.utilisateur_id:
+        journal_stats.apply_change(previous[0], old=previous[1])
+        previous = None
+    journal_stats.apply_change(instance.utilisateur_id, old=previous[1] if previous else None, new=new)
+
+
+@receiver(post_delete, sender=EntreeJournal)
+def remove_journal_entry_stats(sender, instance, **kwargs):
+    journal_stats.apply_change(instance.utilisateur_id, old=journal_stats.entry_contribution(instance))
+
+
+@receiver(pre_save, sender=EntreeHumeur)
+def remember_journal_mood_stats(sender, instance, **kwargs):
+    instance._stats_previous = None
+    if instance._state.adding:
+        return
+    row = EntreeHumeur.objects.filter(pk=instance.pk).values_list(
+        'entree_journal__utilisateur_id', 'humeur_id', 'humeur__nom', 'entree_journal__date_creation').first()
+    if row:
+        instance._stats_previous = (row[0], journal_stats.mood_contribution(*row[1:]))
+
+
+@receiver(post_save, sender=EntreeHumeur)
+def update_journal_mood_stats(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    user_id, new = journal_stats.mood_owner_contribution(instance)
+    if previous and previous[0] != user_id:
+        journal_stats.apply_change(previous[0], old=previous[1])
+        previous = None
+    journal_stats.apply_change(user_id, old=previous[1] if previous else None, new=new)
+
+
+@receiver(post_delete, sender=EntreeHumeur)
+def remove_journal_mood_stats(sender, instance, **kwargs):
+    # Cascades delete the moods before their entry, which can still be read here
+    try:
+        user_id, old = journal_stats.mood_owner_contribution(instance)
+    except EntreeJournal.DoesNotExist:
+        return
+    journal_stats.apply_change(user_id, old=old)
+
+
+@receiver(post_save, sender=EntreeJournal)
+@receiver(post_save, sender=Souvenir)
+@receiver(post_save, sender=Note)
+def index_for_search(sender, instance, **kwargs):
+    search_index.index_object(instance)
+
+
+@receiver(post_delete, sender=EntreeJournal)
+@receiver(post_delete, sender=Souvenir)
+@receiver(post_delete, sender=Note)
+def remove_from_search(sender, instance, **kwargs):
+    search_index.remove_object(instance)
+
+if NotesAppNote is not None:
+    # instance._previous_title is captured by notes.signals (pre_save)
+    @receiver(post_save, sender=NotesAppNote)
+    def mirror_notes_app_note(sender, instance, created, **kwargs):
+        """Create/update the core.Note shown in the Universe Graph"""
+        if getattr(instance, notes_sync.FROM_CORE, False):
+            return
+        notes_sync.sync_to_core(instance, previous_title=getattr(instance, '_previous_title', None))
+
+    post_save.connect(index_for_search, sender=NotesAppNote)
+    post_delete.connect(remove_from_search, sender=NotesAppNote)
@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from .services.llm_cache import build_cache, get_llm_cache, reset_llm_cache
+
+
+class StructuredTextAnalysisTests(TestCase):
+    def test_invalid_fields_fall_back_to_local_heuristics(self):
+        from .ai_services import AIAnalysisService
+
+        result = AIAnalysisService._validate_text_analysis(
+            {'summary': '', 'keywords': 'beach, friends', 'emotion': 'Happy JOY!', 'emotion_score': 'high'},
+            'Beach', 'A sunny day at the beach with friends',
+        )
+        self.assertEqual(result['summary'], 'A sunny day at the beach with friends')
+        self.assertEqual(result['keywords'], ['beach', 'friends'])
+        self.assertEqual(result['emotion'], 'joy')
+        self.assertEqual(result['emotion_score'], 0.9)
+
+    @override_settings(LLM_CACHE={'BACKEND': 'locmem'})
+    def test_combined_mode_uses_single_call_and_is_cached(self):
+        from .ai_services import AIAnalysisService
+
+        reset_llm_cache()
+        self.addCleanup(reset_llm_cache)
+        client = mock.Mock()
+        client.chat.completions.create.return_value.choices = [mock.Mock(message=mock.Mock(content=(
+            '{"summary": "Great day.", "keywords": ["beach"], "emotion": "peace",'
+            ' "emotion_score": 0.7, "confidence": 1.4}'
+        )))]
+        with mock.patch('core.ai_services.get_openai_client', return_value=client):
+            result = AIAnalysisService._analyze_text_combined('Beach', 'Calm evening')
+            again = AIAnalysisService._analyze_text_combined('Beach', 'Calm evening')
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertEqual(result['emotion'], 'peace')
+        self.assertEqual(result['confidence'], 1.0)
+        self.assertEqual(again, result)
+        self.assertEqual(get_llm_cache().stats()['hits'], 1)
+
+
+class LLMCacheTests(TestCase):
+    def _exercise(self, cache):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'answer': len(calls)}
+
+        first = cache.get_or_call('openai', 'gpt', 'prompt', 0.3, compute)
+        second = cache.get_or_call('openai', 'gpt', 'prompt', 0.3, compute)
+        other = cache.get_or_call('openai', 'gpt', 'prompt', 0.2, compute)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(calls), 2)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_locmem_backend(self):
+        self._exercise(build_cache({'BACKEND': 'locmem'}))
+
+    def test_file_backend(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as location:
+            self._exercise(build_cache({'BACKEND': 'file', 'LOCATION': location}))
+
+    def test_db_backend(self):
+        self._exercise(build_cache({'BACKEND': 'db'}))
+
+    def test_lru_eviction_and_ttl(self):
+        cache = build_cache({'BACKEND': 'locmem', 'MAX_ENTRIES': 2})
+        for prompt in ('a', 'b', 'c'):
+            cache.get_or_call('groq', 'llama', prompt, 0, lambda: prompt)
+        self.assertEqual(cache.backend.count(), 2)
+
+        cache = build_cache({'BACKEND': 'locmem', 'TTL': -1})
+        cache.get_or_call('groq', 'llama', 'a', 0, lambda: 'x')
+        cache.get_or_call('groq', 'llama', 'a', 0, lambda: 'x')
+        self.assertEqual(cache.stats()['hits'], 0)
+
+    def test_creative_calls_are_not_cached(self):
+        cache = build_cache({'BACKEND': 'locmem', 'MAX_TEMPERATURE': 0.3})
+        answers = iter(['first', 'second'])
+        self.assertEqual(cache.get_or_call('openai', 'gpt', 'capsule', 0.7, lambda: next(answers)), 'first')
+        self.assertEqual(cache.get_or_call('openai', 'gpt', 'capsule', 0.7, lambda: next(answers)), 'second')
+        self.assertEqual(cache.backend.count(), 0)
+        self.assertEqual(cache.stats()['providers']['openai']['bypassed'], 2)
+
+    def test_none_is_not_cached(self):
+        cache = build_cache({'BACKEND': 'locmem'})
+        cache.get_or_call('groq', 'llama', 'a', 0, lambda: None)
+        self.assertEqual(cache.backend.count(), 0)
+
+
+class VisionTransportTests(TestCase):
+    def _write_image(self, directory, size):
+        import os
+        from PIL import Image
+
+        path = os.path.join(directory, 'photo.png')
+        Image.new('RGB', size, (200, 30, 30)).save(path)
+        return path
+
+    def test_large_images_are_downscaled(self):
+        import io
+        import tempfile
+        from PIL import Image
+        from .services.vision import prepare_image_bytes
+
+        with tempfile.TemporaryDirectory() as directory:
+            content = prepare_image_bytes(self._write_image(directory, (3000, 1500)), max_side=800)
+        with Image.open(io.BytesIO(content)) as img:
+            self.assertEqual(img.size, (800, 400))
+
+    @override_settings(AI_VISION_TRANSPORT='local')
+    def test_local_transport_goes_through_the_shared_parser(self):
+        import tempfile
+        from .ai_services import AIAnalysisService
+
+        with tempfile.TemporaryDirectory() as directory:
+            photo = mock.Mock(path=self._write_image(directory, (100, 100)))
+            result = AIAnalysisService._analyze_image(photo)
+        self.assertEqual(result['objects'], ['landscape', 'people', 'nature'])
+        self.assertEqual(result['faces_count'], 0)
+        self.assertEqual(result['colors'][0], '#c81e1e')
@@ -0,0 +1,203 @@
+import base64
+import io
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+import reportlab
+from PIL import Image
+from pypdf import PdfReader
+from xhtml2pdf import pisa
+from xhtml2pdf.config.resources import default_policy
+
+from .models import EntreeJournal, ExportPDF, JournalExport, Souvenir
+from .services import journal_export, pdf_export, task_queue
+from .services.pdf_merge import merge_pdfs
+from .services.downloads import RangeUnsatisfiable, parse_range
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PDF_EXPORT_IMAGE_MAX_SIDE=200)
+class PDFExportTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='testpass123')
+        buffer = io.BytesIO()
+        Image.new('RGB', (1600, 1200), (200, 120, 40)).save(buffer, format='JPEG')
+        self.souvenir = Souvenir.objects.create(
+            utilisateur=self.user,
+            titre='Holiday',
+            description='A long day at the lake',
+            date_evenement=date(2024, 7, 14),
+            photo=SimpleUploadedFile('lake.jpg', buffer.getvalue(), content_type='image/jpeg'),
+        )
+        self.client.login(username='exporter', password='testpass123')
+
+    def test_export_is_generated_by_the_worker_and_streamed(self):
+        response = self.client.post(reverse('core:exporter_pdf'), {
+            'titre_export': 'Summer',
+            'souvenirs[]': [str(self.souvenir.id)],
+            'inclure_photos': 'on',
+        })
+        self.assertEqual(response.status_code, 202)
+        export = ExportPDF.objects.get(pk=response.json()['export_id'])
+        self.assertEqual(export.status, 'pending')
+        self.assertTrue(export.inclure_photos)
+
+        task = task_queue.claim_next(['export_pdf'])
+        self.assertTrue(task_queue.run_task(task))
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['status'], 'ready')
+        self.assertEqual(status['progress'], 100)
+        self.assertGreaterEqual(status['nombre_pages'], 1)
+
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download['Accept-Ranges'], 'bytes')
+        body = b''.join(download.streaming_content)
+        self.assertTrue(body.startswith(b'%PDF'))
+
+        partial = self.client.get(status['download_url'], HTTP_RANGE='bytes=0-3')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(b''.join(partial.streaming_content), b'%PDF')
+        self.assertEqual(partial['Content-Range'], f'bytes 0-3/{len(body)}')
+
+    @override_settings(PDF_EXPORT_CHUNK_SIZE=1)
+    def test_export_is_rendered_in_chunks(self):
+        Souvenir.objects.create(utilisateur=self.user, titre='Picnic', description='Sandwiches', date_evenement=date(2024, 6, 1))
+        export, task = pdf_export.start_export(self.user, Souvenir.objects.filter(utilisateur=self.user), 'All')
+        with mock.patch.object(pdf_export, 'render_chunk', wraps=pdf_export.render_chunk) as render:
+            self.assertTrue(task_queue.run_task(task_queue.claim_next(['export_pdf'])))
+        chunks = [call.args[1] for call in render.call_args_list]
+        self.assertEqual([[s.titre for s in c['souvenirs']] for c in chunks], [['Holiday'], ['Picnic']])
+        self.assertEqual([c['first_chunk'] for c in chunks], [True, False])
+        self.assertTrue(chunks[0]['souvenirs'][0].pdf_image.startswith('data:image/jpeg;base64,'))
+
+        export.refresh_from_db()
+        with export.fichier_pdf.open('rb') as pdf_file:
+            self.assertEqual(len(PdfReader(pdf_file).pages), export.nombre_pages)
+        self.assertGreaterEqual(export.nombre_pages, 2)
+
+    def test_photos_are_downscaled_before_embedding(self):
+        uri = pdf_export.image_data_uri(self.souvenir.photo.path)
+        self.assertTrue(uri.startswith('data:image/jpeg;base64,'))
+        self.assertLess(len(uri), self.souvenir.photo.size)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=10-', 100), (10, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=0-500', 100), (0, 99))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+        with self.assertRaises(RangeUnsatisfiable):
+            parse_range('bytes=100-', 100)
+
+
+class PdfMergeTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def render(self, name, html, base_dir):
+        path = f'{self.tmp}/{name}.pdf'
+        with open(path, 'wb') as pdf_file:
+            self.assertFalse(pisa.CreatePDF(html, dest=pdf_file, resource_policy=default_policy(base_dir)).err)
+        return path
+
+    def test_merged_chunks_keep_their_pages_text_and_images(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (120, 80), (30, 90, 160)).save(buffer, format='PNG')
+        image = 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+        # Embedded TrueType font: its FontFile2 stream must survive the copy
+        font = os.path.join(os.path.dirname(reportlab.__file__), 'fonts', 'Vera.ttf')
+        style = f'<style>@font-face {{ font-family: vera; src: url("{font}"); }}</style>'
+        paths = []
+        for i in range(3):
+            pages = ''.join(
+                f'<h1 style="font-family: Courier">Chunk {i} page {p}</h1>'
+                f'<p style="font-family: vera">Caf\u00e9 {i}</p><img src="{image}"/>'
+                '<pdf:nextpage/>'
+                for p in range(2)
+            )
+            html = f'<html><head>{style}</head><body>{pages}</body></html>'
+            paths.append(self.render(f'chunk{i}', html, os.path.dirname(font)))
+        expected = sum(len(PdfReader(path).pages) for path in paths)
+
+        dest = f'{self.tmp}/merged.pdf'
+        self.assertEqual(merge_pdfs(paths, dest), expected)
+
+        reader = PdfReader(dest, strict=True)
+        self.assertEqual(len(reader.pages), expected)
+        texts = [page.extract_text() for page in reader.pages]
+        for i in range(3):
+            for p in range(2):
+                self.assertTrue(any(f'Chunk {i} page {p}' in text for text in texts))
+        self.assertIn('Caf\u00e9 2', texts[-1] + texts[-2])
+        fonts = {}
+        for page in reader.pages:
+            for font in page['/Resources']['/Font'].values():
+                fonts[font['/BaseFont']] = font.get_object()
+        vera = [font for name, font in fonts.items() if 'Vera' in name]
+        self.assertTrue(vera)
+        self.assertTrue(vera[0]['/FontDescriptor']['/FontFile2'].get_data())
+        with_images = [page for page in reader.pages if page.images]
+        self.assertEqual(len(with_images), 6)
+        self.assertEqual(with_images[-1].images[0].image.size, (120, 80))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, JOURNAL_EXPORT_CHUNK_SIZE=2)
+class JournalExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='diarist', password='testpass123')
+        for i in range(5):
+            EntreeJournal.objects.create(utilisateur=self.user, titre=f'Day {i}', contenu_texte='Dear diary ' * 20)
+        self.client.login(username='diarist', password='testpass123')
+
+    def test_journal_is_rendered_in_chunks_and_merged(self):
+        response = self.client.post(reverse('core:export_journal_pdf'))
+        self.assertEqual(response.status_code, 202)
+        export = JournalExport.objects.get(pk=response.json()['export_id'])
+        self.assertEqual(export.status, 'pending')
+
+        with mock.patch.object(journal_export, 'render_chunk', wraps=journal_export.render_chunk) as render:
+            task = task_queue.claim_next(['export_journal_pdf'])
+            self.assertTrue(task_queue.run_task(task))
+        chunks = [call.args[1] for call in render.call_args_list]
+        self.assertEqual([len(c['entrees']) for c in chunks], [2, 2, 1])
+        self.assertEqual([(c['first_chunk'], c['last_chunk']) for c in chunks],
+                         [(True, False), (False, False), (False, True)])
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual((status['status'], status['progress'], status['nombre_entrees']), ('ready', 100, 5))
+        self.assertGreaterEqual(status['nombre_pages'], 3)
+
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 200)
+        body = b''.join(download.streaming_content)
+        self.assertTrue(body.startswith(b'%PDF'))
+        # The streamed merge is a valid PDF holding every page of every chunk
+        reader = PdfReader(io.BytesIO(body))
+        self.assertEqual(len(reader.pages), status['nombre_pages'])
+        self.assertIn('Day 4', reader.pages[0].extract_text())
+
+    def test_last_chunk_is_the_one_that_exhausts_the_entries(self):
+        self.assertEqual(list(journal_export.with_last(iter([]))), [])
+        self.assertEqual(list(journal_export.with_last([1, 2, 3])), [(1, False), (2, False), (3, True)])
+        EntreeJournal.objects.all().delete()
+        entrees = EntreeJournal.objects.all()
+        self.assertEqual(list(journal_export.with_last(journal_export.iter_chunks(entrees, 2))), [([], True)])
+
+    def test_export_requires_post(self):
+        self.assertEqual(self.client.get(reverse('core:export_journal_pdf')).status_code, 405)
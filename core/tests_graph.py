@@ -29,3 +29,320 @@ class GraphAPITest(TestCase):
         self.assertEqual(resp.status_code, 200)
         note = resp.json()
         self.assertEqual(note['title'], 'Note A')
+
+    def test_graph_api_is_read_only_and_constant_in_queries(self):
+        from notes.models import Note as NotesAppNote
+
+        self.client.get('/graph/api/graph/')
+        with self.assertNumQueries(4):  # session, user, nodes, edges
+            small = self.client.get('/graph/api/graph/').json()
+
+        for i in range(20):
+            Note.objects.create(owner=self.user, title=f'Extra {i}', body='')
+        notes_app_count = NotesAppNote.objects.count()
+        with self.assertNumQueries(4):
+            data = self.client.get('/graph/api/graph/').json()
+        self.assertEqual(NotesAppNote.objects.count(), notes_app_count)
+
+        self.assertEqual(len(data['nodes']), len(small['nodes']) + 20)
+        node_a = next(n for n in data['nodes'] if n['title'] == 'Note A')
+        self.assertEqual(node_a['connections'], 1)
+        self.assertEqual(node_a['notes_app_id'], NotesAppNote.objects.get(user=self.user, title='Note A').id)
+
+    def test_notes_app_notes_are_mirrored_on_save(self):
+        from notes.models import Note as NotesAppNote
+
+        app_note = NotesAppNote.objects.create(user=self.user, title='Draft', content='Hello')
+        self.assertTrue(Note.objects.filter(owner=self.user, title='Draft', body='Hello').exists())
+
+        app_note.title = 'Final'
+        app_note.save()
+        self.assertFalse(Note.objects.filter(owner=self.user, title='Draft').exists())
+        self.assertTrue(Note.objects.filter(owner=self.user, title='Final').exists())
+        self.assertEqual(NotesAppNote.objects.filter(user=self.user, title='Final').count(), 1)
+
+
+class LinkParserTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='linker', password='pass')
+        self.targets = [Note.objects.create(owner=self.user, title=f'Target {i}') for i in range(50)]
+
+    def test_links_are_diffed_in_a_few_queries(self):
+        from .utils import parse_note_links
+
+        body = ' '.join(f'[[target {i}]]' for i in range(50))
+        note = Note.objects.create(owner=self.user, title='Hub', body=body)
+        self.assertEqual(note.outgoing_links.count(), 50)
+
+        # Drop 10 links, add one to a new note, keep 40 untouched
+        Note.objects.create(owner=self.user, title='Fresh')
+        note.body = ' '.join(f'[[Target {i}]]' for i in range(40)) + ' [[ fresh ]] [[Missing]]'
+        kept = set(note.outgoing_links.filter(dst__title='Target 0').values_list('id', flat=True))
+        note._skip_link_parsing = True
+        note.save()
+        with self.assertNumQueries(4):  # targets, existing, delete, insert
+            parse_note_links(note)
+
+        self.assertEqual(note.outgoing_links.count(), 41)
+        self.assertTrue(note.outgoing_links.filter(dst__title='Fresh').exists())
+        self.assertEqual(set(note.outgoing_links.filter(dst__title='Target 0').values_list('id', flat=True)), kept)
+
+    def test_links_resolve_to_sample_notes(self):
+        from .views import ensure_sample_notes
+
+        Note.objects.all().delete()
+        ensure_sample_notes()
+        gatsby = Note.objects.get(title='The Great Gatsby')
+        self.assertEqual(gatsby.title_key, 'the great gatsby')
+        note = Note.objects.create(owner=gatsby.owner, title='Reading list', body='[[the great gatsby]]')
+        self.assertEqual(list(note.outgoing_links.values_list('dst_id', flat=True)), [gatsby.id])
+
+
+class GraphCommandsTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='bulk', password='pass')
+
+    def test_rebuild_graph_diffs_links_in_bulk(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        a = Note.objects.create(owner=self.user, title='A', body='[[B]] [[C]]')
+        b = Note.objects.create(owner=self.user, title='B', body='')
+        c = Note.objects.create(owner=self.user, title='C', body='[[a]]')
+        # Forward references are only resolved by a rebuild
+        self.assertEqual(Link.objects.count(), 1)
+        stale = Link.objects.create(src=b, dst=c)
+
+        out = StringIO()
+        call_command('rebuild_graph', '--user', 'bulk', stdout=out)
+        pairs = set(Link.objects.values_list('src__title', 'dst__title'))
+        self.assertEqual(pairs, {('A', 'B'), ('A', 'C'), ('C', 'A')})
+        self.assertFalse(Link.objects.filter(pk=stale.pk).exists())
+        self.assertIn('notes/s', out.getvalue())
+
+    def test_graph_commands_reindex_bulk_created_notes(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import SearchDocument
+
+        Note.objects.bulk_create([Note(owner=self.user, title='Bulk', title_key='bulk', body='')])
+        self.assertFalse(SearchDocument.objects.filter(kind='graph_note', title='Bulk').exists())
+        for command in ('rebuild_graph', 'sync_notes_app'):
+            SearchDocument.objects.all().delete()
+            call_command(command, '--user', 'bulk', stdout=StringIO())
+            self.assertTrue(SearchDocument.objects.filter(kind='graph_note', title='Bulk').exists())
+
+    def test_sync_notes_app_mirrors_notes_and_links(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from notes.models import Note as NotesAppNote, NoteLink
+
+        source = NotesAppNote.objects.create(user=self.user, title='Source', content='')
+        target = NotesAppNote.objects.create(user=self.user, title='Target', content='')
+        NoteLink.objects.create(source_note=source, target_note=target)
+        Note.objects.filter(owner=self.user).delete()
+
+        call_command('sync_notes_app', '--user', 'bulk', stdout=StringIO())
+        self.assertEqual(set(Note.objects.filter(owner=self.user).values_list('title', 'title_key')),
+                         {('Source', 'source'), ('Target', 'target')})
+        self.assertTrue(Link.objects.filter(src__title='Source', dst__title='Target').exists())
+
+
+class NotesAppPendingLinksTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='forward', password='pass')
+
+    def test_forward_reference_is_resolved_when_target_is_created(self):
+        from notes.models import Note as NotesAppNote, PendingLink
+        from notes.utils import parse_note_links as parse_app_links
+
+        source = NotesAppNote.objects.create(user=self.user, title='Plan', content='See [[Ideas]] and [[Later]]')
+        parse_app_links(source)
+        self.assertEqual(set(source.pending_links.values_list('target_title', flat=True)), {'Ideas', 'Later'})
+
+        ideas = NotesAppNote.objects.create(user=self.user, title='Ideas', content='')
+        self.assertTrue(source.outgoing_links.filter(target_note=ideas).exists())
+        self.assertEqual(list(PendingLink.objects.values_list('target_title', flat=True)), ['Later'])
+        # Mirrored into the core graph
+        self.assertTrue(Link.objects.filter(src__title='Plan', dst__title='Ideas', src__owner=self.user).exists())
+
+        # Deleting the target makes the reference pending again
+        ideas.delete()
+        self.assertEqual(set(source.pending_links.values_list('target_title', flat=True)), {'Ideas', 'Later'})
+
+    def test_rename_then_recreate_old_title(self):
+        from notes.models import Note as NotesAppNote
+        from notes.utils import parse_note_links as parse_app_links
+
+        target = NotesAppNote.objects.create(user=self.user, title='B', content='')
+        source = NotesAppNote.objects.create(user=self.user, title='A', content='See [[B]]')
+        parse_app_links(source)
+        self.assertTrue(source.outgoing_links.filter(target_note=target).exists())
+
+        target.title = 'B2'
+        target.save()
+        self.assertFalse(source.outgoing_links.exists())
+        self.assertEqual(list(source.pending_links.values_list('target_title', flat=True)), ['B'])
+        self.assertFalse(Link.objects.filter(src__title='A', src__owner=self.user).exists())
+
+        new_target = NotesAppNote.objects.create(user=self.user, title='B', content='')
+        self.assertEqual(list(source.outgoing_links.values_list('target_note_id', flat=True)), [new_target.id])
+        self.assertEqual(
+            list(Link.objects.filter(src__title='A', src__owner=self.user).values_list('dst__title', flat=True)),
+            ['B'],
+        )
+
+    def test_saved_links_are_mirrored_once(self):
+        from unittest import mock
+        from notes.models import Note as NotesAppNote
+        from notes.utils import parse_note_links as parse_app_links
+
+        NotesAppNote.objects.create(user=self.user, title='B', content='')
+        with mock.patch('core.services.graph_broadcast.links_changed') as links_changed:
+            source = NotesAppNote.objects.create(user=self.user, title='A', content='See [[B]]')
+            parse_app_links(source)
+        edges = [edge for call in links_changed.call_args_list for edge in call.kwargs['added']]
+        self.assertEqual(len(edges), 1)
+        self.assertEqual(Link.objects.filter(src__title='A', dst__title='B', src__owner=self.user).count(), 1)
+
+
+class GraphBroadcastTest(TestCase):
+    def setUp(self):
+        from .services.graph_broadcast import GraphBroadcaster
+
+        self.now = 0.0
+        self.sent = []
+        self.broadcaster = GraphBroadcaster(
+            send=lambda user_id, message: self.sent.append((user_id, message)),
+            window=0.5, max_delay=2.0, max_items=10,
+            clock=lambda: self.now, start_thread=False,
+        )
+
+    def test_bursts_are_coalesced_into_one_delta(self):
+        b = self.broadcaster
+        b.note_saved(1, {'id': 'a', 'title': 'A', 'created_at': None})
+        b.links_changed(1, added=[('a', 'b')])
+        self.now = 0.3
+        b.note_saved(1, {'id': 'a', 'title': 'A renamed', 'created_at': None})
+        b.links_changed(1, removed=[('a', 'b')], added=[('a', 'c')])
+        self.assertEqual(b.flush(), 0)  # still inside the window
+
+        self.now = 0.9
+        self.assertEqual(b.flush(), 1)
+        user_id, message = self.sent[0]
+        self.assertEqual(message['action'], 'delta')
+        delta = message['delta']
+        self.assertEqual([n['title'] for n in delta['nodes']], ['A renamed'])
+        self.assertEqual(delta['edges'], [{'source': 'a', 'target': 'c', 'strength': 1.0}])
+        self.assertEqual(delta['removed_edges'], [{'source': 'a', 'target': 'b'}])
+
+    def test_continuous_edits_are_flushed_after_max_delay(self):
+        b = self.broadcaster
+        for step in range(6):
+            self.now = step * 0.4
+            b.note_saved(1, {'id': 'a', 'title': f'v{step}', 'created_at': None})
+            b.flush()
+        self.assertEqual(len(self.sent), 1)
+
+    def test_large_deltas_become_refresh(self):
+        self.broadcaster.links_changed(1, added=[('a', str(i)) for i in range(20)])
+        self.broadcaster.flush(force=True)
+        self.assertEqual(self.sent[0][1], {'type': 'graph_update', 'action': 'refresh'})
+
+
+class GraphLayoutTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='layout', password='pass')
+        self.client = Client()
+        self.client.force_login(self.user)
+        hub = Note.objects.create(owner=self.user, title='Hub')
+        self.notes = [hub] + [Note.objects.create(owner=self.user, title=f'Leaf {i}') for i in range(6)]
+        for leaf in self.notes[1:]:
+            Link.objects.create(src=leaf, dst=hub)
+        Note.objects.create(owner=self.user, title='Alone')
+
+    def test_layout_and_metrics_are_served_by_the_graph_api(self):
+        from .services.graph_analytics import compute_user_layout
+
+        layout = compute_user_layout(self.user.id)
+        self.assertEqual((layout.node_count, layout.edge_count, layout.component_count), (8, 6, 2))
+        self.assertEqual(compute_user_layout(self.user.id).computed_at, layout.computed_at)  # unchanged graph
+
+        nodes = {n['title']: n for n in self.client.get('/graph/api/graph/').json()['nodes']}
+        self.assertEqual(max(nodes.values(), key=lambda n: n['pagerank'])['title'], 'Hub')
+        self.assertNotEqual(nodes['Alone']['component'], nodes['Hub']['component'])
+        self.assertTrue(all(n['x'] is not None and n['y'] is not None for n in nodes.values()))
+
+        # Incremental run: existing nodes stay near their previous positions
+        Note.objects.create(owner=self.user, title='Leaf 6', body='[[Hub]]')
+        layout = compute_user_layout(self.user.id)
+        self.assertEqual(layout.node_count, 9)
+        moved = {n['title']: n for n in self.client.get('/graph/api/graph/').json()['nodes']}
+        drift = max(abs(moved[t]['x'] - nodes[t]['x']) + abs(moved[t]['y'] - nodes[t]['y']) for t in nodes)
+        self.assertLess(drift, 400)
+
+    def test_structural_changes_schedule_one_layout_task(self):
+        from .models import AITask
+
+        with self.captureOnCommitCallbacks(execute=True):
+            note = Note.objects.create(owner=self.user, title='New', body='[[Hub]] [[Alone]]')
+        with self.captureOnCommitCallbacks(execute=True):
+            note.delete()
+        self.assertEqual(AITask.objects.filter(task_type='graph_layout', owner=self.user).count(), 1)
+
+
+class GraphViewportTest(TestCase):
+    def setUp(self):
+        from .services.graph_analytics import compute_user_layout
+
+        User = get_user_model()
+        self.user = User.objects.create_user(username='viewport', password='pass')
+        self.client = Client()
+        self.client.force_login(self.user)
+        for group in range(3):
+            hub = Note.objects.create(owner=self.user, title=f'Hub {group}')
+            for i in range(5):
+                leaf = Note.objects.create(owner=self.user, title=f'Leaf {group}.{i}')
+                Link.objects.create(src=leaf, dst=hub)
+        compute_user_layout(self.user.id)
+
+    def get(self, params):
+        from unittest import mock
+        from .services import graph_viewport
+
+        with mock.patch.object(graph_viewport, 'LOD_FULL_THRESHOLD', 10), \
+                mock.patch.object(graph_viewport, 'VIEWPORT_MAX_NODES', 4):
+            return self.client.get('/graph/api/graph/', params)
+
+    def test_small_or_unbounded_requests_get_the_full_graph(self):
+        data = self.client.get('/graph/api/graph/', {'bbox': '-1e9,-1e9,1e9,1e9', 'zoom': '1'}).json()
+        self.assertEqual(data['mode'], 'full')
+        self.assertEqual(len(data['nodes']), 18)
+        self.assertEqual(self.client.get('/graph/api/graph/', {'bbox': '1,2,3'}).status_code, 400)
+
+    def test_overview_returns_cluster_super_nodes_only(self):
+        data = self.get({'bbox': '-1e9,-1e9,1e9,1e9', 'zoom': '0.01'}).json()
+        self.assertEqual(data['mode'], 'lod')
+        self.assertTrue(all(n.get('super') for n in data['nodes']))
+        self.assertEqual(sum(n['size'] for n in data['nodes']), 18)
+        self.assertEqual(data['stats']['total_notes'], 18)
+
+    def test_viewport_returns_visible_notes_and_clusters_for_the_rest(self):
+        hub = Note.objects.get(owner=self.user, title='Hub 0').layout
+        bbox = f'{hub.x - 1},{hub.y - 1},{hub.x + 1},{hub.y + 1}'
+        data = self.get({'bbox': bbox, 'zoom': '1'}).json()
+
+        notes = [n for n in data['nodes'] if not n.get('super')]
+        clusters = [n for n in data['nodes'] if n.get('super')]
+        self.assertEqual([n['title'] for n in notes], ['Hub 0'])
+        self.assertEqual(sum(n['size'] for n in clusters), 17)
+        # Links from the hub's leaves are attached to their cluster super-node
+        self.assertIn({'source': f'cluster-{hub.cluster}', 'target': str(hub.note_id), 'strength': 1.0, 'count': 5},
+                      data['edges'])
+
+        data = self.get({'bbox': '-1e9,-1e9,1e9,1e9', 'zoom': '1'}).json()
+        self.assertEqual(len([n for n in data['nodes'] if not n.get('super')]), 4)  # capped, most central first
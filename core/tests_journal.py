@@ -0,0 +1,171 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import EntreeHumeur, EntreeJournal, EntreeTag, Humeur, JournalStatistics, Tag
+from .services import journal_listing, journal_stats
+
+User = get_user_model()
+
+STATS_FIELDS = ('total_entries', 'total_words', 'favorites', 'day_counts', 'mood_counts',
+                'mood_day_counts', 'last_entry_date', 'current_streak', 'longest_streak')
+
+
+class JournalTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.joyeux = Humeur.objects.create(nom='Joyeux')
+        self.triste = Humeur.objects.create(nom='Triste')
+
+    def make_entree(self, **kwargs):
+        defaults = {'utilisateur': self.user, 'titre': 'Entry', 'contenu_texte': 'one two three'}
+        defaults.update(kwargs)
+        return EntreeJournal.objects.create(**defaults)
+
+
+class JournalStatisticsTests(JournalTestMixin, TestCase):
+    def _assert_matches_rebuild(self):
+        stats = JournalStatistics.objects.get(utilisateur=self.user)
+        fresh = journal_stats.rebuild_stats(self.user)
+        for field in STATS_FIELDS:
+            self.assertEqual(getattr(stats, field), getattr(fresh, field), field)
+
+    def test_signals_keep_statistics_in_sync(self):
+        journal_stats.rebuild_stats(self.user)
+        first = self.make_entree(is_favorite=True)
+        second = self.make_entree(contenu_texte='a b')
+        EntreeHumeur.objects.create(entree_journal=first, humeur=self.joyeux)
+        EntreeHumeur.objects.create(entree_journal=second, humeur=self.triste)
+        self._assert_matches_rebuild()
+
+        first.contenu_texte = 'now five words in here'
+        first.is_favorite = False
+        first.save()
+        EntreeHumeur.objects.filter(entree_journal=first).delete()
+        self._assert_matches_rebuild()
+
+        second.delete()  # cascades to its mood
+        self._assert_matches_rebuild()
+        stats = JournalStatistics.objects.get(utilisateur=self.user)
+        self.assertEqual((stats.total_entries, stats.total_words, stats.favorites), (1, 5, 0))
+        self.assertEqual(stats.mood_counts, {})
+
+    def test_admin_favorite_action_rebuilds_statistics(self):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        entree = self.make_entree()
+        journal_stats.get_stats(self.user)
+        request = RequestFactory().post('/')
+        model_admin = site._registry[EntreeJournal]
+        with mock.patch.object(model_admin, 'message_user'):
+            model_admin.mark_as_favorite(request, EntreeJournal.objects.filter(pk=entree.pk))
+        self.assertEqual(JournalStatistics.objects.get(utilisateur=self.user).favorites, 1)
+
+    def test_streaks(self):
+        stats = JournalStatistics(utilisateur=self.user)
+        today = timezone.localdate()
+        days = [today - timedelta(days=n) for n in (9, 8, 7, 2, 1)]
+        for day in days:
+            journal_stats._apply(stats, {'kind': 'entry', 'date': day.isoformat(), 'words': 1, 'favorite': False}, +1)
+        self.assertEqual((stats.current_streak, stats.longest_streak), (2, 3))
+        self.assertEqual(journal_stats.current_streak(stats), 2)
+
+        # Backdated entry bridging two runs
+        for offset in (6, 5, 4, 3):
+            day = (today - timedelta(days=offset)).isoformat()
+            journal_stats._apply(stats, {'kind': 'entry', 'date': day, 'words': 1, 'favorite': False}, +1)
+        self.assertEqual(stats.longest_streak, 9)
+
+        journal_stats._apply(stats, {'kind': 'entry', 'date': days[-1].isoformat(), 'words': 1, 'favorite': False}, -1)
+        self.assertEqual((stats.current_streak, stats.longest_streak), (8, 8))
+        self.assertEqual(journal_stats.current_streak(stats, today=today + timedelta(days=3)), 0)
+
+    def test_statistics_page_query_count_is_constant(self):
+        self.client.login(username='writer', password='testpass123')
+        url = reverse('core:statistiques_journal')
+        for i in range(3):
+            entree = self.make_entree()
+            EntreeHumeur.objects.create(entree_journal=entree, humeur=self.joyeux)
+        self.client.get(url)
+
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        for i in range(10):
+            entree = self.make_entree()
+            EntreeHumeur.objects.create(entree_journal=entree, humeur=self.triste)
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+
+        self.assertEqual(response.context['total_entrees'], 13)
+        self.assertEqual(response.context['total_mots'], 39)
+        self.assertEqual(response.context['current_streak'], 1)
+        self.assertEqual(response.context['timeline_data'][-1], {
+            'date': timezone.localdate().strftime('%d/%m'), 'positive': 3, 'negative': 10, 'entries': 13,
+        })
+        self.assertEqual([h.nom for h in response.context['humeurs_frequentes']], ['Triste', 'Joyeux'])
+
+
+class EntreeJournalWordCountTests(JournalTestMixin, TestCase):
+    def test_word_count_and_reading_time_are_stored_on_save(self):
+        entree = self.make_entree(contenu_texte='word ' * 450)
+        self.assertEqual((entree.word_count, entree.reading_time), (450, 2))
+
+        entree.contenu_texte = 'short'
+        entree.save(update_fields=['contenu_texte'])
+        entree.refresh_from_db()
+        self.assertEqual((entree.nombre_mots, entree.reading_time), (1, 1))
+
+    def test_backfill_command(self):
+        entree = self.make_entree()
+        journal_stats.get_stats(self.user)
+        EntreeJournal.objects.filter(pk=entree.pk).update(contenu_texte='a b c d e', word_count=0)
+
+        call_command('backfill_journal_word_counts', stdout=StringIO())
+
+        entree.refresh_from_db()
+        self.assertEqual(entree.word_count, 5)
+        self.assertEqual(JournalStatistics.objects.get(utilisateur=self.user).total_words, 5)
+
+
+class JournalListTests(JournalTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='writer', password='testpass123')
+        self.tag = Tag.objects.create(nom='travel', utilisateur=self.user)
+        self.other_tag = Tag.objects.create(nom='work', utilisateur=self.user)
+
+    def make_tagged(self, count):
+        for i in range(count):
+            entree = self.make_entree(titre=f'Entry {i}')
+            EntreeTag.objects.create(entree_journal=entree, tag=self.tag)
+            EntreeTag.objects.create(entree_journal=entree, tag=self.other_tag)
+            EntreeHumeur.objects.create(entree_journal=entree, humeur=self.joyeux)
+            EntreeHumeur.objects.create(entree_journal=entree, humeur=self.triste)
+
+    def test_page_query_count_is_constant(self):
+        url = reverse('core:liste_entrees_journal')
+        self.make_tagged(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        self.make_tagged(8)
+        with CaptureQueriesContext(connection) as full:
+            response = self.client.get(url)
+        self.assertEqual(len(small), len(full))
+        self.assertEqual(len(response.context['entrees']), 10)
+
+    def test_filters_do_not_duplicate_entries(self):
+        self.make_tagged(3)
+        self.make_entree(titre='Untagged')
+        entrees = journal_listing.filter_entries(self.user, tag=str(self.tag.pk), humeur=str(self.joyeux.pk))
+        self.assertEqual(entrees.count(), 3)
+        self.assertEqual(len(list(entrees)), 3)
+        self.assertEqual(journal_listing.filter_entries(self.user, tag='not-an-id').count(), 4)
@@ -0,0 +1,218 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .ai_services import AIAnalysisService, AIRecommendationService
+from .models import MemoryInsightsSnapshot, Souvenir
+from .services import emotional_calendar, memory_insights
+from .services.facets import compute_dashboard_facets
+
+User = get_user_model()
+
+
+class MemoryTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(username='memories', password='testpass123')
+
+    def make_souvenir(self, **kwargs):
+        defaults = {
+            'utilisateur': self.user,
+            'titre': 'Memory',
+            'description': 'Something happened',
+            'date_evenement': date(2024, 5, 1),
+        }
+        defaults.update(kwargs)
+        return Souvenir.objects.create(**defaults)
+
+
+class DashboardFacetsTests(MemoryTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_souvenir(emotion='joy', theme='family', is_favorite=True, date_evenement=date(2023, 3, 1))
+        self.make_souvenir(emotion='joy', theme='travel', ai_analyzed=True)
+        self.make_souvenir(emotion='sadness', theme='family', titre='Beach trip')
+
+    def test_global_counts_match_per_value_counts(self):
+        souvenirs = Souvenir.objects.filter(utilisateur=self.user)
+        with self.assertNumQueries(1):
+            facets = compute_dashboard_facets(souvenirs, {})
+
+        stats, counts = facets['stats'], facets['facet_counts']
+        self.assertEqual(stats['total_memories'], 3)
+        self.assertEqual(stats['favorites'], 1)
+        self.assertEqual((stats['analyzed'], stats['pending']), (1, 2))
+        self.assertEqual(stats['with_media'], 0)
+        self.assertEqual(counts['emotions']['joy'], {'name': 'Joy', 'count': 2})
+        self.assertEqual(counts['years'], {2024: 2, 2023: 1})
+        self.assertEqual([d.year for d in facets['available_years']], [2024, 2023])
+
+    def test_filtered_counts_ignore_their_own_facet(self):
+        souvenirs = Souvenir.objects.filter(utilisateur=self.user)
+        facets = compute_dashboard_facets(souvenirs, {'emotion': 'joy', 'annee': '2024'})
+
+        filtered = facets['facet_counts']['filtered']
+        self.assertEqual(facets['stats']['filtered_count'], 1)
+        self.assertEqual(filtered['emotions']['joy']['count'], 1)
+        self.assertEqual(filtered['emotions']['sadness']['count'], 1)
+        self.assertEqual(filtered['years'], {2024: 1, 2023: 1})
+        self.assertEqual(filtered['themes'], {'travel': {'name': 'Travel', 'count': 1}})
+
+    def test_search_uses_second_aggregation(self):
+        souvenirs = Souvenir.objects.filter(utilisateur=self.user)
+        with self.assertNumQueries(2):
+            facets = compute_dashboard_facets(souvenirs, {}, search_queryset=souvenirs.filter(titre__icontains='beach'))
+        self.assertEqual(facets['stats']['filtered_count'], 1)
+        self.assertEqual(facets['stats']['total_memories'], 3)
+
+    def test_dashboard_renders(self):
+        self.client.login(username='memories', password='testpass123')
+        response = self.client.get(reverse('core:memories_dashboard'), {'emotion': 'joy'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats']['filtered_count'], 2)
+
+
+class MemoryInsightsSnapshotTests(MemoryTestMixin, TestCase):
+    def _fresh(self):
+        return memory_insights.rebuild_snapshot(self.user)
+
+    def _assert_matches_rebuild(self):
+        snapshot = MemoryInsightsSnapshot.objects.get(utilisateur=self.user)
+        fresh = MemoryInsightsSnapshot(utilisateur=self.user)
+        for row in Souvenir.objects.filter(utilisateur=self.user).values(*memory_insights.CONTRIBUTION_FIELDS):
+            memory_insights._apply(fresh, memory_insights.contribution(row), +1)
+        for field in ('total', 'favorites', 'analyzed', 'emotion_counts', 'theme_counts',
+                      'year_counts', 'date_counts'):
+            self.assertEqual(getattr(snapshot, field), getattr(fresh, field), field)
+
+    def test_signals_keep_snapshot_in_sync(self):
+        self._fresh()
+        first = self.make_souvenir(emotion='joy', theme='family')
+        second = self.make_souvenir(emotion='sadness', theme='family', date_evenement=date(2022, 1, 2))
+        self._assert_matches_rebuild()
+
+        first.theme = 'travel'
+        first.is_favorite = True
+        first.save()
+        self._assert_matches_rebuild()
+
+        second.delete()
+        self._assert_matches_rebuild()
+        self.assertEqual(memory_insights.get_suggestion_ids(self.user, 'favorite'), [str(first.id)])
+        self.assertEqual(memory_insights.get_suggestion_ids(self.user, 'theme', theme='family'), [])
+
+    def test_version_changes_on_every_save(self):
+        souvenir = self.make_souvenir()
+        version = memory_insights.get_snapshot(self.user).version
+        souvenir.titre = 'Renamed'
+        souvenir.save()
+        self.assertGreater(memory_insights.get_snapshot(self.user).version, version)
+
+        # A save that leaves the snapshot columns alone doesn't read the stored row back
+        version = memory_insights.get_snapshot(self.user).version
+        souvenir.titre = 'Renamed again'
+        with CaptureQueriesContext(connection) as queries:
+            souvenir.save(update_fields=['titre'])
+        self.assertFalse([q['sql'] for q in queries if 'FROM "core_souvenir"' in q['sql']])
+        self.assertGreater(memory_insights.get_snapshot(self.user).version, version)
+        self._assert_matches_rebuild()
+
+    def test_insights_and_suggestions_are_read_in_one_query(self):
+        for i in range(3):
+            self.make_souvenir(theme='family', is_favorite=True, emotion='joy')
+        memory_insights.get_snapshot(self.user)
+
+        with self.assertNumQueries(1):
+            snapshot = memory_insights.get_snapshot(self.user)
+            insights = AIRecommendationService.get_memory_insights(self.user, snapshot=snapshot)
+            suggestions = AIAnalysisService.generate_album_suggestions(self.user, snapshot=snapshot)
+        with self.assertNumQueries(1):
+            ids = AIAnalysisService.get_souvenir_ids_for_suggestion(self.user, 'theme', 'family')
+        self.make_souvenir(theme='travel', date_evenement=date(2020, 5, 1))
+        suggestions.append({'type': 'year', 'year': 2020})
+        with self.assertNumQueries(1):
+            memory_insights.attach_suggestion_ids(self.user, suggestions)
+        for suggestion in suggestions:
+            self.assertEqual(suggestion['souvenir_ids'], memory_insights.get_suggestion_ids(
+                self.user, suggestion['type'], suggestion.get('theme'), suggestion.get('year')))
+        self.assertEqual(len(suggestions[-1]['souvenir_ids']), 1)
+
+        self.assertEqual(insights['total_memories'], 3)
+        self.assertEqual(insights['dominant_emotion'], 'joy')
+        self.assertEqual(insights['time_span']['span_days'], 0)
+        self.assertEqual(suggestions[0]['type'], 'theme')
+        self.assertEqual(len(ids), 3)
+
+
+class EmotionalCalendarTests(MemoryTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_souvenir(emotion='joy', date_evenement=date(2024, 3, 5))
+        self.make_souvenir(emotion='sadness', ai_emotion_detected='joy', date_evenement=date(2024, 3, 5))
+        self.make_souvenir(emotion='sadness', theme='travel', date_evenement=date(2024, 3, 9))
+        self.make_souvenir(emotion='peace', date_evenement=date(2024, 2, 1))
+
+    def test_build_year_in_one_query(self):
+        with self.assertNumQueries(1):
+            months = emotional_calendar.build_year(self.user, 2024)
+
+        march = months[2]
+        self.assertEqual(march['memory_count'], 3)
+        self.assertEqual(march['dominant_emotion'], 'Joy')
+        self.assertEqual(march['dominant_color'], emotional_calendar.EMOTION_COLORS['joy'])
+        day5 = next(d for d in march['days'] if d['date'] == '2024-03-05')
+        self.assertEqual((day5['class'], day5['emotion']), ('has-memory', 'joy'))
+        self.assertEqual(months[0]['memory_count'], 0)
+
+    def test_monthly_analytics_endpoint(self):
+        self.client.login(username='memories', password='testpass123')
+        with self.assertNumQueries(3):  # session, user, memories
+            response = self.client.get(reverse('core:calendrier_emotionnel_monthly_analytics'),
+                                       {'year': 2024, 'month': 3})
+        data = response.json()
+        self.assertEqual(data['emotion_distribution'], {'joy': 2, 'sadness': 1})
+        self.assertEqual(data['stats']['most_active_day'], 5)
+        self.assertEqual(data['stats']['change_from_prev'], 2)
+        self.assertEqual(data['stats']['change_percentage'], 200.0)
+
+    def test_calendar_page_renders(self):
+        self.client.login(username='memories', password='testpass123')
+        response = self.client.get(reverse('core:calendrier_emotionnel'), {'year': 2024})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['available_years'], [2024])
+
+
+class CalendarEventsFeedTests(MemoryTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_souvenir(titre='March', emotion='joy', description='x' * 150, date_evenement=date(2024, 3, 5))
+        self.make_souvenir(titre='April', emotion='peace', date_evenement=date(2024, 4, 2))
+        self.client.login(username='memories', password='testpass123')
+        self.url = reverse('core:calendrier_emotionnel_events')
+
+    def test_window_is_honored(self):
+        response = self.client.get(self.url, {'start': '2024-03-01T00:00:00+01:00', 'end': '2024-04-01T00:00:00+01:00'})
+        events = response.json()
+        self.assertEqual([e['title'] for e in events], ['March (joy)'])
+        self.assertEqual(events[0]['extendedProps']['description'], 'x' * 100 + '...')
+        self.assertFalse(events[0]['extendedProps']['has_media'])
+        souvenir = Souvenir.objects.get(titre='March')
+        self.assertEqual(events[0]['url'], reverse('core:detail_souvenir', kwargs={'souvenir_id': souvenir.id}))
+
+    def test_etag_round_trip(self):
+        params = {'start': '2024-03-01', 'end': '2024-04-01'}
+        response = self.client.get(self.url, params)
+        etag = response['ETag']
+
+        cached = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+
+        souvenir = Souvenir.objects.get(titre='April')
+        souvenir.titre = 'April (edited)'
+        souvenir.save()
+        fresh = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], etag)
@@ -0,0 +1,68 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import MoodAnalysis
+from .services import mood_trends
+
+User = get_user_model()
+
+
+class MoodTrendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='moody', password='testpass123')
+
+    def make_analysis(self, scores, days_ago=0):
+        analysis = MoodAnalysis.objects.create(user=self.user, text='...', top='positif', scores=scores)
+        if days_ago:
+            MoodAnalysis.objects.filter(pk=analysis.pk).update(
+                created_at=timezone.now() - timedelta(days=days_ago)
+            )
+        return analysis
+
+    def test_positivity_is_denormalized_on_save(self):
+        analysis = self.make_analysis({'positif': 0.8, 'negatif': 0.1, 'colere': 0.05, 'tristesse': 0.05})
+        self.assertAlmostEqual(analysis.positivity, 0.6)
+
+    def test_daily_series_in_one_query(self):
+        self.make_analysis({'positif': 1.0})
+        self.make_analysis({'positif': 0.0, 'tristesse': 0.5})
+        self.make_analysis({'positif': 0.4}, days_ago=3)
+        self.make_analysis({'positif': 0.9}, days_ago=40)
+
+        with self.assertNumQueries(1):
+            series = mood_trends.daily_positivity(self.user, days=7)
+
+        self.assertEqual(len(series), 7)
+        self.assertEqual(series[-1]['day'], timezone.localdate())
+        self.assertEqual(series[-1]['positivity'], 0.25)
+        self.assertEqual(series[-1]['count'], 2)
+        self.assertEqual(series[-4]['positivity'], 0.4)
+        self.assertEqual(sum(point['count'] for point in series), 3)
+
+    def test_window_bounds_follow_the_local_day(self):
+        end = date(2024, 3, 10)
+        with timezone.override('Asia/Tokyo'):
+            for day, moment in ((date(2024, 3, 4), time.min), (end, time(23, 59)), (date(2024, 3, 3), time(23, 59)),
+                                (date(2024, 3, 11), time.min)):
+                analysis = self.make_analysis({'positif': 0.5})
+                MoodAnalysis.objects.filter(pk=analysis.pk).update(
+                    created_at=timezone.make_aware(datetime.combine(day, moment)))
+            series = mood_trends.daily_positivity(self.user, days=7, end=end)
+        self.assertEqual([point['count'] for point in series], [1, 0, 0, 0, 0, 0, 1])
+
+    def test_trend_endpoint(self):
+        self.make_analysis({'positif': 0.9}, days_ago=40)
+        self.client.login(username='moody', password='testpass123')
+
+        data = self.client.get(reverse('core:mood_trend'), {'days': 365}).json()
+        self.assertEqual(data['days'], 365)
+        self.assertEqual(len(data['series']), 365)
+        self.assertEqual(sum(point['count'] for point in data['series']), 1)
+
+        # Unsupported windows fall back to the default
+        data = self.client.get(reverse('core:mood_trend'), {'days': 5000}).json()
+        self.assertEqual(data['days'], mood_trends.DEFAULT_WINDOW)
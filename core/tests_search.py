@@ -0,0 +1,74 @@
+from datetime import date
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from notes.models import Note
+from notes.search import SQLiteFTSBackend
+
+from .models import EntreeJournal, Note as CoreNote, SearchDocument, Souvenir
+from .services import search_index
+
+
+class UnifiedSearchTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='finder', password='pass')
+        other = User.objects.create_user(username='stranger', password='pass')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        self.entree = EntreeJournal.objects.create(utilisateur=self.user, titre='Harbour walk', contenu_texte='Saw a lighthouse at dusk')
+        self.souvenir = Souvenir.objects.create(
+            utilisateur=self.user, titre='Lighthouse trip', description='Family weekend', date_evenement=date(2024, 7, 1))
+        self.note = Note.objects.create(user=self.user, title='Lighthouse keepers', content='History notes')
+        EntreeJournal.objects.create(utilisateur=other, titre='Lighthouse', contenu_texte='Not mine')
+
+    def search(self, **params):
+        response = self.client.get(reverse('core:search_api'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranked_results_across_types(self):
+        self.assertIsInstance(search_index.get_backend(), SQLiteFTSBackend)
+        data = self.search(q='lighthouse')
+        types = [r['type'] for r in data['results']]
+        # Title matches first; the graph mirror of the notes-app note is not a second hit
+        self.assertEqual(sorted(types[:2]), ['memory', 'note'])
+        self.assertEqual(types[2:], ['journal'])
+        self.assertIn('<mark>lighthouse</mark>', data['results'][-1]['snippet'])
+        self.assertEqual(data['results'][-1]['url'], reverse('core:detail_entree_journal', args=[self.entree.pk]))
+
+        memories = self.search(q='lighth', types='memory')['results']
+        self.assertEqual([r['id'] for r in memories], [str(self.souvenir.pk)])
+        self.assertEqual(memories[0]['title'], '<mark>Lighthouse</mark> trip')
+
+    def test_index_follows_saves_and_deletes(self):
+        self.entree.contenu_texte = 'Only the harbour now'
+        self.entree.save()
+        self.note.is_deleted = True
+        self.note.save()
+        self.souvenir.delete()
+        self.assertEqual(self.search(q='lighthouse')['results'], [])
+
+    def test_graph_notes_without_notes_app_counterpart(self):
+        graph_note = CoreNote.objects.create(owner=self.user, title='Lighthouse map', body='')
+        self.assertTrue(Note.objects.filter(user=self.user, title=graph_note.title).exists())  # mirrored on save
+        self.assertEqual(search_index.rebuild(user_id=self.user.pk), SearchDocument.objects.filter(owner=self.user).count())
+        self.assertEqual(SearchDocument.objects.filter(owner=self.user, kind='graph_note').count(), 0)
+
+        self.note.delete()
+        graph_hits = self.search(q='keepers', types='graph_note')['results']
+        self.assertEqual([r['title'] for r in graph_hits], ['Lighthouse <mark>keepers</mark>'])
+
+    def test_pagination_and_errors(self):
+        for i in range(4):
+            EntreeJournal.objects.create(utilisateur=self.user, titre=f'Tide {i}', contenu_texte='tide tables')
+        first = self.search(q='tide', page_size=3)
+        second = self.search(q='tide', page_size=3, page=2)
+        self.assertTrue(first['has_next'])
+        self.assertFalse(second['has_next'])
+        self.assertEqual(len({r['id'] for r in first['results'] + second['results']}), 4)
+
+        self.assertEqual(self.client.get(reverse('core:search_api'), {'q': 'x', 'types': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('core:search_api'), {'q': 'x', 'page': '0'}).status_code, 400)
@@ -0,0 +1,84 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import AITask, Souvenir
+from .services import task_queue
+
+User = get_user_model()
+
+
+class AITaskQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='queue', password='testpass123')
+        self.souvenir = Souvenir.objects.create(
+            utilisateur=self.user,
+            titre='Queued memory',
+            description='A day at the beach with friends',
+            date_evenement=date(2024, 6, 1),
+        )
+
+    def test_enqueue_memory_analysis_is_deduplicated(self):
+        task, created = task_queue.enqueue_memory_analysis(self.souvenir)
+        again, created_again = task_queue.enqueue_memory_analysis(self.souvenir)
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(task.pk, again.pk)
+
+    def test_enqueue_pending_memories_covers_whole_backlog(self):
+        for i in range(12):
+            Souvenir.objects.create(
+                utilisateur=self.user, titre=f'Memory {i}',
+                description='desc', date_evenement=date(2024, 1, 1),
+            )
+        self.assertEqual(task_queue.enqueue_pending_memories(self.user), 13)
+        self.assertEqual(task_queue.enqueue_pending_memories(self.user), 0)
+
+    def test_claim_and_run_success(self):
+        task_queue.enqueue_memory_analysis(self.souvenir)
+        task = task_queue.claim_next()
+        self.assertEqual(task.status, 'running')
+        self.assertIsNone(task_queue.claim_next())
+
+        with mock.patch('core.ai_services.AIAnalysisService._analyze_text', return_value={
+            'summary': 'Beach day', 'keywords': ['beach'], 'emotion': 'joy',
+            'emotion_score': 0.9, 'confidence': 0.9,
+        }):
+            self.assertTrue(task_queue.run_task(task))
+
+        task.refresh_from_db()
+        self.souvenir.refresh_from_db()
+        self.assertEqual(task.status, 'done')
+        self.assertEqual(task.attempts, 1)
+        self.assertTrue(self.souvenir.ai_analyzed)
+
+    def test_failure_is_retried_with_backoff_then_failed(self):
+        task = task_queue.enqueue('analyze_memory', owner=self.user, souvenir=self.souvenir, max_attempts=2)
+
+        with mock.patch('core.ai_services.AIAnalysisService.analyze_memory', side_effect=RuntimeError('boom')):
+            claimed = task_queue.claim_next()
+            self.assertFalse(task_queue.run_task(claimed))
+            task.refresh_from_db()
+            self.assertEqual(task.status, 'queued')
+            self.assertGreater(task.available_at, timezone.now())
+            self.assertIsNone(task_queue.claim_next())
+
+            AITask.objects.filter(pk=task.pk).update(available_at=timezone.now())
+            self.assertFalse(task_queue.run_task(task_queue.claim_next()))
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'failed')
+        self.assertEqual(task.last_error, 'boom')
+
+    def test_status_endpoint(self):
+        task, _ = task_queue.enqueue_memory_analysis(self.souvenir)
+        self.client.login(username='queue', password='testpass123')
+        response = self.client.get(reverse('core:ai_tasks_status'), {'ids': str(task.id)})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['summary']['queued'], 1)
+        self.assertEqual(data['tasks'][0]['status'], 'queued')
@@ -3,6 +3,7 @@ from . import views
 from django.contrib.auth import views as auth_views
 from . import views_journal
 from . import views_ai
+from . import views_search
 
 app_name = 'core'
 
@@ -22,6 +23,10 @@ urlpatterns = [
     # === Mood ===
     path('mood/', views.mood, name='mood'),
     path('api/mood/analyze/', views.mood_analyze, name='mood_analyze'),
+    path('api/mood/trend/', views.mood_trend, name='mood_trend'),
+
+    # === Unified search ===
+    path('api/search/', views_search.search_api, name='search_api'),
     
     # === PASSWORD RESET ===
     path('accounts/password_reset/', auth_views.PasswordResetView.as_view(
@@ -63,6 +68,7 @@ urlpatterns = [
     
     # === AI ANALYSIS ===
     path('memories/<uuid:souvenir_id>/analyze/', views.analyser_souvenir_ia, name='analyser_souvenir_ia'),
+    path('memories/ai-tasks/status/', views.ai_tasks_status, name='ai_tasks_status'),
     
     # === TIME CAPSULES ===
     path('capsules/', views.liste_capsules, name='liste_capsules'),
@@ -83,6 +89,7 @@ urlpatterns = [
     path('exports/pdf/', views.liste_exports_pdf, name='liste_exports_pdf'),
     path('exports/pdf/create/', views.exporter_pdf, name='exporter_pdf'),
     path('exports/pdf/<int:export_id>/download/', views.telecharger_pdf, name='telecharger_pdf'),
+    path('exports/pdf/<int:export_id>/status/', views.statut_export_pdf, name='statut_export_pdf'),
         # === JOURNAL (CRUD) ===
     path('journal/', views_journal.liste_entrees_journal, name='liste_entrees_journal'),
     path('journal/add/', views_journal.ajouter_entree_journal, name='ajouter_entree_journal'),
@@ -102,6 +109,8 @@ urlpatterns = [
     
     # === EXPORT PDF ===
     path('journal/export-pdf/', views_journal.export_journal_pdf, name='export_journal_pdf'),
+    path('journal/export-pdf/<int:export_id>/status/', views_journal.statut_export_journal, name='statut_export_journal'),
+    path('journal/export-pdf/<int:export_id>/download/', views_journal.telecharger_export_journal, name='telecharger_export_journal'),
     path('journal/<int:pk>/export-pdf/', views_journal.export_entree_pdf, name='export_entree_pdf'),
     
     # === ANALYSE IA (OLD) ===
@@ -1,29 +1,70 @@
 import re
 from .models import Note, Link
+from .services import graph_analytics, graph_broadcast
+
+WIKI_LINK_RE = re.compile(r'\[\[([^\]]+)\]\]')
+
+
+def title_key(title):
+    """Normalized form of a note title, used to match [[wiki links]] case-insensitively"""
+    return (title or '').strip().casefold()
 
 
 def parse_note_links(note):
-    pattern = r'\[\[([^\]]+)\]\]'
-    matches = re.findall(pattern, note.body or '')
-    created_links = []
-    # Remove old outgoing links from this note
-    Link.objects.filter(src=note).delete()
-    for title in matches:
-        try:
-            target = Note.objects.filter(title__iexact=title.strip(), owner=note.owner).first()
-            if not target or target.id == note.id:
-                continue
-            link, created = Link.objects.get_or_create(src=note, dst=target)
-            if created:
-                created_links.append(link)
-        except Note.DoesNotExist:
-            continue
-    return created_links
+    """
+    Synchronise the outgoing 'reference' links of a note with the [[...]]
+    targets in its body.
+
+    All targets are resolved in one query on the normalized title index,
+    then only the differences with the existing links are written: one
+    delete for the removed links, one bulk insert for the new ones.
+    Returns the list of created links.
+    """
+    keys = {title_key(match) for match in WIKI_LINK_RE.findall(note.body or '')}
+    keys.discard('')
+
+    # key -> id of the oldest matching note (titles are not unique)
+    targets = {}
+    if keys:
+        candidates = (
+            Note.objects
+            .filter(owner=note.owner, title_key__in=keys)
+            .exclude(pk=note.pk)
+            .order_by('created_at')
+            .values_list('id', 'title_key')
+        )
+        for target_id, key in candidates:
+            targets.setdefault(key, target_id)
+    wanted = set(targets.values())
+
+    existing = set(
+        Link.objects.filter(src=note, kind='reference').values_list('dst_id', flat=True)
+    )
+
+    removed = existing - wanted
+    if removed:
+        Link.objects.filter(src=note, kind='reference', dst_id__in=removed).delete()
+
+    added = wanted - existing
+    created = []
+    if added:
+        created = Link.objects.bulk_create(
+            [Link(src=note, dst_id=target_id, kind='reference') for target_id in added],
+            ignore_conflicts=True,
+        )
+
+    if added or removed:
+        graph_analytics.schedule_layout(note.owner_id)
+    graph_broadcast.links_changed(
+        note.owner_id,
+        added=[(note.pk, target_id) for target_id in added],
+        removed=[(note.pk, target_id) for target_id in removed],
+    )
+    return created
 
 
 def rebuild_all_links(user):
-    total_links = 0
-    for note in Note.objects.filter(owner=user):
-        links = parse_note_links(note)
-        total_links += len(links)
-    return total_links
+    """Rebuild every reference link of a user in bulk. Returns the number of links created"""
+    from .services.graph_sync import rebuild_user_links
+
+    return rebuild_user_links(user.id)['created']
@@ -9,7 +9,9 @@ from django.http import JsonResponse, HttpResponse
 from django.urls import reverse
 from django.utils import timezone
 from django.template.loader import render_to_string
+from django.views.decorators.http import condition
 from django.conf import settings
+import hashlib
 import logging
 from io import BytesIO
 import os
@@ -18,13 +20,19 @@ import json
 from .models import (
     Note, User, Souvenir, AnalyseIASouvenir, AlbumSouvenir,
     CapsuleTemporelle, PartageSouvenir, SuiviMotivationnel, ExportPDF , HistoireInspirante,
-    DefiQuotidien,
+    DefiQuotidien, AITask,
     MoodAnalysis, MoodRecommendation
 )
 from .forms import UserCreationForm, SouvenirForm, CapsuleTemporelleForm, UserProfileForm
 from .ai_services import AIAnalysisService, AIRecommendationService
 from .mood_ai_service import MoodAIService
 from .music_recommendation_service import MusicRecommendationService
+from .services import emotional_calendar, memory_insights, mood_trends, pdf_export
+from .services.downloads import ranged_file_response
+from .services.emotional_calendar import EMOTION_COLORS
+from .services.facets import compute_dashboard_facets
+from .services.task_queue import enqueue_memory_analysis, enqueue_pending_memories, status_summary
+from .utils import title_key
 
 logger = logging.getLogger(__name__)
 
@@ -53,8 +61,9 @@ def ensure_sample_notes():
         ('Of Human Bondage', 'Classic literature sample.'),
         ('Breaking Dawn', 'Popular fiction example.'),
     ]
+    # bulk_create skips Note.save(): set the link lookup key here
     Note.objects.bulk_create([
-        Note(owner=user, title=title, body=body)
+        Note(owner=user, title=title, title_key=title_key(title), body=body)
         for title, body in samples
     ])
 
@@ -234,46 +243,8 @@ def mood(request):
         created_at__gte=thirty_days_ago
     ).values('top').annotate(count=Count('top')).order_by('-count')
     
-    # Weekly trend (last 14 days)
-    fourteen_days_ago = timezone.now() - timedelta(days=14)
-    daily_moods = []
-    
-    # Debug logging
-    logger.info(f"Mood chart for user {request.user.username}: analyzing from {fourteen_days_ago.strftime('%Y-%m-%d %H:%M')} to {timezone.now().strftime('%Y-%m-%d %H:%M')}")
-    
-    for i in range(14):
-        day = fourteen_days_ago + timedelta(days=i)
-        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        day_analyses = MoodAnalysis.objects.filter(
-            user=request.user,
-            created_at__gte=day_start,
-            created_at__lt=day_end
-        )
-        
-        if day_analyses.exists():
-            # Calculate average positivity score
-            avg_positif = sum(a.scores.get('positif', 0) for a in day_analyses) / day_analyses.count()
-            avg_negatif = sum(a.scores.get('negatif', 0) + a.scores.get('colere', 0) + a.scores.get('tristesse', 0) for a in day_analyses) / day_analyses.count()
-            positivity = avg_positif - avg_negatif
-            
-            logger.info(f"  {day.strftime('%a %Y-%m-%d')}: {day_analyses.count()} analyses, positivity={round(positivity, 2)}")
-            
-            daily_moods.append({
-                'date': day.strftime('%a'),
-                'positivity': round(positivity, 2)
-            })
-        else:
-            # Only add days with data, or use null for Chart.js to skip
-            daily_moods.append({
-                'date': day.strftime('%a'),
-                'positivity': None
-            })
-    
-    # Check if any data exists
-    has_data = any(item['positivity'] is not None for item in daily_moods)
-    logger.info(f"Mood chart has_data: {has_data}, daily_moods length: {len(daily_moods)}")
+    # Positivity trend (last 14 days, one GROUP BY query)
+    daily_moods = mood_trends.chart_points(mood_trends.daily_positivity(request.user, days=14))
     
     # Convert to JSON to ensure None becomes null
     daily_moods_json = json.dumps(daily_moods)
@@ -326,6 +297,20 @@ def mood_analyze(request):
 
     return JsonResponse({'top': top, 'scores': scores, 'recommendation': recommendation, 'source': source, 'model': model_used})
 
+
+@login_required
+def mood_trend(request):
+    """JSON endpoint: daily average positivity, ?days=7|14|30|365"""
+    days = mood_trends.parse_window(request.GET.get('days'))
+    series = mood_trends.daily_positivity(request.user, days=days)
+    return JsonResponse({
+        'days': days,
+        'series': [
+            {'date': point['day'].isoformat(), 'positivity': point['positivity'], 'count': point['count']}
+            for point in series
+        ],
+    })
+
 @login_required
 def ajouter_souvenir(request):
     """
@@ -343,15 +328,9 @@ def ajouter_souvenir(request):
                 # Save with automatic validation
                 souvenir.save()
                 
-                # Perform AI analysis automatically
-                try:
-                    AIAnalysisService.analyze_memory(souvenir)
-                    messages.success(request, f'✨ Memory "{souvenir.titre}" added successfully and analyzed by AI!')
-                except Exception as e:
-                    # Don't fail memory creation if AI analysis fails
-                    messages.success(request, f'Memory "{souvenir.titre}" added successfully!')
-                    messages.warning(request, f'⚠️ AI analysis not available: {str(e)}')
-                    logger.warning(f'AI analysis failed for new memory {souvenir.id}: {str(e)}')
+                # AI analysis runs in the background (run_ai_worker)
+                enqueue_memory_analysis(souvenir)
+                messages.success(request, f'✨ Memory "{souvenir.titre}" added successfully, AI analysis queued!')
                 
                 logger.info(f'Memory created: {souvenir.id} by user {request.user.username}')
                 
@@ -458,6 +437,18 @@ def memories_dashboard(request):
     # Get base souvenirs queryset
     souvenirs = Souvenir.objects.filter(utilisateur=request.user)
 
+    # Handle batch AI analysis
+    if request.method == 'POST' and 'analyze_all' in request.POST:
+        queued = enqueue_pending_memories(request.user)
+        if queued:
+            messages.success(request, f'✨ {queued} memories queued for AI analysis')
+        elif souvenirs.filter(ai_analyzed=False).exists():
+            messages.info(request, 'ℹ️ Pending memories are already queued for analysis')
+        else:
+            messages.info(request, 'ℹ️ No memories pending analysis')
+
+        return redirect('core:memories_dashboard')
+
     # Apply filters from GET parameters
     emotion = request.GET.get('emotion')
     theme = request.GET.get('theme')
@@ -477,15 +468,18 @@ def memories_dashboard(request):
         filtered_souvenirs = filtered_souvenirs.filter(date_evenement__year=annee)
     if favoris_only:
         filtered_souvenirs = filtered_souvenirs.filter(is_favorite=True)
+    search_souvenirs = None
     if search_query:
         # Extended full-text search
-        filtered_souvenirs = filtered_souvenirs.filter(
+        search_filter = (
             Q(titre__icontains=search_query) |
             Q(description__icontains=search_query) |
             Q(lieu__icontains=search_query) |
             Q(personnes_presentes__icontains=search_query) |
             Q(ai_tags__icontains=search_query)
         )
+        filtered_souvenirs = filtered_souvenirs.filter(search_filter)
+        search_souvenirs = souvenirs.filter(search_filter)
     if ai_status == 'analyzed':
         filtered_souvenirs = filtered_souvenirs.filter(ai_analyzed=True)
     elif ai_status == 'pending':
@@ -495,28 +489,29 @@ def memories_dashboard(request):
     analyzed_souvenirs = filtered_souvenirs.filter(ai_analyzed=True)
     pending_souvenirs = filtered_souvenirs.filter(ai_analyzed=False)
 
-    # Get AI insights
-    insights = AIRecommendationService.get_memory_insights(request.user)
+    # Get AI insights (one precomputed row per user)
+    snapshot = memory_insights.get_snapshot(request.user)
+    insights = AIRecommendationService.get_memory_insights(request.user, snapshot=snapshot)
 
     # Album suggestions
-    album_suggestions = AIAnalysisService.generate_album_suggestions(request.user)
+    album_suggestions = AIAnalysisService.generate_album_suggestions(request.user, snapshot=snapshot)
     
-    # Add souvenir IDs to suggestions for pre-selection
-    for suggestion in album_suggestions:
-        suggestion['souvenir_ids'] = AIAnalysisService.get_souvenir_ids_for_suggestion(request.user, suggestion['type'], suggestion.get('theme'), suggestion.get('year'))
+    # Add souvenir IDs to suggestions for pre-selection (one query for all)
+    memory_insights.attach_suggestion_ids(request.user, album_suggestions)
 
     # Reflection prompts
-    reflection_prompts = AIRecommendationService.suggest_reflection_prompts(request.user)
-
-    # Statistics
-    stats = {
-        'total_memories': souvenirs.count(),
-        'favorites': souvenirs.filter(is_favorite=True).count(),
-        'analyzed': souvenirs.filter(ai_analyzed=True).count(),
-        'pending': souvenirs.filter(ai_analyzed=False).count(),
-        'with_media': souvenirs.filter(photo__isnull=False).count(),
-        'filtered_count': filtered_souvenirs.count(),
-    }
+    reflection_prompts = AIRecommendationService.suggest_reflection_prompts(request.user, insights=insights)
+
+    # Statistics and facet counts, from one GROUP BY (two with a search query)
+    facets = compute_dashboard_facets(souvenirs, {
+        'emotion': emotion,
+        'theme': theme,
+        'annee': annee,
+        'favoris': favoris_only,
+        'ai_status': ai_status,
+    }, search_queryset=search_souvenirs)
+    stats = facets['stats']
+    facet_counts = facets['facet_counts']
 
     # Pagination for filtered results
     paginator = Paginator(filtered_souvenirs.order_by('-date_evenement'), 12)
@@ -524,65 +519,7 @@ def memories_dashboard(request):
     souvenirs_page = paginator.get_page(page)
 
     # Get available years for filter
-    available_years = souvenirs.dates('date_evenement', 'year', order='DESC')
-
-    # Calculate facet counts for interactive filters
-    facet_counts = {
-        'emotions': {},
-        'themes': {},
-        'years': {},
-        'ai_status': {
-            'analyzed': souvenirs.filter(ai_analyzed=True).count(),
-            'pending': souvenirs.filter(ai_analyzed=False).count(),
-        }
-    }
-
-    # Count emotions
-    for emotion_code, emotion_name in Souvenir.EMOTION_CHOICES:
-        count = souvenirs.filter(emotion=emotion_code).count()
-        if count > 0:
-            facet_counts['emotions'][emotion_code] = {
-                'name': emotion_name,
-                'count': count
-            }
-
-    # Count themes
-    for theme_code, theme_name in Souvenir.THEME_CHOICES:
-        count = souvenirs.filter(theme=theme_code).count()
-        if count > 0:
-            facet_counts['themes'][theme_code] = {
-                'name': theme_name,
-                'count': count
-            }
-
-    # Count years
-    for year in available_years:
-        count = souvenirs.filter(date_evenement__year=year.year).count()
-        facet_counts['years'][year.year] = count
-
-    # Handle batch AI analysis
-    if request.method == 'POST' and 'analyze_all' in request.POST:
-        pending = souvenirs.filter(ai_analyzed=False)
-        if not pending.exists():
-            messages.info(request, 'ℹ️ No memories pending analysis')
-        else:
-            success_count = 0
-            error_count = 0
-
-            for souvenir in pending[:10]:  # Limit to 10 at a time
-                try:
-                    AIAnalysisService.analyze_memory(souvenir)
-                    success_count += 1
-                except Exception as e:
-                    error_count += 1
-                    logger.error(f'Batch analysis failed for {souvenir.id}: {str(e)}')
-
-            if success_count > 0:
-                messages.success(request, f'✨ {success_count} memories analyzed successfully!')
-            if error_count > 0:
-                messages.warning(request, f'⚠️ {error_count} memories failed analysis')
-
-        return redirect('core:memories_dashboard')
+    available_years = facets['available_years']
 
     context = {
         # Statistics
@@ -642,65 +579,6 @@ def toggle_favori(request, souvenir_id):
     return redirect('core:detail_souvenir', souvenir_id=souvenir.id)
 
 
-# ============================================
-# EMOTIONAL CALENDAR VIEW
-# ============================================
-
-@login_required
-def calendrier_emotionnel(request):
-    """
-    Display emotional timeline view organized by year and date
-    """
-    # Get user's memories
-    souvenirs = Souvenir.objects.filter(utilisateur=request.user).order_by('-date_evenement')
-    
-    # Emotion color mapping
-    emotion_colors = {
-        'joy': '#FFD700',        # Gold
-        'sadness': '#4169E1',    # Royal Blue
-        'nostalgia': '#9370DB',  # Medium Purple
-        'gratitude': '#32CD32',  # Lime Green
-        'excitement': '#FF4500', # Orange Red
-        'peace': '#98FB98',      # Pale Green
-        'love': '#FF69B4',       # Hot Pink
-        'surprise': '#FFA500',   # Orange
-        'pride': '#DC143C',      # Crimson
-        'neutral': '#808080',    # Gray
-    }
-    
-    # Organize memories by year and month
-    memories_by_year = {}
-    
-    for souvenir in souvenirs:
-        year = souvenir.date_evenement.year
-        month = souvenir.date_evenement.strftime('%Y-%m')  # YYYY-MM format for sorting
-        
-        if year not in memories_by_year:
-            memories_by_year[year] = {}
-        
-        if month not in memories_by_year[year]:
-            memories_by_year[year][month] = []
-        
-        # Add emotion color to each memory
-        souvenir.emotion_color = emotion_colors.get(souvenir.emotion, '#808080')
-        memories_by_year[year][month].append(souvenir)
-    
-    # Sort months within each year
-    for year in memories_by_year:
-        memories_by_year[year] = dict(sorted(memories_by_year[year].items()))
-    
-    # Sort years in descending order
-    memories_by_year = dict(sorted(memories_by_year.items(), reverse=True))
-    
-    context = {
-        'memories_by_year': memories_by_year,
-        'emotion_colors': emotion_colors,
-        'total_memories': souvenirs.count(),
-    }
-    
-    return render(request, 'core/calendrier_emotionnel.html', context)
-
-
 # ============================================
 # AI ANALYSIS VIEWS
 # ============================================
@@ -717,14 +595,12 @@ def analyser_souvenir_ia(request, souvenir_id):
         messages.info(request, '🤖 This memory has already been analyzed by AI')
         return redirect('core:detail_souvenir', souvenir_id=souvenir.id)
     
-    try:
-        # Perform AI analysis
-        analyse = AIAnalysisService.analyze_memory(souvenir)
-        messages.success(request, '✨ Memory successfully enriched with AI analysis!')
-        logger.info(f'AI analysis completed for memory {souvenir_id}')
-    except Exception as e:
-        messages.error(request, f'❌ Error during analysis: {str(e)}')
-        logger.error(f'AI analysis failed for memory {souvenir_id}: {str(e)}')
+    task, created = enqueue_memory_analysis(souvenir)
+    if created:
+        messages.success(request, '✨ AI analysis queued, results will appear shortly')
+        logger.info(f'AI analysis queued for memory {souvenir_id} (task {task.id})')
+    else:
+        messages.info(request, '🤖 AI analysis already in progress for this memory')
     
     return redirect('core:detail_souvenir', souvenir_id=souvenir.id)
 
@@ -771,34 +647,38 @@ def analyser_tout_ia(request):
     if request.method != 'POST':
         return redirect('core:galerie_ia')
     
-    pending = Souvenir.objects.filter(
-        utilisateur=request.user,
-        ai_analyzed=False
-    )
-    
-    if not pending.exists():
+    queued = enqueue_pending_memories(request.user)
+    if queued:
+        messages.success(request, f'✨ {queued} memories queued for AI analysis')
+    else:
         messages.info(request, 'ℹ️ No memories pending analysis')
-        return redirect('core:galerie_ia')
-    
-    success_count = 0
-    error_count = 0
-    
-    for souvenir in pending[:10]:  # Limit to 10 at a time
-        try:
-            AIAnalysisService.analyze_memory(souvenir)
-            success_count += 1
-        except Exception as e:
-            error_count += 1
-            logger.error(f'Batch analysis failed for {souvenir.id}: {str(e)}')
-    
-    if success_count > 0:
-        messages.success(request, f'✨ {success_count} memories analyzed successfully!')
-    if error_count > 0:
-        messages.warning(request, f'⚠️ {error_count} memories failed analysis')
     
     return redirect('core:galerie_ia')
 
 
+@login_required
+def ai_tasks_status(request):
+    """
+    JSON polling endpoint for queued AI tasks.
+    ?ids=1,2,3 returns those tasks, otherwise the user's latest ones.
+    """
+    tasks = AITask.objects.filter(owner=request.user)
+    ids = request.GET.get('ids')
+    if ids:
+        try:
+            tasks = tasks.filter(id__in=[int(i) for i in ids.split(',') if i])
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid ids'}, status=400)
+    else:
+        tasks = tasks.order_by('-created_at')[:20]
+
+    return JsonResponse({
+        'success': True,
+        'summary': status_summary(request.user),
+        'tasks': [task.to_dict() for task in tasks],
+    })
+
+
 # ============================================
 # TIME CAPSULE VIEWS
 # ============================================
@@ -856,13 +736,8 @@ def creer_capsule(request):
                 souvenir.utilisateur = request.user
                 souvenir.save()
                 
-                # Perform AI analysis automatically (like in ajouter_souvenir)
-                try:
-                    AIAnalysisService.analyze_memory(souvenir)
-                    messages.success(request, f'✨ Memory analyzed with AI!')
-                except Exception as e:
-                    messages.warning(request, f'⚠️ AI analysis failed: {str(e)}')
-                    logger.warning(f'AI analysis failed for capsule memory {souvenir.id}: {str(e)}')
+                # AI analysis runs in the background (like in ajouter_souvenir)
+                enqueue_memory_analysis(souvenir)
                 
                 # Create capsule
                 message_futur = form.cleaned_data.get('message_futur', '').strip()
@@ -1332,7 +1207,8 @@ def exporter_pdf(request):
         # Get export parameters from POST data
         titre_export = request.POST.get('titre_export', f'My Memories - {timezone.now().strftime("%Y-%m-%d")}')
         souvenir_ids = request.POST.getlist('souvenirs[]')
-        inclure_photos = request.POST.get('inclure_photos', 'true').lower() == 'true'
+        # Checkbox sends 'on'; JS callers may send 'true'/'false'
+        inclure_photos = request.POST.get('inclure_photos', 'true').lower() in ('true', 'on', '1')
         style_template = request.POST.get('style_template', 'modern')
         
         if not souvenir_ids:
@@ -1347,41 +1223,23 @@ def exporter_pdf(request):
         if not souvenirs.exists():
             return JsonResponse({'error': 'No valid memories found'}, status=400)
         
-        # Create export record
-        export_pdf = ExportPDF.objects.create(
-            utilisateur=request.user,
-            titre_export=titre_export,
+        # Generated by the background worker (run_ai_worker)
+        export_pdf, _ = pdf_export.start_export(
+            request.user,
+            souvenirs,
+            titre_export,
             inclure_photos=inclure_photos,
             style_template=style_template,
-            status='processing'
         )
         
-        # Add souvenirs to export
-        export_pdf.souvenirs.set(souvenirs)
-        
-        # Generate PDF asynchronously (for now, do it synchronously)
-        try:
-            pdf_buffer = generate_pdf_content(export_pdf)
-            
-            # Save PDF file
-            filename = f"memories_export_{export_pdf.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            export_pdf.fichier_pdf.save(filename, pdf_buffer)
-            export_pdf.status = 'ready'
-            export_pdf.nombre_pages = 1  # We'll calculate this properly later
-            export_pdf.save()
-            
-            return JsonResponse({
-                'success': True,
-                'export_id': export_pdf.id,
-                'download_url': reverse('core:telecharger_pdf', args=[export_pdf.id]),
-                'message': f'PDF export "{titre_export}" created successfully!'
-            })
-            
-        except Exception as e:
-            export_pdf.status = 'error'
-            export_pdf.save()
-            logger.error(f'PDF generation failed for export {export_pdf.id}: {str(e)}')
-            return JsonResponse({'error': f'PDF generation failed: {str(e)}'}, status=500)
+        return JsonResponse({
+            'success': True,
+            'export_id': export_pdf.id,
+            'status': export_pdf.status,
+            'status_url': reverse('core:statut_export_pdf', args=[export_pdf.id]),
+            'download_url': reverse('core:telecharger_pdf', args=[export_pdf.id]),
+            'message': f'PDF export "{titre_export}" started'
+        }, status=202)
     
     except Exception as e:
         logger.error(f'PDF export creation failed: {str(e)}')
@@ -1404,10 +1262,29 @@ def telecharger_pdf(request, export_id):
         messages.error(request, 'PDF file not found')
         return redirect('core:memories_dashboard')
     
-    # Return PDF file
-    response = HttpResponse(export_pdf.fichier_pdf.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{export_pdf.titre_export}.pdf"'
-    return response
+    # Streamed from storage, with Range support
+    return ranged_file_response(
+        request,
+        export_pdf.fichier_pdf,
+        f'{export_pdf.titre_export}.pdf',
+        content_type='application/pdf',
+    )
+
+
+@login_required
+def statut_export_pdf(request, export_id):
+    """
+    JSON status of a PDF export, polled while the worker generates it
+    """
+    export_pdf = get_object_or_404(ExportPDF, id=export_id, utilisateur=request.user)
+    return JsonResponse({
+        'export_id': export_pdf.id,
+        'status': export_pdf.status,
+        'progress': export_pdf.progress,
+        'nombre_pages': export_pdf.nombre_pages,
+        'error': export_pdf.message_erreur if export_pdf.status == 'error' else '',
+        'download_url': reverse('core:telecharger_pdf', args=[export_pdf.id]) if export_pdf.status == 'ready' else None,
+    })
 
 
 @login_required
@@ -1424,9 +1301,6 @@ def calendrier_emotionnel(request):
     """
     Display emotional calendar with yearly overview and monthly detail views
     """
-    # Get user's memories
-    souvenirs = Souvenir.objects.filter(utilisateur=request.user)
-    
     # Get selected year from URL parameter, default to current year
     selected_year = request.GET.get('year')
     if selected_year:
@@ -1440,111 +1314,15 @@ def calendrier_emotionnel(request):
     else:
         selected_year = timezone.now().year
     
-    # Get all available years for navigation
-    available_years = souvenirs.values_list('date_evenement__year', flat=True).distinct().order_by('-date_evenement__year')
-    available_years = list(available_years)
-    
-    # Emotion color mapping with pastel tones
-    emotion_colors = {
-        'joy': '#FEF3C7',        # Soft yellow
-        'sadness': '#DBEAFE',    # Soft blue
-        'nostalgia': '#E9D5FF',  # Soft purple
-        'gratitude': '#D1FAE5',  # Soft green
-        'excitement': '#FED7AA', # Soft orange
-        'peace': '#F0FDF4',      # Very soft green
-        'love': '#FCE7F3',       # Soft pink
-        'surprise': '#FEF3C7',   # Soft yellow
-        'pride': '#FEE2E2',      # Soft red
-        'anger': '#FEE2E2',      # Soft red
-        'stress': '#FEF3C7',     # Soft yellow
-        'calm': '#F0FDF4',       # Very soft green
-        'neutral': '#F9FAFB',    # Light gray
-    }
-    yearly_data = []
-    
-    for month in range(12):
-        month_data = {
-            'month': month,
-            'year': selected_year,
-            'month_name': ['January', 'February', 'March', 'April', 'May', 'June',
-                          'July', 'August', 'September', 'October', 'November', 'December'][month],
-            'days': [],
-            'memory_count': 0,
-            'dominant_emotion': 'No data',
-            'dominant_color': '#f3f4f6'
-        }
-        
-        # Get memories for this month
-        month_memories = souvenirs.filter(
-            date_evenement__year=selected_year,
-            date_evenement__month=month + 1
-        )
-        
-        month_data['memory_count'] = month_memories.count()
-        
-        # Calculate emotion distribution for the month
-        emotion_counts = {}
-        for memory in month_memories:
-            emotion = memory.ai_emotion_detected if memory.ai_emotion_detected else memory.emotion
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
-        if emotion_counts:
-            dominant_emotion = max(emotion_counts.keys(), key=lambda x: emotion_counts[x])
-            month_data['dominant_emotion'] = dominant_emotion.title()
-            month_data['dominant_color'] = emotion_colors.get(dominant_emotion, '#f3f4f6')
-        
-        # Generate mini calendar days
-        import calendar
-        from datetime import date
-        
-        cal = calendar.monthcalendar(selected_year, month + 1)
-        day_emotions = {}
-        
-        # Map memories to days
-        for memory in month_memories:
-            day = memory.date_evenement.day
-            emotion = memory.ai_emotion_detected if memory.ai_emotion_detected else memory.emotion
-            if day not in day_emotions:
-                day_emotions[day] = []
-            day_emotions[day].append(emotion)
-        
-        # Create day data for mini calendar
-        for week in cal:
-            for day_num in week:
-                if day_num == 0:
-                    # Empty day from previous/next month
-                    month_data['days'].append({
-                        'class': 'empty',
-                        'color': '#f9fafb',
-                        'date': '',
-                        'emotion': None
-                    })
-                else:
-                    emotions = day_emotions.get(day_num, [])
-                    if emotions:
-                        # Use the most common emotion for the day
-                        emotion_counts = {}
-                        for emotion in emotions:
-                            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-                        dominant_day_emotion = max(emotion_counts.keys(), key=lambda x: emotion_counts[x])
-                        color = emotion_colors.get(dominant_day_emotion, '#f9fafb')
-                        day_class = 'has-memory'
-                    else:
-                        color = '#f9fafb'
-                        day_class = 'empty'
-                        dominant_day_emotion = None
-                    
-                    month_data['days'].append({
-                        'class': day_class,
-                        'color': color,
-                        'date': f"{selected_year}-{month+1:02d}-{day_num:02d}",
-                        'emotion': dominant_day_emotion
-                    })
-        
-        yearly_data.append(month_data)
+    # Get all available years for navigation (precomputed per user)
+    snapshot = memory_insights.get_snapshot(request.user)
+    available_years = sorted((int(year) for year in snapshot.year_counts), reverse=True)
+    
+    # One query for the whole year
+    yearly_data = emotional_calendar.build_year(request.user, selected_year)
     
     context = {
-        'emotion_colors': emotion_colors,
+        'emotion_colors': EMOTION_COLORS,
         'yearly_data': yearly_data,
         'selected_year': selected_year,
         'available_years': available_years,
@@ -1554,51 +1332,26 @@ def calendrier_emotionnel(request):
     return render(request, 'core/calendrier_emotionnel.html', context)
 
 
+def _calendar_events_etag(request):
+    """ETag = per-user memory version + requested window"""
+    if not request.user.is_authenticated:
+        return None
+    version = memory_insights.get_snapshot(request.user).version
+    key = f"{request.user.pk}:{version}:{request.GET.get('start', '')}:{request.GET.get('end', '')}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
 @login_required
+@condition(etag_func=_calendar_events_etag)
 def calendrier_emotionnel_events(request):
     """
-    Return JSON events for FullCalendar
-    """
-    # Emotion color mapping - therapeutic pastel colors
-    emotion_colors = {
-        'joy': '#FEF3C7',        # Soft yellow
-        'sadness': '#DBEAFE',    # Soft blue
-        'nostalgia': '#E9D5FF',  # Soft purple
-        'gratitude': '#D1FAE5',  # Soft green
-        'excitement': '#FED7AA', # Soft orange
-        'peace': '#F0FDF4',      # Very soft green
-        'love': '#FCE7F3',       # Soft pink
-        'surprise': '#FEF3C7',   # Soft yellow
-        'pride': '#FEE2E2',      # Soft red
-        'anger': '#FEE2E2',      # Soft red
-        'stress': '#FEF3C7',     # Soft yellow
-        'calm': '#F0FDF4',       # Very soft green
-        'neutral': '#F9FAFB',    # Soft gray
-    }
-    
-    # Get user's memories
-    souvenirs = Souvenir.objects.filter(utilisateur=request.user)
-    
-    events = []
-    for souvenir in souvenirs:
-        # Use AI-detected emotion if available, otherwise use user emotion
-        emotion = souvenir.ai_emotion_detected if souvenir.ai_emotion_detected else souvenir.emotion
-        color = emotion_colors.get(emotion, '#808080')  # Default to gray
-        
-        events.append({
-            'title': f"{souvenir.titre} ({emotion})",
-            'start': souvenir.date_evenement.isoformat(),
-            'backgroundColor': color,
-            'borderColor': color,
-            'textColor': '#000000',
-            'url': reverse('core:detail_souvenir', kwargs={'souvenir_id': souvenir.id}),
-            'extendedProps': {
-                'emotion': emotion,
-                'description': souvenir.description[:100] + '...' if len(souvenir.description) > 100 else souvenir.description,
-                'has_media': souvenir.has_media,
-            }
-        })
-    
+    Return JSON events for FullCalendar, restricted to the visible
+    start/end window. Answers 304 when the client's ETag is current.
+    """
+    start = emotional_calendar.parse_range_bound(request.GET.get('start'))
+    end = emotional_calendar.parse_range_bound(request.GET.get('end'))
+
+    events = emotional_calendar.events_in_range(request.user, start, end)
     return JsonResponse(events, safe=False)
 
 
@@ -1618,26 +1371,9 @@ def calendrier_emotionnel_day_memories(request):
         # Get memories for this specific day
         memories = Souvenir.objects.filter(
             utilisateur=request.user,
-            date_evenement__date=date
+            date_evenement=date
         ).order_by('-date_evenement')
         
-        # Emotion color mapping
-        emotion_colors = {
-            'joy': '#FEF3C7',
-            'sadness': '#DBEAFE',
-            'nostalgia': '#E9D5FF',
-            'gratitude': '#D1FAE5',
-            'excitement': '#FED7AA',
-            'peace': '#F0FDF4',
-            'love': '#FCE7F3',
-            'surprise': '#FEF3C7',
-            'pride': '#FEE2E2',
-            'anger': '#FEE2E2',
-            'stress': '#FEF3C7',
-            'calm': '#F0FDF4',
-            'neutral': '#F9FAFB',
-        }
-        
         memories_data = []
         for memory in memories:
             emotion = memory.ai_emotion_detected if memory.ai_emotion_detected else memory.emotion
@@ -1678,133 +1414,9 @@ def calendrier_emotionnel_monthly_analytics(request):
         month = int(month)
         year = int(year)
         
-        # Get memories for this month
-        month_memories = Souvenir.objects.filter(
-            utilisateur=request.user,
-            date_evenement__year=year,
-            date_evenement__month=month
-        )
-        
-        # Calculate emotion distribution
-        emotion_distribution = {}
-        theme_distribution = {}
-        daily_activity = {}
-        
-        for memory in month_memories:
-            emotion = memory.ai_emotion_detected if memory.ai_emotion_detected else memory.emotion
-            emotion_distribution[emotion] = emotion_distribution.get(emotion, 0) + 1
-            
-            # Track themes if available
-            if memory.theme:
-                theme_distribution[memory.theme] = theme_distribution.get(memory.theme, 0) + 1
-            
-            # Track daily activity
-            day = memory.date_evenement.day
-            daily_activity[day] = daily_activity.get(day, 0) + 1
-        
-        # Calculate stats
-        total_memories = month_memories.count()
-        days_with_memories = len(daily_activity)
-        
-        # Calculate month length for activity metrics
-        import calendar
-        month_length = calendar.monthrange(year, month)[1]
-        
-        # Memory frequency (memories per active day)
-        memory_frequency = total_memories / days_with_memories if days_with_memories > 0 else 0
-        
-        # Most active day
-        most_active_day = max(daily_activity.keys(), key=lambda x: daily_activity[x]) if daily_activity else None
-        
-        # Emotion diversity (number of different emotions used)
-        emotion_diversity = len(emotion_distribution)
-        
-        # Dominant emotion
-        dominant_emotion = 'No data'
-        dominant_emotion_count = 0
-        if emotion_distribution:
-            dominant_emotion = max(emotion_distribution.keys(), key=lambda x: emotion_distribution[x])
-            dominant_emotion_count = emotion_distribution[dominant_emotion]
-            dominant_emotion = dominant_emotion.title()
-        
-        # Dominant theme
-        dominant_theme = 'No data'
-        if theme_distribution:
-            dominant_theme = max(theme_distribution.keys(), key=lambda x: theme_distribution[x])
-            dominant_theme = dominant_theme.title()
-        
-        # Calculate activity level
-        activity_percentage = (days_with_memories / month_length) * 100
-        
-        # Get previous month data for comparison
-        prev_month = month - 1 if month > 1 else 12
-        prev_year = year if month > 1 else year - 1
-        
-        prev_month_memories = Souvenir.objects.filter(
-            utilisateur=request.user,
-            date_evenement__year=prev_year,
-            date_evenement__month=prev_month
-        )
-        prev_month_count = prev_month_memories.count()
-        
-        # Calculate change from previous month
-        change_from_prev = total_memories - prev_month_count
-        change_percentage = ((total_memories - prev_month_count) / prev_month_count * 100) if prev_month_count > 0 else 0
-        
-        stats = {
-            'total_memories': total_memories,
-            'days_with_memories': days_with_memories,
-            'dominant_emotion': dominant_emotion,
-            'dominant_emotion_count': dominant_emotion_count,
-            'dominant_theme': dominant_theme,
-            'memory_frequency': round(memory_frequency, 1),
-            'most_active_day': most_active_day,
-            'emotion_diversity': emotion_diversity,
-            'activity_percentage': round(activity_percentage, 1),
-            'change_from_prev': change_from_prev,
-            'change_percentage': round(change_percentage, 1),
-            'month_length': month_length,
-        }
-        
-        return JsonResponse({
-            'emotion_distribution': emotion_distribution,
-            'theme_distribution': theme_distribution,
-            'daily_activity': daily_activity,
-            'stats': stats
-        })
+        # Current and previous month in one query
+        return JsonResponse(emotional_calendar.month_analytics(request.user, year, month))
         
     except Exception as e:
         logger.error(f'Error fetching monthly analytics: {str(e)}')
         return JsonResponse({'error': 'Failed to fetch analytics'}, status=500)
-
-
-def generate_pdf_content(export_pdf):
-    """
-    Generate PDF content using xhtml2pdf
-    """
-    from xhtml2pdf import pisa
-    from io import BytesIO
-    
-    # Get souvenirs with related data
-    souvenirs = export_pdf.souvenirs.all().prefetch_related('analyse_ia').order_by('-date_evenement')
-    
-    # Prepare context for template
-    context = {
-        'export': export_pdf,
-        'souvenirs': souvenirs,
-        'user': export_pdf.utilisateur,
-        'generated_at': timezone.now(),
-    }
-    
-    # Render HTML template
-    html_content = render_to_string('core/pdf_export_template.html', context)
-    
-    # Create PDF
-    pdf_buffer = BytesIO()
-    pisa_status = pisa.CreatePDF(html_content, dest=pdf_buffer)
-    
-    if pisa_status.err:
-        raise Exception('PDF generation failed')
-    
-    pdf_buffer.seek(0)
-    return pdf_buffer
\ No newline at end of file
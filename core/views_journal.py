@@ -7,13 +7,16 @@ from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from django.http import JsonResponse, HttpResponse
+from django.urls import reverse
 from django.utils import timezone
 from django.template.loader import render_to_string
 from io import BytesIO
 import json
 
-from .models import EntreeJournal, Tag, Humeur, EntreeTag, EntreeHumeur
+from .models import EntreeJournal, JournalExport, Tag, Humeur, EntreeTag, EntreeHumeur
 from .forms import EntreeJournalForm, TagForm
+from .services import journal_export, journal_listing, journal_stats
+from .services.downloads import ranged_file_response
 from .services.ai_service import get_ai_service
 
 # Import for PDF generation
@@ -37,30 +40,18 @@ def liste_entrees_journal(request):
     """
     List all user's journal entries with filtering
     """
-    entrees = EntreeJournal.objects.filter(utilisateur=request.user).order_by('-date_creation')
-    
-    # Filtrage par tag
     tag_id = request.GET.get('tag')
-    if tag_id:
-        entrees = entrees.filter(entree_tags__tag_id=tag_id)
-    
-    # Filtrage par humeur
     humeur_id = request.GET.get('humeur')
-    if humeur_id:
-        entrees = entrees.filter(entree_humeurs__humeur_id=humeur_id)
-    
-    # Filtrage par favoris
-    if request.GET.get('favorites') == 'true':
-        entrees = entrees.filter(is_favorite=True)
-    
-    # Recherche
     query = request.GET.get('q')
-    if query:
-        entrees = entrees.filter(
-            Q(titre__icontains=query) | 
-            Q(contenu_texte__icontains=query) |
-            Q(lieu__icontains=query)
-        )
+    
+    # Filtres par EXISTS, tags et humeurs préchargés (voir core.services.journal_listing)
+    entrees = journal_listing.filter_entries(
+        request.user,
+        tag=tag_id,
+        humeur=humeur_id,
+        favorites=request.GET.get('favorites') == 'true',
+        query=query,
+    )
     
     # Pagination
     paginator = Paginator(entrees, 10)
@@ -331,55 +322,17 @@ def statistiques_journal(request):
     """
     Display user's journal statistics
     """
-    from datetime import timedelta
-    from django.utils import timezone
+    stats = journal_stats.get_stats(request.user)
     
-    entrees = EntreeJournal.objects.filter(utilisateur=request.user)
-    
-    # Statistiques générales
-    total_entrees = entrees.count()
-    total_mots = sum(entree.nombre_mots for entree in entrees)
-    entrees_favorites = entrees.filter(is_favorite=True).count()
+    # Statistiques générales (pré-calculées, voir core.services.journal_stats)
+    total_entrees = stats.total_entries
+    total_mots = stats.total_words
+    entrees_favorites = stats.favorites
     moyenne_mots = round(total_mots / total_entrees) if total_entrees > 0 else 0
     
-    # Calculate writing streak
-    current_streak = 0
-    longest_streak = 0
-    temp_streak = 0
-    
-    if total_entrees > 0:
-        # Obtenir toutes les dates uniques d'entrées, triées
-        dates_entrees = entrees.values_list('date_creation__date', flat=True).distinct().order_by('-date_creation__date')
-        dates_list = list(dates_entrees)
-        
-        if dates_list:
-            # Calculer la série actuelle
-            today = timezone.now().date()
-            yesterday = today - timedelta(days=1)
-            
-            if dates_list[0] == today or dates_list[0] == yesterday:
-                current_streak = 1
-                last_date = dates_list[0]
-                
-                for date in dates_list[1:]:
-                    if (last_date - date).days == 1:
-                        current_streak += 1
-                        last_date = date
-                    else:
-                        break
-            
-            # Calculer la série la plus longue
-            temp_streak = 1
-            longest_streak = 1
-            last_date = dates_list[0]
-            
-            for date in dates_list[1:]:
-                if (last_date - date).days == 1:
-                    temp_streak += 1
-                    longest_streak = max(longest_streak, temp_streak)
-                else:
-                    temp_streak = 1
-                last_date = date
+    # Writing streaks
+    current_streak = journal_stats.current_streak(stats)
+    longest_streak = stats.longest_streak
     
     # Tags les plus utilisés
     tags_populaires = Tag.objects.filter(
@@ -389,43 +342,20 @@ def statistiques_journal(request):
     ).order_by('-nb_utilisations')[:10]
     
     # Humeurs les plus fréquentes
-    humeurs_frequentes = Humeur.objects.filter(
-        entree_humeurs__entree_journal__utilisateur=request.user
-    ).annotate(
-        nb_utilisations=Count('entree_humeurs')
-    ).order_by('-nb_utilisations')[:10]
+    top_humeurs = sorted(stats.mood_counts.items(), key=lambda item: -item[1])[:10]
+    humeurs_par_id = Humeur.objects.in_bulk([int(humeur_id) for humeur_id, _ in top_humeurs])
+    humeurs_frequentes = []
+    for humeur_id, nb in top_humeurs:
+        humeur = humeurs_par_id.get(int(humeur_id))
+        if humeur:
+            humeur.nb_utilisations = nb
+            humeurs_frequentes.append(humeur)
     
     # Entrées récentes
-    entrees_recentes = entrees.order_by('-date_creation')[:5]
+    entrees_recentes = EntreeJournal.objects.filter(utilisateur=request.user).order_by('-date_creation')[:5]
     
     # Données pour le graphique d'évolution temporelle (30 derniers jours)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    entrees_recentes_30j = entrees.filter(date_creation__gte=thirty_days_ago).order_by('date_creation')
-    
-    # Préparer les données pour le graphique
-    timeline_data = []
-    for i in range(30):
-        date = (timezone.now() - timedelta(days=29-i)).date()
-        entries_on_date = entrees_recentes_30j.filter(date_creation__date=date)
-        
-        # Compter les humeurs positives vs négatives
-        positive_moods = ['Joyeux', 'Excité', 'Calme', 'Reconnaissant', 'Inspiré']
-        negative_moods = ['Triste', 'Anxieux', 'En colère', 'Frustré', 'Fatigué']
-        
-        positive_count = 0
-        negative_count = 0
-        
-        for entry in entries_on_date:
-            humeurs = [eh.humeur.nom for eh in entry.entree_humeurs.all()]
-            positive_count += sum(1 for h in humeurs if h in positive_moods)
-            negative_count += sum(1 for h in humeurs if h in negative_moods)
-        
-        timeline_data.append({
-            'date': date.strftime('%d/%m'),
-            'positive': positive_count,
-            'negative': negative_count,
-            'entries': entries_on_date.count()
-        })
+    timeline_data = journal_stats.timeline(stats)
     
     context = {
         'total_entrees': total_entrees,
@@ -448,37 +378,60 @@ def statistiques_journal(request):
 @login_required
 def export_journal_pdf(request):
     """
-    Export all journal entries to PDF
+    Start the export of all journal entries to PDF (generated by the
+    background worker, see core.services.journal_export)
     """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
     if not PDF_AVAILABLE:
-        messages.error(request, 'PDF export not available. Please install xhtml2pdf.')
-        return redirect('core:statistiques_journal')
+        return JsonResponse({'error': 'PDF export not available. Please install xhtml2pdf.'}, status=503)
     
-    entrees = EntreeJournal.objects.filter(utilisateur=request.user).order_by('-date_creation')
+    export, _ = journal_export.start_journal_export(request.user)
     
-    # Prepare context for template
-    context = {
-        'entrees': entrees,
-        'user': request.user,
-        'date_export': timezone.now(),
-        'total_entrees': entrees.count(),
-        'total_mots': sum(e.nombre_mots for e in entrees),
-    }
-    
-    # Generate HTML
-    html_string = render_to_string('core/journal/pdf_template.html', context)
-    
-    # Create PDF
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html_string.encode("UTF-8")), result)
+    return JsonResponse({
+        'success': True,
+        'export_id': export.id,
+        'status': export.status,
+        'status_url': reverse('core:statut_export_journal', args=[export.id]),
+        'download_url': reverse('core:telecharger_export_journal', args=[export.id]),
+    }, status=202)
+
+
+@login_required
+def statut_export_journal(request, export_id):
+    """
+    JSON status of a journal PDF export, polled while the worker generates it
+    """
+    export = get_object_or_404(JournalExport, id=export_id, utilisateur=request.user)
+    return JsonResponse({
+        'export_id': export.id,
+        'status': export.status,
+        'progress': export.progress,
+        'nombre_entrees': export.nombre_entrees,
+        'nombre_pages': export.nombre_pages,
+        'error': export.message_erreur if export.status == 'error' else '',
+        'download_url': reverse('core:telecharger_export_journal', args=[export.id]) if export.status == 'ready' else None,
+    })
+
+
+@login_required
+def telecharger_export_journal(request, export_id):
+    """
+    Download a completed journal PDF export
+    """
+    export = get_object_or_404(JournalExport, id=export_id, utilisateur=request.user, status='ready')
     
-    if not pdf.err:
-        response = HttpResponse(result.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="my-journal-{timezone.now().strftime("%Y-%m-%d")}.pdf"'
-        return response
+    if not export.fichier_pdf:
+        messages.error(request, 'PDF file not found')
+        return redirect('core:statistiques_journal')
     
-    messages.error(request, 'Error generating PDF.')
-    return redirect('core:statistiques_journal')
+    # Streamed from storage, with Range support
+    return ranged_file_response(
+        request,
+        export.fichier_pdf,
+        f'my-journal-{export.date_export.strftime("%Y-%m-%d")}.pdf',
+        content_type='application/pdf',
+    )
 
 
 @login_required
@@ -0,0 +1,33 @@
+"""
+Recherche unifiée (journal, souvenirs, notes, notes du graphe)
+"""
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from .services import search_index
+
+
+@login_required
+@require_http_methods(["GET"])
+def search_api(request):
+    """
+    GET /api/search/?q=...&types=journal,memory&page=1&page_size=20
+    Résultats classés et surlignés (<mark>), tous types confondus
+    """
+    query = request.GET.get('q', '').strip()
+    kinds = [kind for kind in request.GET.get('types', '').split(',') if kind]
+    unknown = [kind for kind in kinds if kind not in search_index.SOURCES]
+    if unknown:
+        return JsonResponse({'error': f"Unknown types: {', '.join(unknown)}"}, status=400)
+    try:
+        page = int(request.GET.get('page', 1))
+        page_size = int(request.GET.get('page_size', search_index.PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'error': 'page and page_size must be integers'}, status=400)
+    if page < 1:
+        return JsonResponse({'error': 'page must be positive'}, status=400)
+
+    data = search_index.search(request.user, query, kinds or None, page, page_size)
+    data['query'] = query
+    return JsonResponse(data)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class NotesConfig(AppConfig):
+    name = 'notes'
+
+    def ready(self):
+        # Import signal handlers
+        import notes.signals  # noqa: F401
@@ -0,0 +1,175 @@
+"""Delta autosave for notes-app notes.
+
+The editor sends the changes since the version it last saw:
+
+    {"base_version": 12, "patches": [{"start": 40, "end": 45, "text": "world"}],
+     "title": "...", "flush": false}
+
+Patches replace content[start:end] (code point offsets) and are applied in
+order. A full {"content": ...} is still accepted (older clients, conflict
+resolution).
+
+Accepted changes are buffered per note in the cache (the draft) and written
+to the database at most every NOTES_AUTOSAVE_FLUSH_SECONDS, or when the
+client asks for a flush (blur, leaving the page, explicit save). Requests
+that change nothing are not written at all.
+
+Each accepted change bumps Note.version. A request based on another
+version (another tab saved in the meantime) is refused with the current
+state so the client can rebase. The database write itself is
+compare-and-swap on the version, so drafts buffered in different processes
+(non shared cache) cannot overwrite each other either.
+"""
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Note
+
+DRAFT_TIMEOUT = 60 * 60
+LOCK_TIMEOUT = 5
+
+
+def flush_interval():
+    return getattr(settings, 'NOTES_AUTOSAVE_FLUSH_SECONDS', 5)
+
+
+class InvalidPatch(ValueError):
+    pass
+
+
+class AutosaveConflict(Exception):
+    """The client edited an older version of the note"""
+
+    def __init__(self, state):
+        super().__init__('Note was modified elsewhere')
+        self.state = state
+
+
+def apply_patches(content, patches):
+    """Apply [{'start', 'end', 'text'}] splices in order. Raises InvalidPatch"""
+    for patch in patches:
+        try:
+            start, end, text = int(patch['start']), int(patch['end']), str(patch.get('text', ''))
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidPatch('Patches need integer start/end and a text') from e
+        if not 0 <= start <= end <= len(content):
+            raise InvalidPatch(f'Patch range {start}:{end} outside content of length {len(content)}')
+        content = content[:start] + text + content[end:]
+    return content
+
+
+def _draft_key(note_id):
+    return f'notes:autosave:draft:{note_id}'
+
+
+@contextmanager
+def _locked(note_id):
+    """Serialize autosaves of one note (cache.add is atomic)"""
+    key = f'notes:autosave:lock:{note_id}'
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not cache.add(key, 1, LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            break  # stale lock from a dead process
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def _state_from_note(note):
+    return {
+        'version': note.version,
+        'db_version': note.version,
+        'title': note.title,
+        'content': note.content,
+        'dirty': False,
+        'flushed_at': 0.0,
+    }
+
+
+def current_state(note, db_version=None):
+    """
+    Latest state of the note: the buffered draft if any, else the database.
+    db_version: version currently in the database, when `note` may be stale
+    """
+    if db_version is not None and db_version != note.version:
+        note.refresh_from_db()
+    draft = cache.get(_draft_key(note.pk))
+    if draft and draft['db_version'] == note.version:
+        return draft
+    return _state_from_note(note)
+
+
+def discard_draft(note):
+    """Forget the buffered draft"""
+    cache.delete(_draft_key(note.pk))
+
+
+def supersede_draft(note):
+    """
+    Before a full save by another path (editor save, AI conversion): drop the
+    draft and give the note a version no client has seen yet.
+    """
+    note.version = current_state(note)['version'] + 1
+    discard_draft(note)
+
+
+def _write(note, state):
+    """Compare-and-swap the draft into the database. Raises AutosaveConflict"""
+    with transaction.atomic():
+        db_version = Note.objects.select_for_update().filter(pk=note.pk).values_list('version', flat=True).first()
+        if db_version != state['db_version']:
+            note.refresh_from_db()
+            raise AutosaveConflict(_state_from_note(note))
+        note.title = state['title']
+        note.content = state['content']
+        note.version = state['version']
+        note._skip_link_parsing = True  # Skip auto-parsing on autosave
+        note.save()
+    state.update(db_version=state['version'], dirty=False, flushed_at=time.time())
+
+
+def autosave(note, base_version=None, patches=None, content=None, title=None, flush=False):
+    """
+    Apply an autosave request to `note`.
+    base_version None skips the conflict check (full content from older clients).
+    Returns: dict version / changed / saved (written to the database) / pending
+    Raises: AutosaveConflict, InvalidPatch
+    """
+    with _locked(note.pk):
+        # `note` was loaded before the lock: another request may have flushed since
+        state = current_state(note, Note.objects.filter(pk=note.pk).values_list('version', flat=True).first())
+        if base_version is not None and base_version != state['version']:
+            raise AutosaveConflict(state)
+
+        new_content = content if content is not None else apply_patches(state['content'], patches or [])
+        new_title = title if title is not None else state['title']
+        changed = new_content != state['content'] or new_title != state['title']
+        if changed:
+            state.update(title=new_title, content=new_content, version=state['version'] + 1, dirty=True)
+
+        saved = False
+        if state['dirty'] and (flush or time.time() - state['flushed_at'] >= flush_interval()):
+            try:
+                _write(note, state)
+            except AutosaveConflict:
+                discard_draft(note)
+                raise
+            saved = True
+
+        if changed or saved:
+            cache.set(_draft_key(note.pk), state, DRAFT_TIMEOUT)
+
+    return {
+        'version': state['version'],
+        'changed': changed,
+        'saved': saved,
+        'pending': state['dirty'],
+        'saved_at': timezone.now().isoformat() if saved else None,
+    }
@@ -0,0 +1,26 @@
+# Full-text search index for notes (see notes/search.py)
+# The statements are frozen in notes/migrations/_fts.py: later changes to
+# notes.search must not change what this migration does.
+
+from django.db import migrations
+
+from notes.migrations import _fts
+
+
+def create_search_index(apps, schema_editor):
+    _fts.create_index(schema_editor.connection, 'notes_note', 'title', 'content')
+
+
+def drop_search_index(apps, schema_editor):
+    _fts.drop_index(schema_editor.connection, 'notes_note')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_pendinglink'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
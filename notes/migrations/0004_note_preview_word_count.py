@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+from notes.migrations import _fts
+
+PREVIEW_LENGTH = 150
+BATCH_SIZE = 500
+
+
+def backfill_preview_and_word_count(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    batch = []
+    for note in Note.objects.only('id', 'content').iterator(chunk_size=BATCH_SIZE):
+        content = note.content or ''
+        note.preview = content[:PREVIEW_LENGTH] + '...' if len(content) > PREVIEW_LENGTH else content
+        note.word_count = len(content.split())
+        batch.append(note)
+        if len(batch) >= BATCH_SIZE:
+            Note.objects.bulk_update(batch, ['preview', 'word_count'])
+            batch = []
+    if batch:
+        Note.objects.bulk_update(batch, ['preview', 'word_count'])
+
+
+def restore_search_index(apps, schema_editor):
+    # SQLite rebuilds notes_note to add (or, backwards, remove) the columns,
+    # which drops the FTS triggers
+    _fts.restore_triggers(schema_editor.connection, 'notes_note', 'title', 'content')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Runs last when migrating backwards, after the table rebuild
+        migrations.RunPython(migrations.RunPython.noop, restore_search_index),
+        migrations.AddField(
+            model_name='note',
+            name='preview',
+            field=models.CharField(blank=True, editable=False, max_length=153),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', '-is_pinned', '-updated_at', '-id'], name='notes_note_list_idx'),
+        ),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+        migrations.RunPython(backfill_preview_and_word_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:23
+
+from django.db import migrations, models
+
+from notes.migrations import _fts
+
+
+def restore_search_index(apps, schema_editor):
+    # SQLite rebuilds notes_note to add (or, backwards, remove) the column,
+    # which drops the FTS triggers
+    _fts.restore_triggers(schema_editor.connection, 'notes_note', 'title', 'content')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_preview_word_count'),
+    ]
+
+    operations = [
+        # Runs last when migrating backwards, after the table rebuild
+        migrations.RunPython(migrations.RunPython.noop, restore_search_index),
+        migrations.AddField(
+            model_name='note',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,117 @@
+"""Full-text index DDL, shared by the migrations and notes.search.
+
+One FTS index covers a `title` and a `body` column of `table`:
+- SQLite: FTS5 table `<table>_fts` (external content) kept in sync by
+  triggers;
+- PostgreSQL: generated `search_vector` tsvector column + GIN index.
+
+Migrations run these statements, so they are frozen: a change here must
+come with a migration that moves existing databases to the new form.
+The module name starts with an underscore so the migration loader skips it.
+"""
+
+
+def fts_table(table):
+    return f'{table}_fts'
+
+
+def sqlite_triggers(table, title, body):
+    fts = fts_table(table)
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {title}, {body}) VALUES (new.id, new.{title}, new.{body});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {title}, {body}) VALUES ('delete', old.id, old.{title}, old.{body});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {title}, {body} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {title}, {body}) VALUES ('delete', old.id, old.{title}, old.{body});
+            INSERT INTO {fts}(rowid, {title}, {body}) VALUES (new.id, new.{title}, new.{body});
+        END""",
+    ]
+
+
+def sqlite_rebuild(table):
+    fts = fts_table(table)
+    return f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"
+
+
+def sqlite_index(table, title, body):
+    fts = fts_table(table)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {title}, {body},
+            content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )""",
+        *sqlite_triggers(table, title, body),
+        sqlite_rebuild(table),
+    ]
+
+
+def sqlite_drop(table):
+    fts = fts_table(table)
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_update",
+        f"DROP TRIGGER IF EXISTS {fts}_delete",
+        f"DROP TRIGGER IF EXISTS {fts}_insert",
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+def postgres_index(table, title, body):
+    return [
+        f"""ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce({title}, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce({body}, '')), 'B')
+        ) STORED""",
+        f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING GIN (search_vector)",
+    ]
+
+
+def postgres_drop(table):
+    return [
+        f"DROP INDEX IF EXISTS {table}_search_idx",
+        f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector",
+    ]
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def create_index(connection, table, title, body):
+    """Create (or repair) the index; idempotent. Returns False when the database has no full-text support"""
+    if connection.vendor == 'postgresql':
+        statements = postgres_index(table, title, body)
+    elif connection.vendor == 'sqlite' and sqlite_has_fts5(connection):
+        statements = sqlite_index(table, title, body)
+    else:
+        return False
+    _execute(connection, statements)
+    return True
+
+
+def drop_index(connection, table):
+    statements = {'postgresql': postgres_drop, 'sqlite': sqlite_drop}.get(connection.vendor)
+    if statements:
+        _execute(connection, statements(table))
+
+
+def restore_triggers(connection, table, title, body):
+    """
+    SQLite rebuilds a table to add or remove a column, which drops its
+    triggers: re-create them (and reindex) when the FTS table exists.
+    The PostgreSQL generated column survives such changes.
+    """
+    if connection.vendor != 'sqlite' or fts_table(table) not in connection.introspection.table_names():
+        return
+    _execute(connection, [*sqlite_triggers(table, title, body), sqlite_rebuild(table)])
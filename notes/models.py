@@ -16,6 +16,15 @@ class Tag(models.Model):
         return self.name
 
 
+PREVIEW_LENGTH = 150
+
+
+def content_preview(content):
+    """First PREVIEW_LENGTH characters of the content, '...' when truncated"""
+    content = content or ''
+    return content[:PREVIEW_LENGTH] + '...' if len(content) > PREVIEW_LENGTH else content
+
+
 class Note(models.Model):
     """Main note model - Obsidian-style markdown notes"""
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='user_notes')
@@ -24,6 +33,12 @@ class Note(models.Model):
     content = models.TextField(blank=True)
     tags = models.ManyToManyField(Tag, blank=True, related_name='notes')
 
+    # Denormalized from content on save (list views never load the body)
+    preview = models.CharField(max_length=PREVIEW_LENGTH + 3, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped on every title/content change (autosave conflict detection, see notes.autosave)
+    version = models.PositiveIntegerField(default=0, editable=False)
+
     # Metadata
     is_pinned = models.BooleanField(default=False)
     is_archived = models.BooleanField(default=False)
@@ -39,6 +54,8 @@ class Note(models.Model):
         indexes = [
             models.Index(fields=['user', '-updated_at']),
             models.Index(fields=['user', 'is_deleted']),
+            # Keyset pagination of the notes list (see notes.views.api_notes_list)
+            models.Index(fields=['user', '-is_pinned', '-updated_at', '-id'], name='notes_note_list_idx'),
         ]
 
     def __str__(self):
@@ -47,6 +64,11 @@ class Note(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        self.preview = content_preview(self.content)
+        self.word_count = len((self.content or '').split())
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'preview', 'word_count'}
         super().save(*args, **kwargs)
 
     def get_backlinks(self):
@@ -54,8 +76,8 @@ class Note(models.Model):
         return self.incoming_links.all()
 
     def get_word_count(self):
-        """Calculate word count"""
-        return len(self.content.split())
+        """Word count (stored on save)"""
+        return self.word_count
 
 
 class NoteLink(models.Model):
@@ -67,3 +89,24 @@ class NoteLink(models.Model):
 
     class Meta:
         unique_together = ('source_note', 'target_note')
+
+
+class PendingLink(models.Model):
+    """[[Title]] reference whose target note does not exist yet.
+
+    Resolved into a NoteLink as soon as a note with that title is created
+    (see notes.utils.resolve_pending_links).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='pending_note_links')
+    source_note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='pending_links')
+    target_title = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('source_note', 'target_title')
+        indexes = [
+            models.Index(fields=['user', 'target_title']),
+        ]
+
+    def __str__(self):
+        return f"{self.source_note} → [[{self.target_title}]]"
@@ -0,0 +1,269 @@
+"""Full-text search over notes-app notes.
+
+One interface, one backend per database:
+
+- SQLite: an FTS5 table (``notes_note_fts``) using notes_note as external
+  content, ranked with BM25 (title weighted above content);
+- PostgreSQL: a generated ``search_vector`` tsvector column with a GIN
+  index, ranked with ts_rank_cd (PostgreSQL has no BM25);
+- anything else (or FTS5 missing): the previous icontains filter, unranked.
+
+The machinery is a FullTextIndex over one table (a title and a body
+column, searched per owner); core.services.search_index builds its own
+over core_searchdocument.
+
+The index is created by migration 0003_note_search and kept in sync by the
+database itself (SQLite triggers / PostgreSQL generated column), so
+save(), bulk_create() and queryset.update() all stay searchable.
+The DDL lives in notes/migrations/_fts.py, frozen for the migrations.
+On SQLite, a migration that rebuilds notes_note drops the triggers: it must
+re-create them in both directions (_fts.restore_triggers).
+"""
+import html
+import re
+from typing import NamedTuple
+
+from django.db import connections
+from django.db.models import Q
+
+from .migrations import _fts
+from .models import Note
+
+SEARCH_MAX_RESULTS = 200
+SNIPPET_WORDS = 12
+TITLE_WEIGHT = 10.0
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Sentinels wrapped around matches by the database, turned into <mark> after escaping
+MARK_START, MARK_END = '\x02', '\x03'
+
+
+class SearchResult(NamedTuple):
+    note_id: int
+    rank: float
+    snippet: str  # HTML-escaped, matches wrapped in <mark>
+
+
+class Match(NamedTuple):
+    pk: int
+    columns: tuple  # values of the requested extra columns
+    title: str  # HTML-escaped, matches wrapped in <mark>
+    snippet: str  # idem
+    rank: float  # higher is better
+
+
+def query_terms(query):
+    """Words of the user query (punctuation and operators are dropped)"""
+    return TOKEN_RE.findall(query or '')
+
+
+def snippet_html(raw):
+    escaped = html.escape(raw or '')
+    return escaped.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def _where(filters, alias):
+    """filters: {column: value or list of values} -> (SQL, params), ANDed"""
+    sql, params = '', []
+    for column, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            sql += f" AND {alias}{column} IN ({', '.join(['%s'] * len(value))})"
+            params.extend(value)
+        else:
+            sql += f" AND {alias}{column} = %s"
+            params.append(value)
+    return sql, params
+
+
+class BaseSearchBackend:
+    """search(owner_id, query, ...) -> [Match] best first"""
+
+    def __init__(self, index, connection):
+        self.index = index
+        self.connection = connection
+
+    def search(self, owner_id, query, filters=None, columns=(), limit=SEARCH_MAX_RESULTS, offset=0):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+
+    @staticmethod
+    def match_expression(terms):
+        # Every word must appear; the last one is a prefix (search as you type)
+        quoted = ['"%s"' % term.replace('"', '') for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def search(self, owner_id, query, filters=None, columns=(), limit=SEARCH_MAX_RESULTS, offset=0):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        index, fts = self.index, self.index.fts_table
+        where, where_params = _where(filters or {}, 't.')
+        extra = ''.join(f', t.{column}' for column in columns)
+        page_extra = ''.join(f', page.{column}' for column in columns)
+        match = self.match_expression(terms)
+        # Rank first, then highlight the page only: highlight()/snippet() are
+        # evaluated for every matching row when they sit next to the ORDER BY
+        sql = (
+            f"WITH page AS ("
+            f"SELECT t.id{extra}, bm25({fts}, %s, 1.0) AS rank "
+            f"FROM {fts} JOIN {index.table} t ON t.id = {fts}.rowid "
+            f"WHERE {fts} MATCH %s AND t.{index.owner} = %s{where} "
+            f"ORDER BY rank LIMIT %s OFFSET %s) "
+            f"SELECT page.id{page_extra}, highlight({fts}, 0, %s, %s), "
+            f"snippet({fts}, 1, %s, %s, '…', %s), page.rank "
+            f"FROM page JOIN {fts} ON {fts}.rowid = page.id "
+            f"WHERE {fts} MATCH %s ORDER BY page.rank"
+        )
+        params = [index.title_weight, match, owner_id, *where_params, limit, offset,
+                  MARK_START, MARK_END, MARK_START, MARK_END, SNIPPET_WORDS, match]
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            # bm25() is lower-is-better; expose higher-is-better ranks
+            return [
+                Match(row[0], tuple(row[1:-3]), snippet_html(row[-3]), snippet_html(row[-2]), -row[-1])
+                for row in cursor.fetchall()
+            ]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+
+    def search(self, owner_id, query, filters=None, columns=(), limit=SEARCH_MAX_RESULTS, offset=0):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        index = self.index
+        # Same semantics as SQLite: all words, last one as a prefix
+        tsquery = ' & '.join(terms[:-1] + [terms[-1] + ':*'])
+        where, where_params = _where(filters or {}, '')
+        extra = ''.join(f', {column}' for column in columns)
+        sql = (
+            f"SELECT id{extra}, ts_headline('simple', {index.title}, q, %s), "
+            f"ts_headline('simple', {index.body}, q, %s), ts_rank_cd(search_vector, q) AS rank "
+            f"FROM {index.table}, to_tsquery('simple', %s) q "
+            f"WHERE search_vector @@ q AND {index.owner} = %s{where} "
+            f"ORDER BY rank DESC LIMIT %s OFFSET %s"
+        )
+        marks = f'StartSel={MARK_START}, StopSel={MARK_END}'
+        params = [f'{marks}, HighlightAll=true', f'{marks}, MaxWords={SNIPPET_WORDS}, MinWords=5',
+                  tsquery, owner_id, *where_params, limit, offset]
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [
+                Match(row[0], tuple(row[1:-3]), snippet_html(row[-3]), snippet_html(row[-2]), row[-1])
+                for row in cursor.fetchall()
+            ]
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Fallback without a full-text index: unranked substring search"""
+
+    def search(self, owner_id, query, filters=None, columns=(), limit=SEARCH_MAX_RESULTS, offset=0):
+        query = (query or '').strip()
+        if not query:
+            return []
+        index = self.index
+        lookups = {
+            f'{column}__in' if isinstance(value, (list, tuple, set)) else column: value
+            for column, value in (filters or {}).items()
+        }
+        rows = (
+            index.model.objects.using(self.connection.alias)
+            .filter(**{index.owner: owner_id}, **lookups)
+            .filter(Q(**{f'{index.title}__icontains': query}) | Q(**{f'{index.body}__icontains': query}))
+        )
+        if index.fallback_order:
+            rows = rows.order_by(*index.fallback_order)
+        rows = rows.values_list('id', *columns, index.title, index.body)[offset:offset + limit]
+        return [
+            Match(row[0], tuple(row[1:-2]), html.escape(row[-2] or ''), html.escape((row[-1] or '')[:150]), 0.0)
+            for row in rows
+        ]
+
+
+class FullTextIndex:
+    """
+    Full-text index over the `title` and `body` columns of a model's table,
+    searched per owner (`owner`: owner column). Builds the index DDL and
+    picks the search backend of each database alias.
+    """
+
+    def __init__(self, model, title='title', body='content', owner='user_id',
+                 title_weight=TITLE_WEIGHT, fallback_order=()):
+        self.model = model
+        self.title = title
+        self.body = body
+        self.owner = owner
+        self.title_weight = title_weight
+        self.fallback_order = fallback_order  # ordering of the unranked fallback
+        self._backends = {}
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def fts_table(self):
+        return _fts.fts_table(self.table)
+
+    # --- Index management (rebuild; the DDL is shared with the migrations) ---
+
+    def create(self, connection):
+        """Create (or repair) the full-text index of the database behind `connection`"""
+        created = _fts.create_index(connection, self.table, self.title, self.body)
+        self._backends.pop(connection.alias, None)
+        return created
+
+    def drop(self, connection):
+        _fts.drop_index(connection, self.table)
+        self._backends.pop(connection.alias, None)
+
+    def fts_table_exists(self, connection):
+        return self.fts_table in connection.introspection.table_names()
+
+    def get_backend(self, using='default'):
+        """Search backend for a database alias (chosen once per alias)"""
+        if using not in self._backends:
+            connection = connections[using]
+            if connection.vendor == 'postgresql':
+                backend = PostgresSearchBackend(self, connection)
+            elif connection.vendor == 'sqlite' and self.fts_table_exists(connection):
+                backend = SQLiteFTSBackend(self, connection)
+            else:
+                backend = SimpleSearchBackend(self, connection)
+            self._backends[using] = backend
+        return self._backends[using]
+
+
+NOTES_INDEX = FullTextIndex(Note)
+FTS_TABLE = NOTES_INDEX.fts_table
+
+
+def create_index(connection):
+    return NOTES_INDEX.create(connection)
+
+
+def drop_index(connection):
+    NOTES_INDEX.drop(connection)
+
+
+def fts_table_exists(connection):
+    return NOTES_INDEX.fts_table_exists(connection)
+
+
+def get_backend(using='default'):
+    return NOTES_INDEX.get_backend(using)
+
+
+def search_notes(user, query, filters=None, limit=SEARCH_MAX_RESULTS, offset=0):
+    """
+    Ranked matches of `query` among the user's notes (deleted notes excluded).
+    filters: extra {column: value or list} conditions, applied before ranking
+    and paging so that `limit` counts matching notes only.
+    """
+    filters = {'is_deleted': False, **(filters or {})}
+    matches = get_backend().search(user.pk, query, filters=filters, limit=limit, offset=offset)
+    return [SearchResult(match.pk, match.rank, match.snippet) for match in matches]
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save, pre_save, pre_delete
+from django.dispatch import receiver
+from .models import Note
+from .utils import mark_links_pending, resolve_pending_links
+
+
+@receiver(pre_save, sender=Note)
+def remember_previous_title(sender, instance, **kwargs):
+    instance._previous_title = None
+    if not instance._state.adding:
+        instance._previous_title = Note.objects.filter(pk=instance.pk).values_list('title', flat=True).first()
+
+
+@receiver(post_save, sender=Note)
+def resolve_forward_links(sender, instance, created, **kwargs):
+    """A note now answers to this title: materialize the pending [[title]] links"""
+    previous = getattr(instance, '_previous_title', None)
+    if not created and previous == instance.title:
+        return
+    if previous:
+        mark_links_pending(instance, title=previous)
+    resolve_pending_links(instance)
+
+
+@receiver(pre_delete, sender=Note)
+def keep_links_pending(sender, instance, **kwargs):
+    mark_links_pending(instance)
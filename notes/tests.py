@@ -0,0 +1,176 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+
+from .models import Note, Tag
+from .search import SQLiteFTSBackend, get_backend
+
+
+class NoteSearchTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='searcher', password='pass')
+        other = User.objects.create_user(username='other', password='pass')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        tag = Tag.objects.create(name='astro')
+        self.title_hit = Note.objects.create(user=self.user, title='Nebula survey', content='Notes from the night.')
+        self.title_hit.tags.add(tag)
+        self.body_hit = Note.objects.create(user=self.user, title='Night sky', content='A faint nebula near <Orion>.')
+        Note.objects.create(user=self.user, title='Groceries', content='Milk, bread')
+        Note.objects.create(user=self.user, title='Deleted nebula', content='', is_deleted=True)
+        Note.objects.create(user=other, title='Nebula', content='Someone else')
+
+    def search(self, query, **params):
+        return self.client.get('/notes/api/notes/', {'search': query, **params}).json()['notes']
+
+    def test_results_are_ranked_and_scoped_to_the_user(self):
+        self.assertIsInstance(get_backend(), SQLiteFTSBackend)
+        notes = self.search('nebula')
+        self.assertEqual([n['id'] for n in notes], [self.title_hit.id, self.body_hit.id])
+        self.assertEqual(notes[0]['tags'], ['astro'])
+        self.assertIn('<mark>nebula</mark>', notes[1]['snippet'])
+        self.assertIn('&lt;Orion&gt;', notes[1]['snippet'])
+
+    def test_index_follows_updates_and_prefix_queries(self):
+        self.assertEqual(self.search('neb'), self.search('nebula'))
+        self.assertEqual(self.search('"nebula" (*'), self.search('nebula'))  # FTS syntax is ignored
+
+        Note.objects.filter(pk=self.body_hit.pk).update(content='Clear sky tonight')
+        self.body_hit.refresh_from_db()
+        self.body_hit.title = 'Comet'
+        self.body_hit.save()
+        self.assertEqual([n['id'] for n in self.search('nebula')], [self.title_hit.id])
+        self.assertEqual([n['id'] for n in self.search('comet')], [self.body_hit.id])
+
+        self.body_hit.delete()
+        self.assertEqual(self.search('comet'), [])
+
+    def test_filters_apply_before_paging(self):
+        archived = [Note.objects.create(user=self.user, title=f'Nebula {i}', is_archived=True) for i in range(3)]
+        self.assertEqual({n['id'] for n in self.search('nebula', archived='true')}, {n.id for n in archived})
+        self.assertEqual([n['id'] for n in self.search('nebula', tag='astro')], [self.title_hit.id])
+        self.assertEqual(self.search('nebula', tag='missing'), [])
+
+        data = self.client.get('/notes/api/notes/', {'search': 'nebula', 'archived': 'true', 'limit': 2}).json()
+        self.assertEqual((len(data['notes']), data['next_offset']), (2, 2))
+        data = self.client.get('/notes/api/notes/', {'search': 'nebula', 'archived': 'true', 'limit': 2, 'offset': 2}).json()
+        self.assertEqual((len(data['notes']), data['next_offset']), (1, None))
+
+        response = self.client.get('/notes/api/notes/', {'search': 'nebula', 'cursor': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+class NotesListPaginationTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='lister', password='pass')
+        self.client = Client()
+        self.client.force_login(self.user)
+        tag = Tag.objects.create(name='work')
+        self.notes = [Note.objects.create(user=self.user, title=f'Note {i}', content='word ' * (i + 1)) for i in range(7)]
+        self.notes[2].is_pinned = True
+        self.notes[2].save()
+        self.notes[5].tags.add(tag)
+        Note.objects.create(user=self.user, title='Trashed', is_deleted=True)
+
+    def test_pages_follow_the_list_order_without_overlap(self):
+        pages, cursor = [], None
+        while True:
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            with self.assertNumQueries(4):  # session, user, notes, tags
+                data = self.client.get('/notes/api/notes/', params).json()
+            pages.append([n['title'] for n in data['notes']])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+
+        expected = [n.title for n in Note.objects.filter(user=self.user, is_deleted=False).order_by('-is_pinned', '-updated_at', '-id')]
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        self.assertEqual(expected[0], 'Note 2')
+
+        self.assertEqual(self.client.get('/notes/api/notes/', {'cursor': 'nope'}).status_code, 400)
+
+    def test_preview_and_word_count_are_stored(self):
+        note = Note.objects.create(user=self.user, title='Long', content='x' * 200)
+        self.assertEqual(note.preview, 'x' * 150 + '...')
+        note.content = 'one two three'
+        note.save(update_fields=['content'])
+        note.refresh_from_db()
+        self.assertEqual((note.preview, note.word_count), ('one two three', 3))
+
+        row = next(n for n in self.client.get('/notes/api/notes/').json()['notes'] if n['title'] == 'Note 5')
+        self.assertEqual((row['word_count'], row['content_preview'], row['tags']), (6, 'word ' * 5 + 'word ', ['work']))
+
+
+@override_settings(NOTES_AUTOSAVE_FLUSH_SECONDS=60)
+class NoteAutosaveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username='writer', password='pass')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.note = Note.objects.create(user=self.user, title='Draft', content='Hello world')
+        self.url = f'/notes/api/notes/{self.note.id}/autosave/'
+
+    def post(self, url=None, **payload):
+        return self.client.post(url or self.url, json.dumps(payload), content_type='application/json')
+
+    def test_patches_are_buffered_then_flushed(self):
+        data = self.post(base_version=0, patches=[{'start': 6, 'end': 11, 'text': 'there'}]).json()
+        self.assertEqual((data['version'], data['saved'], data['pending']), (1, True, False))  # first write goes through
+
+        data = self.post(base_version=1, patches=[{'start': 11, 'end': 11, 'text': '!'}]).json()
+        self.assertEqual((data['version'], data['saved'], data['pending']), (2, False, True))
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.content, self.note.version), ('Hello there', 1))
+        # Readers see the buffered draft
+        detail = self.client.get(f'/notes/api/notes/{self.note.id}/').json()['note']
+        self.assertEqual((detail['content'], detail['version']), ('Hello there!', 2))
+
+        data = self.post(base_version=2, patches=[], flush=True).json()
+        self.assertEqual((data['changed'], data['saved']), (False, True))
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.content, self.note.version, self.note.word_count), ('Hello there!', 2, 2))
+
+    def test_noop_autosave_does_not_write(self):
+        updated_at = self.note.updated_at
+        data = self.post(base_version=0, patches=[{'start': 0, 'end': 5, 'text': 'Hello'}], title='Draft', flush=True).json()
+        self.assertEqual((data['changed'], data['saved'], data['version']), (False, False, 0))
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.updated_at, updated_at)
+        self.assertEqual(self.post(base_version=0, patches=[{'start': 5, 'end': 99, 'text': ''}]).status_code, 400)
+
+    def test_stale_versions_are_rejected(self):
+        self.post(base_version=0, patches=[{'start': 0, 'end': 0, 'text': 'Tab A: '}])
+        resp = self.post(base_version=0, patches=[{'start': 0, 'end': 0, 'text': 'Tab B: '}])
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual((resp.json()['version'], resp.json()['content']), (1, 'Tab A: Hello world'))
+
+        # A full save from the editor wins over the buffered draft and bumps the version
+        self.post(base_version=1, patches=[{'start': 0, 'end': 0, 'text': '>'}])
+        update = self.post(f'/notes/api/notes/{self.note.id}/update/', title='Draft', content='Rewritten').json()
+        self.assertEqual(update['version'], 3)  # never reuses the discarded draft's version
+        self.assertEqual(self.post(base_version=2, patches=[]).status_code, 409)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.content, 'Rewritten')
+
+    def test_edit_mirrored_from_the_graph_supersedes_the_draft(self):
+        from core.models import Note as CoreNote
+
+        self.post(base_version=0, patches=[{'start': 0, 'end': 0, 'text': 'A: '}], flush=True)
+        self.post(base_version=1, patches=[{'start': 0, 'end': 0, 'text': '>'}])  # buffered draft, version 2
+        core_note = CoreNote.objects.get(owner=self.user, title='Draft')
+        core_note.body = 'Edited in the graph'
+        core_note.save()
+
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.content, self.note.version), ('Edited in the graph', 3))
+        self.assertEqual(self.post(base_version=2, patches=[], flush=True).status_code, 409)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.content, 'Edited in the graph')
@@ -1,23 +1,34 @@
+import logging
 import re
-from .models import Note, NoteLink
+from .models import Note, NoteLink, PendingLink
 
 # Optional sync to core graph models (keeps universe graph in sync with notes app)
 try:
     from core.models import Note as CoreNote, Link as CoreLink
+    from core.services import graph_analytics, graph_broadcast
 except Exception:
     CoreNote = None
     CoreLink = None
+    graph_analytics = None
+    graph_broadcast = None
 
 
+logger = logging.getLogger(__name__)
+
 LINK_PATTERN = re.compile(r"\[\[([^\]]+)\]\]")
 
 
 def parse_note_links(note):
     """Parse the note content for [[Other Note]] links and update NoteLink entries.
 
-    This looks for [[Note Title]] patterns, tries to find a Note with that title
-    belonging to the same user, and creates NoteLink records between source and
-    target. It removes links that are no longer present.
+    All [[Note Title]] targets are resolved with one query on the user's
+    notes; only the links that changed are inserted or deleted. Targets
+    that don't exist yet are recorded as PendingLink rows and turned into
+    real links when a note with that title is created.
+
+    The core graph links of the note are not written here: saving the note
+    syncs its content to the core.Note mirror, whose own link parsing
+    (core.utils.parse_note_links) updates and broadcasts them.
     """
     if not hasattr(note, 'content'):
         return
@@ -25,41 +36,114 @@ def parse_note_links(note):
     matches = LINK_PATTERN.findall(note.content or '')
     target_titles = set([m.strip() for m in matches if m.strip()])
 
-    # Current outgoing targets (by title)
-    existing_targets = set(note.outgoing_links.values_list('target_note__title', flat=True))
-
-    # Add new links (create NoteLink and mirror to core graph when possible)
-    for title in target_titles - existing_targets:
-        target = Note.objects.filter(user=note.user, title=title).first()
-        if not target:
-            # Target doesn't exist (could be a future note); skip for now
-            continue
-
-        NoteLink.objects.get_or_create(source_note=note, target_note=target)
-
-        # Mirror into core graph (best-effort)
-        if CoreNote and CoreLink:
-            try:
-                src_core, _ = CoreNote.objects.get_or_create(owner=note.user, title=note.title, defaults={'body': note.content})
-                dst_core, _ = CoreNote.objects.get_or_create(owner=target.user, title=target.title, defaults={'body': target.content})
-                CoreLink.objects.get_or_create(src=src_core, dst=dst_core)
-            except Exception:
-                # Non-fatal: don't block note saving for graph sync failures
-                pass
-
-    # Remove links that were deleted from content (and mirror removals)
-    for title in existing_targets - target_titles:
-        target = Note.objects.filter(user=note.user, title=title).first()
-        if not target:
-            continue
-
-        NoteLink.objects.filter(source_note=note, target_note=target).delete()
-
-        if CoreNote and CoreLink:
-            try:
-                src_core = CoreNote.objects.filter(owner=note.user, title=note.title).first()
-                dst_core = CoreNote.objects.filter(owner=target.user, title=target.title).first()
-                if src_core and dst_core:
-                    CoreLink.objects.filter(src=src_core, dst=dst_core).delete()
-            except Exception:
-                pass
+    # title -> id, first match in the default ordering (as .first() did)
+    targets = {}
+    if target_titles:
+        for title, target_id in Note.objects.filter(user=note.user, title__in=target_titles).values_list('title', 'id'):
+            targets.setdefault(title, target_id)
+
+    existing = dict(note.outgoing_links.values_list('target_note_id', 'target_note__title'))
+    wanted = set(targets.values())
+    added = {target_id: title for title, target_id in targets.items() if target_id not in existing}
+    removed = {target_id: title for target_id, title in existing.items() if target_id not in wanted}
+
+    if removed:
+        NoteLink.objects.filter(source_note=note, target_note_id__in=removed).delete()
+    if added:
+        NoteLink.objects.bulk_create(
+            [NoteLink(source_note=note, target_note_id=target_id) for target_id in added],
+            ignore_conflicts=True,
+        )
+
+    # Forward references: keep the pending index in sync with the unresolved titles
+    max_length = PendingLink._meta.get_field('target_title').max_length
+    unresolved = {title for title in target_titles - set(targets) if len(title) <= max_length}
+    pending = set(note.pending_links.values_list('target_title', flat=True))
+    if pending - unresolved:
+        note.pending_links.filter(target_title__in=pending - unresolved).delete()
+    if unresolved - pending:
+        PendingLink.objects.bulk_create(
+            [PendingLink(user=note.user, source_note=note, target_title=title) for title in unresolved - pending],
+            ignore_conflicts=True,
+        )
+
+
+def resolve_pending_links(note):
+    """Turn the pending [[note.title]] references of other notes into NoteLinks.
+
+    Returns the number of links created.
+    """
+    pending = PendingLink.objects.filter(user=note.user, target_title=note.title).exclude(source_note=note)
+    sources = dict(pending.values_list('source_note_id', 'source_note__title'))
+    if not sources:
+        return 0
+
+    NoteLink.objects.bulk_create(
+        [NoteLink(source_note_id=source_id, target_note=note) for source_id in sources],
+        ignore_conflicts=True,
+    )
+    PendingLink.objects.filter(user=note.user, target_title=note.title).delete()
+    mirror_links(note.user, [(title, note.title) for title in sources.values()])
+    return len(sources)
+
+
+def mark_links_pending(note, title=None):
+    """Turn the incoming links of a note back into pending references to `title`
+    (the note is being deleted or renamed away from that title).
+
+    The NoteLinks and their core graph mirrors are removed: a [[title]]
+    reference no longer points at this note, and must not stay attached to
+    it when another note later takes the title.
+    """
+    title = title or note.title
+    sources = dict(note.incoming_links.values_list('source_note_id', 'source_note__title'))
+    if not sources:
+        return 0
+    PendingLink.objects.bulk_create(
+        [PendingLink(user=note.user, source_note_id=source_id, target_title=title) for source_id in sources],
+        ignore_conflicts=True,
+    )
+    note.incoming_links.all().delete()
+    # The core note already carries the current title (synced before this runs)
+    mirror_links(note.user, removed=[(source_title, note.title) for source_title in sources.values()])
+    return len(sources)
+
+
+def mirror_links(user, added=(), removed=()):
+    """Mirror link changes into the core graph (best-effort).
+
+    Only for changes the core notes can't see from their own content
+    (pending references resolved or detached).
+    added / removed: (source title, target title) pairs. The core notes are
+    resolved with one query; links are written with one bulk insert and
+    one delete per source.
+    """
+    if not (CoreNote and CoreLink) or not (added or removed):
+        return
+
+    try:
+        titles = {title for pair in list(added) + list(removed) for title in pair}
+        core_ids = {}
+        for title, core_id in CoreNote.objects.filter(owner=user, title__in=titles).values_list('title', 'id'):
+            core_ids.setdefault(title, core_id)
+
+        added_pairs = [(core_ids[src], core_ids[dst]) for src, dst in added if src in core_ids and dst in core_ids]
+        if added_pairs:
+            CoreLink.objects.bulk_create(
+                [CoreLink(src_id=src_id, dst_id=dst_id) for src_id, dst_id in added_pairs],
+                ignore_conflicts=True,
+            )
+
+        removed_pairs = [(core_ids[src], core_ids[dst]) for src, dst in removed if src in core_ids and dst in core_ids]
+        removed_by_src = {}
+        for src_id, dst_id in removed_pairs:
+            removed_by_src.setdefault(src_id, []).append(dst_id)
+        for src_id, dst_ids in removed_by_src.items():
+            CoreLink.objects.filter(src_id=src_id, dst_id__in=dst_ids).delete()
+
+        if added_pairs or removed_pairs:
+            graph_analytics.schedule_layout(user.id)
+        graph_broadcast.links_changed(user.id, added=added_pairs, removed=removed_pairs)
+    except Exception:
+        # Non-fatal: don't block note saving for graph sync failures
+        logger.exception('Could not mirror note links into the core graph for user %s', user.pk)
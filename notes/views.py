@@ -4,8 +4,12 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q, Count
 from django.utils import timezone
+import base64
 import json
+from datetime import datetime
 from .models import Note, Tag, NoteLink
+from .autosave import AutosaveConflict, InvalidPatch, autosave, current_state, supersede_draft
+from .search import search_notes
 from .utils import parse_note_links
 from django.views.decorators.csrf import csrf_exempt
 
@@ -42,6 +46,9 @@ def note_create(request):
 def note_edit(request, note_id):
     """Edit existing note page"""
     note = get_object_or_404(Note, id=note_id, user=request.user, is_deleted=False)
+    # Show the buffered autosave draft, if any, rather than the last flushed content
+    state = current_state(note)
+    note.title, note.content, note.version = state['title'], state['content'], state['version']
     return render(request, 'notes/note_edit.html', {'note': note})
 
 
@@ -50,49 +57,121 @@ def note_edit(request, note_id):
 # ============================================
 
 
+NOTES_PAGE_SIZE = 50
+NOTES_MAX_PAGE_SIZE = 200
+LIST_FIELDS = ('id', 'title', 'slug', 'preview', 'word_count', 'is_pinned', 'is_archived', 'created_at', 'updated_at')
+
+
+def encode_cursor(row):
+    """Opaque cursor for the position after `row` in the list ordering"""
+    raw = json.dumps([row['is_pinned'], row['updated_at'].isoformat(), row['id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Returns: (is_pinned, updated_at, id). Raises ValueError if malformed"""
+    try:
+        is_pinned, updated_at, note_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return bool(is_pinned), datetime.fromisoformat(updated_at), int(note_id)
+    except Exception as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def after_cursor(is_pinned, updated_at, note_id):
+    """Notes after the cursor in the (-is_pinned, -updated_at, -id) ordering"""
+    return (
+        Q(is_pinned__lt=is_pinned)
+        | Q(is_pinned=is_pinned, updated_at__lt=updated_at)
+        | Q(is_pinned=is_pinned, updated_at=updated_at, id__lt=note_id)
+    )
+
+
 @login_required
 def api_notes_list(request):
     """
     GET /api/notes/
-    Query params: ?search=query&tag=tagname&archived=true&pinned=true
+    Query params: ?search=query&tag=tagname&archived=true&pinned=true&limit=50&cursor=...
+
+    Notes are paginated by keyset on (is_pinned, updated_at, id): pass the
+    returned `next_cursor` to get the following page (null on the last one).
+    Only list columns are read (preview and word_count are stored on save).
+
+    With ?search, notes come from the full-text index (notes.search),
+    best match first, each with a highlighted `snippet`. Rank order has no
+    keyset: pages are taken by ?offset=... (`next_offset`, null on the last
+    page) and ?cursor is rejected.
     """
-    notes = Note.objects.filter(user=request.user, is_deleted=False)
+    search = request.GET.get('search', '').strip()
+    cursor = request.GET.get('cursor')
+    if search and cursor:
+        return JsonResponse({'error': 'cursor cannot be combined with search, use offset'}, status=400)
 
-    # Filters
-    search = request.GET.get('search', '')
-    if search:
-        notes = notes.filter(
-            Q(title__icontains=search) | Q(content__icontains=search)
-        )
+    try:
+        limit = min(max(int(request.GET.get('limit', NOTES_PAGE_SIZE)), 1), NOTES_MAX_PAGE_SIZE)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+        keyset = after_cursor(*decode_cursor(cursor)) if cursor else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
+    # Filters
+    filters = {'is_archived': request.GET.get('archived', 'false') == 'true'}
+    if request.GET.get('pinned', '') == 'true':
+        filters['is_pinned'] = True
     tag = request.GET.get('tag', '')
-    if tag:
-        notes = notes.filter(tags__name=tag)
-
-    archived = request.GET.get('archived', 'false') == 'true'
-    notes = notes.filter(is_archived=archived)
 
-    pinned = request.GET.get('pinned', '')
-    if pinned == 'true':
-        notes = notes.filter(is_pinned=True)
+    if search:
+        # Filters go to the index query, so that ranking and paging only see matching notes
+        if tag:
+            filters['id'] = list(Note.tags.through.objects.filter(
+                note__user=request.user, tag__name=tag,
+            ).values_list('note_id', flat=True))
+        if filters.get('id') == []:
+            results = []  # no note carries the tag
+        else:
+            results = search_notes(request.user, search, filters, limit=limit + 1, offset=offset)
+        next_offset = offset + limit if len(results) > limit else None
+        matches = {result.note_id: result for result in results[:limit]}
+        rows = sorted(Note.objects.filter(id__in=list(matches)).values(*LIST_FIELDS), key=lambda row: -matches[row['id']].rank)
+        pagination = {'next_cursor': None, 'next_offset': next_offset}
+    else:
+        notes = Note.objects.filter(user=request.user, is_deleted=False, **filters)
+        if keyset is not None:
+            notes = notes.filter(keyset)
+        if tag:
+            notes = notes.filter(tags__name=tag)
+        rows = list(notes.order_by('-is_pinned', '-updated_at', '-id').values(*LIST_FIELDS)[:limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1])
+        pagination = {'next_cursor': next_cursor}
+
+    # Tags of the page in one query
+    tags = {}
+    for note_id, name in Note.tags.through.objects.filter(note_id__in=[row['id'] for row in rows]).values_list('note_id', 'tag__name'):
+        tags.setdefault(note_id, []).append(name)
 
     # Prepare response
     data = []
-    for note in notes:
-        data.append({
-            'id': note.id,
-            'title': note.title,
-            'slug': note.slug,
-            'content_preview': note.content[:150] + '...' if len(note.content) > 150 else note.content,
-            'word_count': note.get_word_count(),
-            'tags': [tag.name for tag in note.tags.all()],
-            'is_pinned': note.is_pinned,
-            'is_archived': note.is_archived,
-            'created_at': note.created_at.isoformat(),
-            'updated_at': note.updated_at.isoformat(),
-        })
+    for row in rows:
+        item = {
+            'id': row['id'],
+            'title': row['title'],
+            'slug': row['slug'],
+            'content_preview': row['preview'],
+            'word_count': row['word_count'],
+            'tags': sorted(tags.get(row['id'], [])),
+            'is_pinned': row['is_pinned'],
+            'is_archived': row['is_archived'],
+            'created_at': row['created_at'].isoformat(),
+            'updated_at': row['updated_at'].isoformat(),
+        }
+        if search:
+            item['snippet'] = matches[row['id']].snippet
+            item['rank'] = matches[row['id']].rank
+        data.append(item)
 
-    return JsonResponse({'notes': data})
+    return JsonResponse({'notes': data, **pagination})
 
 
 @login_required
@@ -134,6 +213,8 @@ def api_note_update(request, note_id):
     note.title = data.get('title', note.title)
     note.content = data.get('content', note.content)
     note.is_pinned = data.get('is_pinned', note.is_pinned)
+    # A full save supersedes any buffered autosave draft
+    supersede_draft(note)
     note.save()
 
     # Update tags
@@ -148,6 +229,7 @@ def api_note_update(request, note_id):
 
     return JsonResponse({
         'success': True,
+        'version': note.version,
         'message': 'Note updated successfully'
     })
 
@@ -227,20 +309,40 @@ def api_tags_list(request):
 
 
 @login_required
+@require_http_methods(["POST"])
 def api_note_autosave(request, note_id):
-    """POST /api/notes/{id}/autosave/ - Auto-save draft"""
+    """POST /api/notes/{id}/autosave/ - Auto-save draft
+
+    Body JSON: {"base_version": n, "patches": [{"start", "end", "text"}], "title": "...", "flush": false}
+    (or a full "content"). See notes.autosave. 409 with the current state when
+    the note was changed elsewhere since base_version.
+    """
     note = get_object_or_404(Note, id=note_id, user=request.user, is_deleted=False)
-    data = json.loads(request.body)
+    try:
+        data = json.loads(request.body)
+    except Exception:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
 
-    note.content = data.get('content', note.content)
-    note.title = data.get('title', note.title)
-    note._skip_link_parsing = True  # Skip auto-parsing on autosave
-    note.save()
+    try:
+        result = autosave(
+            note,
+            base_version=data.get('base_version'),
+            patches=data.get('patches'),
+            content=data.get('content'),
+            title=data.get('title'),
+            flush=bool(data.get('flush')),
+        )
+    except InvalidPatch as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except AutosaveConflict as e:
+        return JsonResponse({
+            'error': str(e),
+            'version': e.state['version'],
+            'title': e.state['title'],
+            'content': e.state['content'],
+        }, status=409)
 
-    return JsonResponse({
-        'success': True,
-        'saved_at': timezone.now().isoformat()
-    })
+    return JsonResponse({'success': True, **result})
 
 
 @login_required
@@ -260,10 +362,12 @@ def api_note_detail(request, note_id):
             title = getattr(src, 'title', None) or ''
             backlinks_list.append({'id': getattr(src, 'id', None), 'title': title})
 
+        state = current_state(note)
         data = {
             'id': note.id,
-            'title': note.title,
-            'content': note.content,
+            'title': state['title'],
+            'content': state['content'],
+            'version': state['version'],
             'tags': [t.name for t in note.tags.all()],
             'is_pinned': note.is_pinned,
             'is_archived': note.is_archived,
@@ -313,6 +417,7 @@ def api_note_convert(request, note_id):
         return JsonResponse({'error': 'Conversion failed'}, status=500)
 
     if save:
+        supersede_draft(note)
         note.content = converted
         note.save()
 
@@ -1,10 +1,21 @@
 // Universe Graph JavaScript - Cytoscape.js + WebSocket
 let cy = null; let ws = null; let currentNoteId = null;
+// 'lod' when the server streams the graph by viewport (large graphs, see graph_viewport.py)
+let graphMode = 'full'; let viewportTimer = null;
+// First request: whole extent at minimum zoom -> full graph if small, cluster overview otherwise
+const OVERVIEW_PARAMS = 'bbox=-1e9,-1e9,1e9,1e9&zoom=0.01';
 
 function initWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     ws = new WebSocket(`${protocol}//${window.location.host}/ws/graph/`);
-    ws.onmessage = function(event) { const data = JSON.parse(event.data); if (data.type === 'graph_update') { loadGraphData(); } };
+    ws.onmessage = function(event) {
+        const data = JSON.parse(event.data);
+        if (data.type !== 'graph_update') return;
+        // 'delta' carries coalesced changes; anything else means a full reload
+        if (graphMode === 'lod') { scheduleViewportLoad(); }
+        else if (data.action === 'delta' && data.delta && cy && cy.nodes().length) { applyGraphDelta(data.delta); }
+        else { loadGraphData(); }
+    };
     ws.onerror = function(error) { console.error('WebSocket error:', error); };
 }
 
@@ -56,6 +67,13 @@ function initCytoscape() {
                 'source-arrow-shape': 'none',
                 'target-arrow-shape': 'none'
             } },
+            // Cluster super-nodes (viewport mode): the notes outside the view, grouped
+            { selector: 'node.cluster', style: {
+                'background-color': '#FF8C42',
+                'opacity': 0.45,
+                'font-size': '10px',
+                'color': '#FF8C42'
+            } },
             { selector: 'edge.highlight', style: { 'line-color': '#FF8C42', 'opacity': 0.95, 'width': 2 } }
         ],
         layout: { name: 'cose', animate: true, randomize: false, idealEdgeLength: 80, nodeOverlap: 12, gravity: 0.1 },
@@ -65,7 +83,13 @@ function initCytoscape() {
     });
 
     // Interaction handlers
-    cy.on('tap', 'node', function(evt) { const node = evt.target; openNotePanel(node.id()); });
+    cy.on('tap', 'node', function(evt) {
+        const node = evt.target;
+        // Super-node: zoom into the cluster, the viewport reload brings its notes
+        if (node.hasClass('cluster')) { cy.animate({ center: { eles: node }, zoom: Math.max(cy.zoom() * 2, 0.5) }); return; }
+        openNotePanel(node.id());
+    });
+    cy.on('viewport', () => { if (graphMode === 'lod') scheduleViewportLoad(); });
     // Double-tap now opens the note edit page instead of the detail view
     // Double-tap opens the notes app edit page when available (uses notes_app_id),
     // otherwise falls back to the node id.
@@ -98,11 +122,10 @@ const dimmedStyle = document.createElement('style'); dimmedStyle.textContent = `
 async function loadGraphData() {
     try {
         document.getElementById('loadingOverlay').style.display = 'flex';
-        const response = await fetch('/graph/api/graph/');
+        const response = await fetch(`/graph/api/graph/?${OVERVIEW_PARAMS}`);
         const data = await response.json();
-        document.getElementById('totalNotes').textContent = data.stats.total_notes;
-        document.getElementById('totalLinks').textContent = data.stats.total_links;
-        document.getElementById('orphanedNotes').textContent = data.stats.orphaned_notes;
+        graphMode = data.mode || 'full';
+        showGraphStats(data.stats);
         if (data.nodes.length === 0) {
             document.getElementById('loadingOverlay').style.display = 'none';
             document.getElementById('emptyState').style.display = 'flex';
@@ -110,25 +133,144 @@ async function loadGraphData() {
         }
         document.getElementById('emptyState').style.display = 'none';
         if (cy) { cy.elements().remove(); }
+        if (graphMode === 'lod') {
+            addViewportElements(data);
+            cy.fit(50);
+            setTimeout(() => { document.getElementById('loadingOverlay').style.display = 'none'; }, 300);
+            return;
+        }
 
         // Prepare nodes with sizes for white-background black-dot look
         const maxConn = Math.max(1, ...data.nodes.map(n => n.connections));
         const nodes = data.nodes.map(n => {
             const isOrphan = (n.connections === 0);
             const size = isOrphan ? 8 : Math.max(12, Math.min(56, 12 + Math.round((n.connections / maxConn) * 44)));
-            return { data: { id: n.id, title: n.title, connections: n.connections, created_at: n.created_at, size: size, orphan: isOrphan } };
+            const node = { data: { id: n.id, notes_app_id: n.notes_app_id, title: n.title, connections: n.connections, created_at: n.created_at, size: size, orphan: isOrphan, pagerank: n.pagerank, cluster: n.cluster } };
+            if (n.x !== null && n.y !== null) node.position = { x: n.x, y: n.y };
+            return node;
         });
+        const unpositioned = new Set(nodes.filter(n => !n.position).map(n => n.data.id));
         const edges = data.edges.map(e => ({ data: { id: `${e.source}-${e.target}`, source: e.source, target: e.target, strength: e.strength } }));
         cy.add(nodes); cy.add(edges);
         // Mark orphan nodes with a class so the style (small dot, no label) applies
         cy.nodes().forEach(node => {
             if (node.data('orphan')) node.addClass('orphan');
         });
-        cy.layout({ name: 'cose', animate: true, randomize: false, idealEdgeLength: 80 }).run();
+        if (unpositioned.size < nodes.length) {
+            // Server-side layout (graph_analytics): no client simulation, new notes go next to their neighbours
+            placeUnpositioned(cy.nodes().filter(node => unpositioned.has(node.id())));
+            cy.layout({ name: 'preset', fit: true, padding: 50 }).run();
+        } else {
+            cy.layout({ name: 'cose', animate: true, randomize: false, idealEdgeLength: 80 }).run();
+        }
         setTimeout(() => { document.getElementById('loadingOverlay').style.display = 'none'; }, 800);
     } catch (error) { console.error('Error loading graph:', error); document.getElementById('loadingOverlay').innerHTML = `<i class="fas fa-exclamation-triangle fa-3x" style="color:#FF8C42;"></i><p style="color:#FF8C42;">Failed to load graph. Please refresh.</p>`; }
 }
 
+function showGraphStats(stats) {
+    document.getElementById('totalNotes').textContent = stats.total_notes;
+    document.getElementById('totalLinks').textContent = stats.total_links;
+    document.getElementById('orphanedNotes').textContent = stats.orphaned_notes ?? '–';
+}
+
+// Viewport mode: fetch what is visible at the current zoom once panning/zooming settles
+function scheduleViewportLoad() {
+    clearTimeout(viewportTimer);
+    viewportTimer = setTimeout(loadViewport, 250);
+}
+
+async function loadViewport() {
+    const ext = cy.extent();
+    const bbox = [ext.x1, ext.y1, ext.x2, ext.y2].map(v => Math.round(v)).join(',');
+    try {
+        const response = await fetch(`/graph/api/graph/?bbox=${bbox}&zoom=${cy.zoom().toFixed(3)}`);
+        const data = await response.json();
+        if (data.mode !== 'lod') { graphMode = 'full'; loadGraphData(); return; }
+        showGraphStats(data.stats);
+        cy.batch(() => { cy.elements().remove(); addViewportElements(data); });
+    } catch (error) { console.error('Error loading viewport:', error); }
+}
+
+// Nodes come with their precomputed positions: no layout run, the view stays where it is
+function addViewportElements(data) {
+    const notes = data.nodes.filter(n => !n.super);
+    const maxConn = Math.max(1, ...notes.map(n => n.connections));
+    const maxSize = Math.max(1, ...data.nodes.filter(n => n.super).map(n => n.size));
+    cy.add(data.nodes.map(n => {
+        if (n.super) {
+            const size = Math.round(16 + 48 * Math.sqrt(n.size / maxSize));
+            return { group: 'nodes', classes: 'cluster', data: { id: n.id, title: n.title, size: size, cluster: n.cluster }, position: { x: n.x, y: n.y } };
+        }
+        const isOrphan = (n.connections === 0);
+        const size = isOrphan ? 8 : Math.max(12, Math.min(56, 12 + Math.round((n.connections / maxConn) * 44)));
+        return { group: 'nodes', classes: isOrphan ? 'orphan' : '', data: { id: n.id, notes_app_id: n.notes_app_id, title: n.title, connections: n.connections, created_at: n.created_at, size: size, orphan: isOrphan, pagerank: n.pagerank, cluster: n.cluster }, position: { x: n.x, y: n.y } };
+    }));
+    cy.add(data.edges.map(e => ({ group: 'edges', data: { id: `${e.source}-${e.target}`, source: e.source, target: e.target, strength: e.strength } })));
+}
+
+function applyGraphDelta(delta) {
+    let addedNodes = cy.collection();
+    cy.batch(() => {
+        (delta.removed_edges || []).forEach(e => cy.getElementById(`${e.source}-${e.target}`).remove());
+        (delta.removed_nodes || []).forEach(id => cy.getElementById(id).remove());
+        (delta.nodes || []).forEach(n => {
+            const existing = cy.getElementById(n.id);
+            if (existing.nonempty()) {
+                existing.data('title', n.title);
+                if (n.notes_app_id) existing.data('notes_app_id', n.notes_app_id);
+            } else {
+                addedNodes = addedNodes.union(cy.add({ data: { id: n.id, notes_app_id: n.notes_app_id, title: n.title, created_at: n.created_at, connections: 0, size: 8 } }));
+            }
+        });
+        (delta.edges || []).forEach(e => {
+            const id = `${e.source}-${e.target}`;
+            if (cy.getElementById(id).empty() && cy.getElementById(e.source).nonempty() && cy.getElementById(e.target).nonempty()) {
+                cy.add({ data: { id: id, source: e.source, target: e.target, strength: e.strength } });
+            }
+        });
+        refreshNodeSizes();
+    });
+    refreshGraphStats();
+    if (addedNodes.nonempty()) {
+        cy.layout({ name: 'cose', animate: true, randomize: false, fit: false, idealEdgeLength: 80 }).run();
+    }
+}
+
+// Put nodes without a precomputed position at the centre of their positioned neighbours
+function placeUnpositioned(pending) {
+    const pendingIds = new Set(pending.map(node => node.id()));
+    const center = { x: 0, y: 0 };
+    pending.forEach(node => {
+        const placed = node.neighborhood('node').filter(other => !pendingIds.has(other.id()));
+        let x = center.x, y = center.y;
+        if (placed.nonempty()) {
+            x = placed.reduce((sum, other) => sum + other.position('x'), 0) / placed.length;
+            y = placed.reduce((sum, other) => sum + other.position('y'), 0) / placed.length;
+        }
+        node.position({ x: x + (Math.random() - 0.5) * 80, y: y + (Math.random() - 0.5) * 80 });
+    });
+}
+
+// Same sizing rules as loadGraphData, from the edges currently in the graph
+function refreshNodeSizes() {
+    const degrees = cy.nodes().map(node => node.connectedEdges().length);
+    const maxConn = Math.max(1, ...degrees);
+    cy.nodes().forEach(node => {
+        const connections = node.connectedEdges().length;
+        const isOrphan = connections === 0;
+        node.data('connections', connections);
+        node.data('orphan', isOrphan);
+        node.data('size', isOrphan ? 8 : Math.max(12, Math.min(56, 12 + Math.round((connections / maxConn) * 44))));
+        if (isOrphan) { node.addClass('orphan'); } else { node.removeClass('orphan'); }
+    });
+}
+
+function refreshGraphStats() {
+    document.getElementById('totalNotes').textContent = cy.nodes().length;
+    document.getElementById('totalLinks').textContent = cy.edges().length;
+    document.getElementById('orphanedNotes').textContent = cy.nodes().filter(node => node.data('orphan')).length;
+}
+
 async function openNotePanel(noteId) {
     currentNoteId = noteId;
     try {
@@ -52,38 +52,91 @@ document.addEventListener('DOMContentLoaded', function () {
     }
   }
 
-  function saveDraft(){
-    // If no noteId yet, create the note first
+  // Delta autosave (see notes/autosave.py): send only what changed since the
+  // last acknowledged version; the server buffers drafts and flushes them.
+  let noteVersion = parseInt((document.getElementById('noteVersion') || {}).value || '0', 10);
+  let savedTitle = titleEl ? titleEl.value : '';
+  let savedContent = contentEl ? contentEl.value : '';
+  let saving = false;
+  let flushTimer = null;
+
+  // Single splice turning `before` into `after`, in code points (server offsets)
+  function diffPatch(before, after){
+    const a = Array.from(before), b = Array.from(after);
+    let start = 0;
+    while(start < a.length && start < b.length && a[start] === b[start]) start++;
+    let endA = a.length, endB = b.length;
+    while(endA > start && endB > start && a[endA - 1] === b[endB - 1]){ endA--; endB--; }
+    if(start === endA && start === endB) return null;
+    return { start: start, end: endA, text: b.slice(start, endB).join('') };
+  }
+
+  function showSaved(label){
+    autoSaveStatus.textContent = label;
+    setTimeout(()=>autoSaveStatus.textContent = '', 1500);
+  }
+
+  function postAutosave(payload){
+    const csrftoken = getCookie('csrftoken');
+    return fetch('/notes/api/notes/' + noteId + '/autosave/', {
+      method: 'POST',
+      credentials: 'same-origin',
+      keepalive: true,
+      headers: {'Content-Type':'application/json','X-CSRFToken': csrftoken},
+      body: JSON.stringify(payload)
+    }).then(r=>r.json().then(data=>({ status: r.status, data: data })));
+  }
+
+  // Another tab saved this note: keep ours (overwrite) or take theirs
+  function resolveConflict(server){
+    if(server.content === contentEl.value && server.title === titleEl.value){
+      noteVersion = server.version; savedTitle = server.title; savedContent = server.content;
+      return;
+    }
+    if(confirm('This note was changed in another tab or window. Keep your version (OK) or load the other one (Cancel)?')){
+      noteVersion = server.version; savedTitle = server.title; savedContent = server.content;
+      saveDraft(true);
+    } else {
+      titleEl.value = server.title; contentEl.value = server.content;
+      noteVersion = server.version; savedTitle = server.title; savedContent = server.content;
+    }
+  }
+
+  function saveDraft(flush){
+    // If no noteId yet, create the note first (the server then has the content)
     if(!noteId){
       createNote().then(()=>{
-        // After creation, call autosave endpoint to persist current content (server already has content)
-        const csrftoken = getCookie('csrftoken');
-        fetch('/notes/api/notes/' + noteId + '/autosave/', {
-          method: 'POST',
-          credentials: 'same-origin',
-          headers: {'Content-Type':'application/json','X-CSRFToken': csrftoken},
-          body: JSON.stringify({ title: titleEl.value, content: contentEl.value })
-        }).then(r=>r.json()).then(data=>{
-          autoSaveStatus.textContent = 'Saved';
-          setTimeout(()=>autoSaveStatus.textContent = '', 1500);
-        });
+        savedTitle = titleEl.value; savedContent = contentEl.value; noteVersion = 0;
+        showSaved('Saved');
       }).catch(err=>{
         console.error(err);
       });
       return;
     }
-    const csrftoken = getCookie('csrftoken');
-    fetch('/notes/api/notes/' + noteId + '/autosave/', {
-      method: 'POST',
-      credentials: 'same-origin',
-      headers: {'Content-Type':'application/json','X-CSRFToken': csrftoken},
-      body: JSON.stringify({ title: titleEl.value, content: contentEl.value })
-    }).then(r=>r.json()).then(data=>{
-      autoSaveStatus.textContent = 'Saved';
-      setTimeout(()=>autoSaveStatus.textContent = '', 1500);
-    });
+    if(saving){ clearTimeout(autosaveTimer); autosaveTimer = setTimeout(()=>saveDraft(flush), 300); return; }
+
+    const title = titleEl.value, content = contentEl.value;
+    const patch = diffPatch(savedContent, content);
+    if(!patch && title === savedTitle && !flush) return;  // nothing to send
+
+    const payload = { base_version: noteVersion, patches: patch ? [patch] : [], flush: !!flush };
+    if(title !== savedTitle) payload.title = title;
+    saving = true;
+    postAutosave(payload).then(({ status, data })=>{
+      if(status === 409){ resolveConflict(data); return; }
+      if(!data.success){ console.error('Autosave failed', data); return; }
+      noteVersion = data.version; savedTitle = title; savedContent = content;
+      // Buffered on the server: ask for a flush once the flush window is over
+      clearTimeout(flushTimer);
+      if(data.pending) flushTimer = setTimeout(()=>saveDraft(true), 6000);
+      if(data.changed || data.saved) showSaved('Saved');
+    }).catch(err=>console.error(err)).finally(()=>{ saving = false; });
   }
 
+  // Leaving the page or the editor: write the buffered draft now
+  window.addEventListener('pagehide', ()=>{ if(noteId) saveDraft(true); });
+  contentEl && contentEl.addEventListener('blur', ()=>{ if(noteId) saveDraft(true); });
+
   contentEl && contentEl.addEventListener('input', function(){
     document.getElementById('wordCount') && (document.getElementById('wordCount').textContent = contentEl.value.trim().split(/\s+/).filter(Boolean).length);
     document.getElementById('charCount') && (document.getElementById('charCount').textContent = contentEl.value.length);
@@ -137,12 +190,16 @@ document.addEventListener('DOMContentLoaded', function () {
       }).catch(err=>{ console.error(err); alert('Could not save note. See console.'); });
       return;
     }
+    const title = titleEl.value, content = contentEl.value;
     fetch('/notes/api/notes/' + noteId + '/update/', {
       method: 'POST',
       credentials: 'same-origin',
       headers: {'Content-Type':'application/json','X-CSRFToken': csrftoken},
-      body: JSON.stringify({ title: titleEl.value, content: contentEl.value })
-    }).then(r=>r.json()).then(data=>{ autoSaveStatus.textContent = 'Saved'; setTimeout(()=>autoSaveStatus.textContent = '',1500); });
+      body: JSON.stringify({ title: title, content: content })
+    }).then(r=>r.json()).then(data=>{
+      if(data.version !== undefined){ noteVersion = data.version; savedTitle = title; savedContent = content; }
+      autoSaveStatus.textContent = 'Saved'; setTimeout(()=>autoSaveStatus.textContent = '',1500);
+    });
   });
 
   // AI convert button: convert markdown to plain text via AI and retype into editor
@@ -7,6 +7,12 @@ document.addEventListener('DOMContentLoaded', function () {
 
   let debounceTimer = null;
 
+  // Pagination: the API returns next_cursor (list) or next_offset (search)
+  // until the last page
+  let nextPage = null;
+  let listUrl = '';
+  let loadingMore = false;
+
   function fetchNotes(query='', filter='all'){
     let url = '/notes/api/notes/?search=' + encodeURIComponent(query);
     if(filter === 'pinned'){
@@ -14,14 +20,40 @@ document.addEventListener('DOMContentLoaded', function () {
     }else if(filter === 'archived'){
       url += '&archived=true';
     }
+    listUrl = url;
     return fetch(url, { credentials: 'same-origin' })
       .then(r=>r.json())
       .then(data=>{
+        nextPage = nextPageParam(data);
         renderNotes(data.notes || []);
         return data.notes || [];
       });
   }
 
+  function nextPageParam(data){
+    if(data.next_cursor) return '&cursor=' + encodeURIComponent(data.next_cursor);
+    if(data.next_offset) return '&offset=' + data.next_offset;
+    return null;
+  }
+
+  function fetchMoreNotes(){
+    if(!nextPage || loadingMore) return;
+    loadingMore = true;
+    const url = listUrl;
+    fetch(url + nextPage, { credentials: 'same-origin' })
+      .then(r=>r.json())
+      .then(data=>{
+        if(url !== listUrl) return;  // the search/filter changed meanwhile
+        nextPage = nextPageParam(data);
+        (data.notes || []).forEach(appendNote);
+      })
+      .finally(()=>{ loadingMore = false; });
+  }
+
+  notesList.addEventListener('scroll', function(){
+    if(notesList.scrollTop + notesList.clientHeight >= notesList.scrollHeight - 200) fetchMoreNotes();
+  });
+
   const emptyState = document.getElementById('emptyState');
   const noteView = document.getElementById('noteView');
 
@@ -31,16 +63,20 @@ document.addEventListener('DOMContentLoaded', function () {
       notesList.innerHTML = '<p class="muted-text">No notes yet</p>';
       return;
     }
-    notes.forEach(n=>{
-      const el = document.createElement('div');
-      el.className = 'note-item';
-      el.dataset.noteId = n.id;
-      el.innerHTML = `<strong>${escapeHtml(n.title)}</strong><div class="muted-text">${escapeHtml(n.content_preview)}</div>`;
-      el.addEventListener('click', (e)=>{ e.preventDefault(); e.stopPropagation(); showNoteDetail(n.id, el); });
-      // Remove any hrefs that might cause navigation (defensive)
-      el.querySelectorAll('a').forEach(a=>{ a.removeAttribute('href'); a.addEventListener('click', (ev)=>{ ev.preventDefault(); ev.stopPropagation(); }); });
-      notesList.appendChild(el);
-    });
+    notes.forEach(appendNote);
+  }
+
+  function appendNote(n){
+    const el = document.createElement('div');
+    el.className = 'note-item';
+    el.dataset.noteId = n.id;
+    // Search results carry a server-escaped snippet with <mark> around the matches
+    const preview = n.snippet ? n.snippet : escapeHtml(n.content_preview);
+    el.innerHTML = `<strong>${escapeHtml(n.title)}</strong><div class="muted-text">${preview}</div>`;
+    el.addEventListener('click', (e)=>{ e.preventDefault(); e.stopPropagation(); showNoteDetail(n.id, el); });
+    // Remove any hrefs that might cause navigation (defensive)
+    el.querySelectorAll('a').forEach(a=>{ a.removeAttribute('href'); a.addEventListener('click', (ev)=>{ ev.preventDefault(); ev.stopPropagation(); }); });
+    notesList.appendChild(el);
   }
 
   // Prevent anchor clicks inside the notes list from causing a navigation